@@ -0,0 +1,113 @@
+"""Compare per-call and batched retrieval throughput in RAGService.
+
+Run from the repository root after ``process_documents`` has built the
+configured indexes::
+
+    python -m benchmarks.batch_retrieval_benchmark --config config.json --batch-sizes 1 8 32 64
+
+Every workload is a list of (query, analysis) pairs like a folder of photos
+would produce: a few distinct user questions and randomly drawn analysis
+metrics. The per-call path runs ``get_relevant_content`` once per pair; the
+batched path runs ``get_relevant_content_batch`` over the same pairs. Caches
+are cleared before every timed run, so both paths embed their queries.
+``agreement`` is the fraction of photos whose batched top-k chunk ids equal
+the per-call ones.
+"""
+import argparse
+import json
+import time
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from benchmarks.common import print_table, timed, write_json
+from src.rag_service import RAGService
+from src.service_container import create_rag_service
+
+QUESTIONS = [
+    "Evaluate this photo",
+    "How can I improve the composition?",
+    "Is the exposure right?",
+    "What do you think about the colors and the contrast?",
+    "Is the subject sharp enough?",
+]
+
+
+def build_workload(size: int, rng: np.random.Generator) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """Queries and analyses for ``size`` synthetic photos."""
+    queries = [QUESTIONS[int(rng.integers(len(QUESTIONS)))] for _ in range(size)]
+    analyses = [
+        {
+            "brightness": float(rng.uniform(30, 230)),
+            "contrast": float(rng.uniform(0.1, 0.9)),
+            "rule_of_thirds": float(rng.uniform(0.0, 1.0)),
+            "sharpness": float(rng.uniform(20, 800)),
+            "faces": int(rng.integers(0, 3)),
+        }
+        for _ in range(size)
+    ]
+    return queries, analyses
+
+
+def chunk_ids(results: List[Dict[str, Any]]) -> List[Any]:
+    return [result.get("chunk_id") or result["content"] for result in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per batch size (best is kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+    rag_service = create_rag_service(RAGService, config)
+    rag_service.initialize()
+    rng = np.random.default_rng(args.seed)
+
+    # Warm-up so model and index loading are not timed
+    queries, analyses = build_workload(4, rng)
+    rag_service.get_relevant_content_batch(queries, analyses, args.k)
+
+    rows = []
+    for size in args.batch_sizes:
+        queries, analyses = build_workload(size, rng)
+        sequential_times, batch_times = [], []
+        for _ in range(args.repeats):
+            rag_service.clear_caches()
+            sequential, elapsed = timed(
+                lambda: [rag_service.get_relevant_content(query, analysis, args.k)
+                         for query, analysis in zip(queries, analyses)]
+            )
+            sequential_times.append(elapsed)
+            rag_service.clear_caches()
+            batched, elapsed = timed(rag_service.get_relevant_content_batch, queries, analyses, args.k)
+            batch_times.append(elapsed)
+
+        agreement = float(np.mean([chunk_ids(one) == chunk_ids(many) for one, many in zip(sequential, batched)]))
+        sequential_qps = size / min(sequential_times)
+        batch_qps = size / min(batch_times)
+        rows.append({
+            "batch_size": size,
+            "unique_queries": len({rag_service._enhance_query(q, a) for q, a in zip(queries, analyses)}),
+            "per_call_qps": sequential_qps,
+            "batch_qps": batch_qps,
+            "speedup": batch_qps / sequential_qps,
+            "agreement": agreement,
+        })
+
+    print_table(rows, ["batch_size", "unique_queries", "per_call_qps", "batch_qps", "speedup", "agreement"])
+    if args.output:
+        write_json(args.output, {
+            "timestamp": time.time(),
+            "backend": rag_service.backend_name,
+            "hybrid": rag_service.hybrid,
+            "k": args.k,
+            "results": rows,
+        })
+
+
+if __name__ == "__main__":
+    main()
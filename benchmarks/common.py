@@ -0,0 +1,77 @@
+import json
+import time
+import numpy as np
+from typing import List, Dict, Any, Callable, Tuple
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentile of a list of values (0 for an empty list)."""
+    if not values:
+        return 0.0
+    return float(np.percentile(np.asarray(values, dtype=np.float64), q))
+
+
+def summarize_latencies(latencies: List[float]) -> Dict[str, float]:
+    """Mean and tail latencies in milliseconds."""
+    ms = [latency * 1000 for latency in latencies]
+    return {
+        "count": len(ms),
+        "mean_ms": float(np.mean(ms)) if ms else 0.0,
+        "p50_ms": percentile(ms, 50),
+        "p95_ms": percentile(ms, 95),
+        "p99_ms": percentile(ms, 99),
+    }
+
+
+def timed(func: Callable, *args, **kwargs) -> Tuple[Any, float]:
+    """Call a function and return its result with the elapsed wall time in seconds."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def recall_at_k(retrieved: List[Any], relevant: List[Any], k: int) -> float:
+    """Fraction of the relevant items found in the first k retrieved items."""
+    if not relevant:
+        return 0.0
+    relevant = set(relevant[:k])
+    return len(relevant.intersection(retrieved[:k])) / len(relevant)
+
+
+def load_chroma_corpus(collection, batch_size: int = 1000) -> Dict[str, Any]:
+    """Read ids, contents, sources and float32 embeddings from a Chroma collection."""
+    ids, contents, sources, embeddings = [], [], [], []
+    count = collection.count()
+    for offset in range(0, count, batch_size):
+        batch = collection.get(include=["embeddings", "documents", "metadatas"], limit=batch_size, offset=offset)
+        ids.extend(batch["ids"])
+        contents.extend(batch["documents"])
+        sources.extend((metadata or {}).get("source", "Unknown") for metadata in batch["metadatas"])
+        embeddings.extend(batch["embeddings"])
+    return {
+        "ids": ids,
+        "contents": contents,
+        "sources": sources,
+        "embeddings": np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1) if ids else np.zeros((0, 0), dtype=np.float32),
+    }
+
+
+def print_table(rows: List[Dict[str, Any]], columns: List[str]):
+    """Print rows as a fixed-width table."""
+    widths = {column: max([len(column)] + [len(_format(row.get(column))) for row in rows]) for column in columns}
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print("  ".join(_format(row.get(column)).ljust(widths[column]) for column in columns))
+
+
+def write_json(path: str, payload: Dict[str, Any]):
+    """Write a benchmark result as JSON."""
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2)
+    print(f"Results written to {path}")
+
+
+def _format(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return "" if value is None else str(value)
@@ -0,0 +1,101 @@
+"""Measure the effect of MinHash near-duplicate removal on the index.
+
+Run from the repository root after ``process_documents`` has built the vector
+database::
+
+    python -m benchmarks.dedup_benchmark --config config.json --thresholds 0.7 0.8 0.9
+
+For every Jaccard threshold the chunks stored in Chroma are deduplicated
+offline (in insertion order, as ingestion would) and the report shows the
+fraction of the corpus removed, the flat-index size, exact top-k scan
+latency and the share of top-k slots that near-duplicates occupied before
+removal. Queries are stored chunk embeddings, so no embedding model is
+loaded. Use a vector database built with ``ingestion.dedup.enabled`` set to
+false to see the full effect.
+"""
+import argparse
+import json
+import time
+import numpy as np
+from langchain_community.vectorstores import Chroma
+from benchmarks.common import load_chroma_corpus, print_table, summarize_latencies, timed, write_json
+from src.document_processing.dedup import find_duplicates
+from src.retrieval.flat_index import normalize_rows, top_k
+
+
+def bench_scan(matrix: np.ndarray, queries: np.ndarray, k: int):
+    """Per-query latency and returned rows of an exact float16 scan."""
+    latencies, retrieved = [], []
+    for query in queries:
+        rows, elapsed = timed(lambda: top_k(matrix @ query.astype(np.float16), k))
+        latencies.append(elapsed)
+        retrieved.append([row for row, _ in rows])
+    return latencies, retrieved
+
+
+def index_bytes(matrix: np.ndarray, contents) -> int:
+    """Bytes of a flat index: float16 vectors plus chunk text."""
+    return int(matrix.nbytes) + sum(len(content.encode('utf-8')) for content in contents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.7, 0.8, 0.9])
+    parser.add_argument("--num-perm", type=int, default=128)
+    parser.add_argument("--shingle-size", type=int, default=5)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+    corpus = load_chroma_corpus(Chroma(persist_directory=config.get("vector_db_path", "data/vectordb"))._collection)
+    count = len(corpus["ids"])
+    print(f"Corpus: {count} chunks")
+    if count == 0:
+        return
+
+    matrix = normalize_rows(corpus["embeddings"]).astype(np.float16)
+    rng = np.random.default_rng(args.seed)
+    queries = matrix[rng.choice(count, size=min(args.queries, count), replace=False)]
+    baseline_latencies, baseline_retrieved = bench_scan(matrix, queries, args.k)
+
+    baseline = {"threshold": "none", "chunks": count, "removed_pct": 0.0,
+                "index_mb": index_bytes(matrix, corpus["contents"]) / 1e6, "dedup_s": 0.0, "dup_slots_pct": 0.0}
+    baseline.update(summarize_latencies(baseline_latencies))
+    results = [baseline]
+
+    for threshold in args.thresholds:
+        duplicates, dedup_time = timed(find_duplicates, corpus["contents"], threshold, args.num_perm, args.shingle_size)
+        kept = np.asarray([position for position in range(count) if position not in duplicates], dtype=np.int64)
+        kept_matrix = np.ascontiguousarray(matrix[kept])
+        latencies, _ = bench_scan(kept_matrix, queries, args.k)
+        slots = [position for rows in baseline_retrieved for position in rows]
+        result = {
+            "threshold": threshold,
+            "chunks": len(kept),
+            "removed_pct": 100.0 * len(duplicates) / count,
+            "index_mb": index_bytes(kept_matrix, (corpus["contents"][position] for position in kept)) / 1e6,
+            "dedup_s": dedup_time,
+            "dup_slots_pct": 100.0 * sum(1 for position in slots if position in duplicates) / max(1, len(slots)),
+        }
+        result.update(summarize_latencies(latencies))
+        results.append(result)
+
+    print_table(results, ["threshold", "chunks", "removed_pct", "index_mb", "dedup_s", "dup_slots_pct",
+                          "mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+    if args.output:
+        write_json(args.output, {
+            "timestamp": time.time(),
+            "corpus_size": count,
+            "queries": len(queries),
+            "k": args.k,
+            "results": results,
+        })
+
+
+if __name__ == "__main__":
+    main()
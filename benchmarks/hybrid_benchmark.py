@@ -0,0 +1,209 @@
+"""Compare vector-only, BM25-only and hybrid (RRF) retrieval.
+
+Run from the repository root after ``process_documents`` has exported the
+flat and BM25 indexes::
+
+    python -m benchmarks.hybrid_benchmark --config config.json --k 3
+
+Three query sets are reported separately:
+
+- ``term``: photographic terms ("bokeh", "f/1.8", "ISO 3200"...)
+- ``question``: natural-language questions a student would ask
+- ``phrase``: known-item phrases cut verbatim from random chunks; every chunk
+  containing the phrase is relevant. This set favours BM25 by construction
+  and is only a sanity check of the lexical index.
+
+For the term and question sets a chunk is relevant when it matches the
+query's concept pattern: hand-written regular expressions listing the
+synonyms and related wording of the topic, not the query text itself.
+Queries without any relevant chunk in the corpus are skipped. A JSON file
+passed with ``--judgments`` replaces the built-in sets; it maps set names to
+lists of ``{"query": ..., "relevant": [chunk ids]}`` or
+``{"query": ..., "pattern": regex}`` entries.
+
+precision@k is the fraction of the top k that is relevant; recall@k is the
+fraction of the relevant chunks (capped at k) found in the top k.
+"""
+import argparse
+import json
+import re
+import time
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from benchmarks.common import print_table, summarize_latencies, timed, write_json
+from src.rag_service import RAGService
+
+TERM_QUERIES = [
+    ("bokeh", r"bokeh|out[- ]of[- ]focus (?:areas?|background|highlights?)|background blur"),
+    ("f/1.8", r"f/1\.[2-8]\b|wide(?:st)? apertures?|large apertures?|fast lens"),
+    ("ISO 3200", r"\biso\s*(?:1600|3200|6400)\b|high iso|(?:digital|sensor|luminance) noise|\bgrain"),
+    ("golden hour", r"golden hour|magic hour|(?:after|before|near) sunrise|(?:after|before|near) sunset|low sun"),
+    ("chiaroscuro", r"chiaroscuro|low[- ]key|rembrandt light|strong contrast between light and (?:dark|shadow)"),
+    ("rule of thirds", r"rule of thirds|thirds grid|off[- ]cent(?:er|re) (?:subject|composition)"),
+    ("white balance", r"white balance|colou?r temperature|colou?r cast|kelvin"),
+    ("long exposure", r"long exposures?|slow shutter|neutral density|\bnd filter|light trails"),
+    ("depth of field", r"depth of field|\bdof\b|hyperfocal|(?:shallow|deep) focus"),
+    ("histogram", r"histogram|clipp(?:ed|ing)|blown(?:[- ]out)? highlights|crushed (?:blacks|shadows)"),
+    ("leading lines", r"leading lines?|lines? (?:that )?(?:lead|draw|guide)s? the (?:eye|viewer)"),
+    ("vignetting", r"vignett"),
+]
+
+QUESTION_QUERIES = [
+    ("How do I get a blurry background in my portraits?",
+     r"bokeh|shallow depth of field|wide(?:st)? apertures?|background blur|f/1\.[2-8]\b|f/2(?:\.8)?\b"),
+    ("Why do my night photos look grainy?",
+     r"\bnoise\b|\bnoisy\b|\bgrain|high iso|low light"),
+    ("How can I freeze a moving subject?",
+     r"fast shutter|freeze (?:the )?(?:motion|action|movement)|shutter speeds? (?:of )?1/\d{3,}|motion blur"),
+    ("When is the best light for landscape photos?",
+     r"golden hour|blue hour|sunrise|sunset|time of day|soft (?:evening|morning) light"),
+    ("Where should I place the subject in the frame?",
+     r"rule of thirds|composition|negative space|cent(?:er|re)d? (?:the )?subject|placement"),
+    ("Why do my indoor photos look orange?",
+     r"white balance|colou?r temperature|tungsten|incandescent|colou?r cast"),
+    ("How do I make water look silky in a waterfall photo?",
+     r"long exposures?|slow shutter|neutral density|\bnd filter|tripod"),
+    ("How do I avoid blown-out skies?",
+     r"overexpos|blown(?:[- ]out)? highlights|highlights?|histogram|exposure compensation|graduated (?:nd )?filter"),
+    ("How can I make a dramatic portrait with deep shadows?",
+     r"chiaroscuro|low[- ]key|side ?light|rembrandt|hard light|dramatic light"),
+    ("How do I keep the whole landscape sharp from front to back?",
+     r"depth of field|hyperfocal|narrow apertures?|small apertures?|f/(?:8|11|16|22)\b|focus stacking"),
+    ("Why are my handheld photos blurry?",
+     r"camera shake|image stabili[sz]|shutter speed|tripod|reciprocal rule"),
+    ("How do I make the colors of a photo look more natural?",
+     r"white balance|saturation|colou?r correction|colou?r grading|vibrance|colou?r cast"),
+]
+
+
+def pattern_queries(entries: List[Tuple[str, str]], records: List[Dict[str, Any]]) -> List[Tuple[str, List[str]]]:
+    """Judge relevance of every chunk against each query's concept pattern."""
+    queries = []
+    for query, pattern in entries:
+        regex = re.compile(pattern, re.IGNORECASE)
+        relevant = [record["id"] for record in records if regex.search(record["content"])]
+        if relevant:
+            queries.append((query, relevant))
+    return queries
+
+
+def phrase_queries(records: List[Dict[str, Any]], count: int, words: int, seed: int) -> List[Tuple[str, List[str]]]:
+    """Cut phrase queries out of randomly chosen chunks."""
+    rng = np.random.default_rng(seed)
+    queries = []
+    for row in rng.permutation(len(records)):
+        tokens = records[row]["content"].split()
+        if len(tokens) < words:
+            continue
+        start = int(rng.integers(0, len(tokens) - words + 1))
+        phrase = " ".join(tokens[start:start + words])
+        relevant = [record["id"] for record in records if phrase in record["content"]]
+        queries.append((phrase, relevant))
+        if len(queries) >= count:
+            break
+    return queries
+
+
+def load_judgments(path: str, records: List[Dict[str, Any]]) -> Dict[str, List[Tuple[str, List[str]]]]:
+    """Query sets from a judgments file (chunk ids or concept patterns per query)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        judgments = json.load(f)
+    query_sets = {}
+    for name, entries in judgments.items():
+        queries = [(entry["query"], entry["relevant"]) for entry in entries if entry.get("relevant")]
+        queries.extend(pattern_queries([(entry["query"], entry["pattern"]) for entry in entries if "pattern" in entry], records))
+        query_sets[name] = queries
+    return query_sets
+
+
+def precision(retrieved, relevant, k):
+    """Fraction of the top k that is relevant."""
+    return len(set(retrieved[:k]).intersection(relevant)) / k
+
+
+def recall(retrieved, relevant, k):
+    """Fraction of relevant chunks found in the top k, capped at k relevant chunks."""
+    if not relevant:
+        return 0.0
+    return len(set(retrieved[:k]).intersection(relevant)) / min(len(relevant), k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=200, help="Phrase queries")
+    parser.add_argument("--query-words", type=int, default=6, help="Words per phrase query")
+    parser.add_argument("--judgments", help="JSON file with query sets and relevance judgments")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+    retrieval_config = config.get("retrieval", {})
+
+    rag = RAGService(
+        config.get("vector_db_path", "data/vectordb"),
+        precompute_default_queries=False,
+        backend="flat",
+        flat_index_path=retrieval_config.get("flat_index_path", "data/flatindex"),
+        hybrid=True,
+        bm25_index_path=retrieval_config.get("bm25_index_path", "data/bm25index"),
+        rrf_k=retrieval_config.get("rrf_k", 60),
+        hybrid_depth=retrieval_config.get("hybrid_depth", 20)
+    )
+    rag.initialize()
+    records = rag.backend.records
+    if args.judgments:
+        query_sets = load_judgments(args.judgments, records)
+    else:
+        query_sets = {
+            "term": pattern_queries(TERM_QUERIES, records),
+            "question": pattern_queries(QUESTION_QUERIES, records),
+            "phrase": phrase_queries(records, args.queries, args.query_words, args.seed),
+        }
+    print(f"Corpus: {len(records)} chunks; queries: "
+          + ", ".join(f"{len(queries)} {name}" for name, queries in query_sets.items()))
+
+    modes = {
+        "vector": lambda query, embedding: [r["chunk_id"] for r in rag.backend.search(embedding, k=args.k)],
+        "bm25": lambda query, embedding: [chunk_id for chunk_id, _ in rag.lexical_index.search(query, k=args.k)],
+        "hybrid": lambda query, embedding: [r["chunk_id"] for r in rag._hybrid_search(query, embedding, args.k)],
+    }
+    rows = []
+    for set_name, queries in query_sets.items():
+        if not queries:
+            continue
+        embeddings = rag.embedding_model.embed_documents([query for query, _ in queries])
+        for name, search in modes.items():
+            latencies, precisions, recalls = [], [], []
+            for (query, relevant), embedding in zip(queries, embeddings):
+                retrieved, elapsed = timed(search, query, embedding)
+                latencies.append(elapsed)
+                precisions.append(precision(retrieved, relevant, args.k))
+                recalls.append(recall(retrieved, relevant, args.k))
+            row = {
+                "set": set_name,
+                "mode": name,
+                "queries": len(queries),
+                f"precision@{args.k}": float(np.mean(precisions)),
+                f"recall@{args.k}": float(np.mean(recalls)),
+            }
+            row.update(summarize_latencies(latencies))
+            rows.append(row)
+
+    print_table(rows, ["set", "mode", "queries", f"precision@{args.k}", f"recall@{args.k}",
+                       "mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+    if args.output:
+        write_json(args.output, {
+            "timestamp": time.time(),
+            "corpus_size": len(records),
+            "queries": {name: len(queries) for name, queries in query_sets.items()},
+            "k": args.k,
+            "results": rows,
+        })
+
+
+if __name__ == "__main__":
+    main()
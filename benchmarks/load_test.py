@@ -0,0 +1,393 @@
+"""Load-test the full assessment pipeline with concurrent simulated sessions.
+
+Run from the repository root::
+
+    python -m benchmarks.load_test --config config.json --sessions 4 --requests 5 \\
+        --output load.json --baseline load_baseline.json
+
+Every session repeatedly "uploads" a synthetic photo and runs the same stage
+graph as the app: analysis, visualization, query translation, retrieval,
+both LLM calls, enhancement and the translation of the results. The LLM is a
+stub Ollama server in a separate process that streams NDJSON tokens with a
+configurable time to first token and token rate, so the numbers describe
+this node rather than the model host. Retrieval runs against a tiny flat
+index built in the work directory; the embedding and translation models are
+the real ones from the configuration.
+
+The report has the throughput, p50/p95/p99 latency per stage and end to end,
+the process CPU time and the resident memory. With ``--baseline`` the p95
+latencies and the throughput are compared against an earlier ``--output``
+file and the command exits with status 1 if any of them regressed by more
+than ``--tolerance``.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+import cv2
+import numpy as np
+from benchmarks.common import print_table, summarize_latencies, write_json
+from src.assessment_pipeline import build_assessment_graph
+from src.image_io import decode_image
+from src.retrieval.flat_index import FlatIndex
+from src.service_container import create_rag_service
+from src import telemetry
+
+# Corpus of the tiny vector index
+TIPS = [
+    "Place the main subject on a rule of thirds intersection to create a balanced composition.",
+    "Leading lines such as roads or fences guide the eye towards the subject.",
+    "Shoot during the golden hour for warm, soft light and long shadows.",
+    "Underexposed photos lose shadow detail; raise the exposure or use fill light.",
+    "Overexposed skies can be recovered with a graduated filter or by exposing for the highlights.",
+    "Low contrast images look flat; increase contrast or add local dodging and burning.",
+    "A fast shutter speed freezes motion while a slow one conveys movement.",
+    "Use a tripod and a low ISO for sharp landscapes with little noise.",
+    "Focus on the eyes in portraits; a soft focus on the eyes ruins the image.",
+    "A wide aperture gives a shallow depth of field that separates the subject from the background.",
+    "White balance sets the color temperature; cool casts feel cold and warm casts feel inviting.",
+    "Saturated colors attract attention but too much saturation looks artificial.",
+    "Negative space around the subject simplifies the frame and adds emphasis.",
+    "Symmetry and patterns are strong compositional devices, especially when broken by one element.",
+    "Check the horizon is level; a tilted horizon distracts from the scene.",
+    "Framing the subject with doorways or branches adds depth to the picture.",
+]
+
+QUERIES = [
+    "",
+    "Como posso melhorar a composição desta foto?",
+    "A exposição está correta?",
+    "O que acha das cores e do contraste?",
+]
+
+
+def stub_text(tokens: int, prefix: str) -> str:
+    """Filler text of about ``tokens`` tokens (4 characters each)."""
+    words = (prefix + " ").split()
+    filler = "the light and composition of this photo could be improved".split()
+    while len(" ".join(words)) < 4 * tokens:
+        words.append(filler[len(words) % len(filler)])
+    return " ".join(words)
+
+
+def stub_response(prompt: str, assessment_tokens: int, suggestion_tokens: int) -> str:
+    """A well-formed reply for the assessment or the suggestions prompt."""
+    if "JSON array" in prompt:
+        per_suggestion = max(1, suggestion_tokens // 4)
+        return json.dumps([stub_text(per_suggestion, f"Suggestion {n}: increase the brightness") for n in range(4)])
+    return json.dumps({
+        "overall_assessment": stub_text(assessment_tokens, "A pleasant photo with room for improvement."),
+        "score": 3.5,
+        "criteria_scores": {"composition": 4, "exposure": 3, "focus": 4, "color": 3},
+        "suggestions": ["Increase the contrast slightly."],
+        "technical_adjustments": []
+    })
+
+
+def serve_stub_ollama(port: int, ttft: float, tokens_per_second: float, assessment_tokens: int,
+                      suggestion_tokens: int):
+    """Minimal Ollama ``/api/generate`` endpoint that streams NDJSON tokens."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.end_headers()
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            text = stub_response(request.get("prompt", ""), assessment_tokens, suggestion_tokens)
+            pieces = [text[offset:offset + 4] for offset in range(0, len(text), 4)]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            time.sleep(ttft)
+            stream = request.get("stream", True)
+            if stream:
+                for piece in pieces:
+                    self._write({"model": request.get("model"), "response": piece, "done": False})
+                    time.sleep(1.0 / tokens_per_second)
+            else:
+                time.sleep(len(pieces) / tokens_per_second)
+            self._write({"model": request.get("model"), "response": "" if stream else text, "done": True,
+                         "eval_count": len(pieces)})
+
+        def _write(self, payload: Dict[str, Any]):
+            self.wfile.write((json.dumps(payload) + "\n").encode('utf-8'))
+            self.wfile.flush()
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+def start_stub_ollama(args) -> multiprocessing.Process:
+    """Run the stub in its own process so its CPU time is not charged to the pipeline."""
+    process = multiprocessing.get_context("spawn").Process(
+        target=serve_stub_ollama,
+        args=(args.stub_port, args.ttft_ms / 1000, args.tokens_per_second, args.assessment_tokens,
+              args.suggestion_tokens),
+        daemon=True
+    )
+    process.start()
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", args.stub_port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError(f"Stub Ollama server did not start on port {args.stub_port}")
+
+
+def synthetic_photos(count: int, width: int, height: int, seed: int) -> List[bytes]:
+    """JPEG uploads with gradients, shapes and noise so every metric has something to measure."""
+    rng = np.random.default_rng(seed)
+    photos = []
+    for _ in range(count):
+        x = np.linspace(0, 1, width, dtype=np.float32)[None, :, None]
+        y = np.linspace(0, 1, height, dtype=np.float32)[:, None, None]
+        base = rng.uniform(40, 200, size=3).astype(np.float32)
+        slope = rng.uniform(-60, 60, size=(2, 3)).astype(np.float32)
+        image = base + x * slope[0] + y * slope[1]
+        image = image + rng.normal(0, rng.uniform(2, 15), size=(height, width, 3)).astype(np.float32)
+        image = np.clip(image, 0, 255).astype(np.uint8)
+        for _ in range(int(rng.integers(2, 6))):
+            center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+            color = tuple(int(value) for value in rng.integers(0, 256, size=3))
+            cv2.circle(image, center, int(rng.integers(10, min(width, height) // 4)), color, -1)
+        ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        photos.append(buffer.tobytes())
+    return photos
+
+
+def build_services(config: Dict[str, Any], config_path: str) -> Dict[str, Any]:
+    """Load every service of the pipeline against the stub LLM and a tiny flat index."""
+    from src.enhancement.image_enhancer import ImageEnhancer
+    from src.image_analysis.image_analyzer import ImageAnalyzer
+    from src.llm_service import LLMService
+    from src.rag_service import EMBEDDING_MODEL_NAME, RAGService
+    from src.translation.translator import Translator
+
+    rag_service = create_rag_service(RAGService, config)
+    records = [{"id": f"tip-{row}", "content": tip, "source": "load-test tips"} for row, tip in enumerate(TIPS)]
+    embeddings = np.asarray(rag_service.embedding_model.embed_documents(TIPS), dtype=np.float32)
+    FlatIndex.build(config["retrieval"]["flat_index_path"], embeddings, records, EMBEDDING_MODEL_NAME)
+    rag_service.initialize()
+
+    translator = Translator(config["translation"]["model"])
+    translator.initialize()
+    translator.initialize_english()
+    return {
+        "image_analyzer": ImageAnalyzer(),
+        "image_enhancer": ImageEnhancer(),
+        "llm_service": LLMService(config_path),
+        "rag_service": rag_service,
+        "translator": translator,
+    }
+
+
+class ResourceSampler:
+    """Samples the resident set size of this process in the background."""
+
+    def __init__(self, interval: float = 0.2):
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def start(self):
+        self.cpu_start = time.process_time()
+        self.wall_start = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> Dict[str, float]:
+        self._stop.set()
+        self._thread.join()
+        cpu = time.process_time() - self.cpu_start
+        wall = time.perf_counter() - self.wall_start
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return {
+            "cpu_seconds": cpu,
+            "cpu_percent": 100 * cpu / wall if wall else 0.0,
+            "cores": os.cpu_count() or 1,
+            "rss_mean_mb": float(np.mean(self.samples)) if self.samples else peak,
+            "rss_peak_mb": max(self.samples + [peak]),
+        }
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = current_rss_mb()
+            if rss is not None:
+                self.samples.append(rss)
+            self._stop.wait(self.interval)
+
+
+def current_rss_mb():
+    """Resident set size from /proc (Linux), None elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return None
+
+
+def run_session(session: int, graph, stage_executor, photos: List[bytes], requests: int,
+                think_time: float, results: List[Dict[str, Any]], lock: threading.Lock):
+    """One simulated user uploading photos back to back."""
+    for request in range(requests):
+        photo = photos[(session * requests + request) % len(photos)]
+        query = QUERIES[(session + request) % len(QUERIES)]
+        start = time.perf_counter()
+        try:
+            with telemetry.trace("load_test", session=session):
+                image = decode_image(photo)
+                run = graph.run({"image": image, "query": query}, executor=stage_executor)
+            if not run["assess"].get("score"):
+                # LLMService turns a failed or unreachable Ollama request into a score-0 fallback
+                raise RuntimeError(f"LLM assessment failed: {run['assess'].get('overall_assessment', '')}")
+            record = {"ok": True, "seconds": time.perf_counter() - start, "stages": run.stage_seconds()}
+        except Exception as e:
+            record = {"ok": False, "seconds": time.perf_counter() - start, "error": str(e)}
+        with lock:
+            results.append(record)
+        if think_time:
+            time.sleep(think_time)
+
+
+def summarize(results: List[Dict[str, Any]], elapsed: float, stage_names: List[str]) -> Dict[str, Any]:
+    """Throughput and latency percentiles per stage and end to end."""
+    succeeded = [result for result in results if result["ok"]]
+    stages = {
+        name: summarize_latencies([result["stages"][name] for result in succeeded if name in result["stages"]])
+        for name in stage_names
+    }
+    return {
+        "requests": len(results),
+        "errors": len(results) - len(succeeded),
+        "seconds": elapsed,
+        "throughput_rps": len(succeeded) / elapsed if elapsed else 0.0,
+        "end_to_end": summarize_latencies([result["seconds"] for result in succeeded]),
+        "stages": stages,
+    }
+
+
+def compare_to_baseline(summary: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions beyond ``tolerance`` in throughput or p95 latency."""
+    regressions = []
+    previous = baseline["summary"]
+    if summary["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+        regressions.append(f"throughput {previous['throughput_rps']:.3f} -> {summary['throughput_rps']:.3f} req/s")
+    latencies = [("end_to_end", summary["end_to_end"], previous["end_to_end"])]
+    latencies.extend(
+        (f"stage {name}", stats, previous["stages"][name])
+        for name, stats in summary["stages"].items() if name in previous["stages"]
+    )
+    for label, current, before in latencies:
+        # Ignore sub-millisecond stages, where noise dominates
+        if before["p95_ms"] >= 1.0 and current["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{label} p95 {before['p95_ms']:.1f} -> {current['p95_ms']:.1f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", default="config.json", help="Base configuration (models, pipeline workers)")
+    parser.add_argument("--sessions", type=int, default=4, help="Concurrent simulated sessions")
+    parser.add_argument("--requests", type=int, default=5, help="Photos assessed per session")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pause between a session's requests")
+    parser.add_argument("--photos", type=int, default=8, help="Synthetic photos in the corpus")
+    parser.add_argument("--width", type=int, default=1600)
+    parser.add_argument("--height", type=int, default=1200)
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="Stub LLM time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="Stub LLM token rate")
+    parser.add_argument("--assessment-tokens", type=int, default=200)
+    parser.add_argument("--suggestion-tokens", type=int, default=80)
+    parser.add_argument("--stub-port", type=int, default=11535)
+    parser.add_argument("--workdir", default="data/load_test")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Earlier --output file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+    os.makedirs(args.workdir, exist_ok=True)
+    config["model"]["base_url"] = f"http://127.0.0.1:{args.stub_port}"
+    config["retrieval"] = {"backend": "flat", "flat_index_path": os.path.join(args.workdir, "flatindex")}
+    config_path = os.path.join(args.workdir, "config.json")
+    with open(config_path, 'w') as f:
+        json.dump(config, f, indent=4)
+
+    stub = start_stub_ollama(args)
+    try:
+        photos = synthetic_photos(args.photos, args.width, args.height, args.seed)
+        print("Loading services...")
+        services = build_services(config, config_path)
+        graph = build_assessment_graph(services)
+        workers = config.get("pipeline", {}).get("workers", 4)
+        stage_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="load-test-stage")
+
+        # Warm-up request so lazy initialization does not count
+        run_session(0, graph, stage_executor, photos, 1, 0.0, [], threading.Lock())
+
+        print(f"Running {args.sessions} sessions x {args.requests} requests...")
+        results, lock = [], threading.Lock()
+        sampler = ResourceSampler()
+        sampler.start()
+        start = time.perf_counter()
+        sessions = [
+            threading.Thread(target=run_session, args=(session, graph, stage_executor, photos, args.requests,
+                                                       args.think_ms / 1000, results, lock))
+            for session in range(args.sessions)
+        ]
+        for thread in sessions:
+            thread.start()
+        for thread in sessions:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        resources = sampler.stop()
+        stage_executor.shutdown()
+    finally:
+        stub.terminate()
+
+    summary = summarize(results, elapsed, list(graph.stages))
+    rows = [dict(stage="end_to_end", **summary["end_to_end"])]
+    rows.extend(dict(stage=name, **stats) for name, stats in summary["stages"].items())
+    print_table(rows, ["stage", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+    print(f"Throughput: {summary['throughput_rps']:.3f} req/s ({60 * summary['throughput_rps']:.1f} photos/min), "
+          f"{summary['errors']} errors")
+    print(f"CPU: {resources['cpu_seconds']:.1f}s ({resources['cpu_percent']:.0f}% of one core, "
+          f"{resources['cores']} cores), RSS mean {resources['rss_mean_mb']:.0f} MB, "
+          f"peak {resources['rss_peak_mb']:.0f} MB")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = compare_to_baseline(summary, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if not regressions:
+            print(f"No regression beyond {args.tolerance:.0%} against {args.baseline}")
+    if args.output:
+        write_json(args.output, {
+            "timestamp": time.time(),
+            "params": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+            "summary": summary,
+            "resources": resources,
+            "regressions": regressions,
+        })
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Report memory, latency and recall@k for each flat index quantization mode.
+
+Run from the repository root after ``process_documents`` has exported the
+flat index (missing int8/binary codes are built on the fly)::
+
+    python -m benchmarks.quantization_benchmark --config config.json --k 5 --min-recall 0.95
+
+Ground truth is an exact float32 cosine scan over the embeddings stored in
+Chroma. ``memory_mb`` is the size of the structure scanned per query: the
+float32 matrix, the float16 memory-mapped matrix, or the in-memory codes.
+The command exits with status 1 if a quantized mode falls below
+``--min-recall``.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+from langchain_community.embeddings import HuggingFaceEmbeddings
+from langchain_community.vectorstores import Chroma
+from benchmarks.common import (
+    load_chroma_corpus, print_table, recall_at_k, summarize_latencies, timed, write_json
+)
+from benchmarks.retrieval_benchmark import build_queries
+from src.rag_service import EMBEDDING_MODEL_NAME
+from src.retrieval.flat_index import FlatIndex, normalize_rows, top_k
+from src.retrieval.quantized_index import CODES_FILES, QuantizedIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--oversample", type=int, nargs="+", default=[4, 10, 30])
+    parser.add_argument("--sample-chunks", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-recall", type=float, default=None)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+    vector_db_path = config.get("vector_db_path", "data/vectordb")
+    flat_index_path = config.get("retrieval", {}).get("flat_index_path", "data/flatindex")
+
+    embedding_model = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+    corpus = load_chroma_corpus(Chroma(persist_directory=vector_db_path, embedding_function=embedding_model)._collection)
+    print(f"Corpus: {len(corpus['ids'])} chunks")
+
+    missing = [mode for mode, name in CODES_FILES.items() if not os.path.exists(os.path.join(flat_index_path, name))]
+    if missing:
+        QuantizedIndex.build_codes(flat_index_path, modes=list(CODES_FILES))
+
+    queries = build_queries(corpus, args.sample_chunks, args.seed)
+    query_embeddings = np.asarray(embedding_model.embed_documents(queries), dtype=np.float32)
+
+    exact_matrix = normalize_rows(corpus["embeddings"])
+    exact = []
+    for embedding in normalize_rows(query_embeddings):
+        exact.append([corpus["ids"][row] for row, _ in top_k(exact_matrix @ embedding, args.k)])
+
+    def float32_search(embedding):
+        return top_k(exact_matrix @ normalize_rows(embedding), args.k)
+
+    indexes = [("float32", None, exact_matrix.nbytes, float32_search, corpus["ids"])]
+    flat = FlatIndex(flat_index_path)
+    flat.initialize()
+    flat_ids = [record["id"] for record in flat.records]
+    indexes.append(("float16", None, flat.vectors.nbytes, lambda e: flat.search_rows(e, args.k), flat_ids))
+    for mode in CODES_FILES:
+        for oversample in args.oversample:
+            index = QuantizedIndex(flat_index_path, mode, oversample)
+            indexes.append((mode, oversample, index.memory_bytes, lambda e, index=index: index.search_rows(e, args.k), flat_ids))
+
+    baseline_bytes = exact_matrix.nbytes or 1
+    rows, failed = [], []
+    for mode, oversample, memory_bytes, search, ids in indexes:
+        latencies, recalls = [], []
+        for embedding, truth in zip(query_embeddings, exact):
+            found, elapsed = timed(search, embedding)
+            latencies.append(elapsed)
+            recalls.append(recall_at_k([ids[row] for row, _ in found], truth, args.k))
+        row = {
+            "mode": mode,
+            "oversample": oversample,
+            "memory_mb": memory_bytes / 2 ** 20,
+            "reduction": baseline_bytes / max(memory_bytes, 1),
+            f"recall@{args.k}": float(np.mean(recalls)) if recalls else 0.0,
+        }
+        row.update(summarize_latencies(latencies))
+        rows.append(row)
+        if args.min_recall is not None and mode in CODES_FILES and row[f"recall@{args.k}"] < args.min_recall:
+            failed.append(f"{mode}/oversample={oversample}")
+
+    print_table(rows, ["mode", "oversample", "memory_mb", "reduction", f"recall@{args.k}", "mean_ms", "p50_ms", "p95_ms"])
+    if args.output:
+        write_json(args.output, {
+            "timestamp": time.time(),
+            "corpus_size": len(corpus["ids"]),
+            "queries": len(queries),
+            "k": args.k,
+            "results": rows,
+        })
+    if failed:
+        print(f"Below recall tolerance {args.min_recall}: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Compare retrieval backends on recall and latency.
+
+Run from the repository root after ``process_documents`` has built the vector
+database and exported the flat index::
+
+    python -m benchmarks.retrieval_benchmark --config config.json --k 5
+
+Ground truth is an exact float32 cosine scan over the embeddings stored in
+Chroma. Queries are the default query with every aspect combination plus a
+sample of chunk texts. The corpus is read through Chroma first, so its
+``open_ms`` is measured with the Chroma client already warm in-process.
+"""
+import argparse
+import json
+import time
+import numpy as np
+from langchain_community.embeddings import HuggingFaceEmbeddings
+from langchain_community.vectorstores import Chroma
+from benchmarks.common import (
+    load_chroma_corpus, print_table, recall_at_k, summarize_latencies, timed, write_json
+)
+from src.rag_service import EMBEDDING_MODEL_NAME, default_query_variants
+from src.retrieval.flat_index import FlatIndex, normalize_rows, top_k
+
+
+def build_queries(corpus, sample_chunks: int, seed: int):
+    """Default-query variants plus a random sample of chunk texts."""
+    queries = default_query_variants()
+    rng = np.random.default_rng(seed)
+    if sample_chunks and corpus["contents"]:
+        rows = rng.choice(len(corpus["contents"]), size=min(sample_chunks, len(corpus["contents"])), replace=False)
+        queries.extend(corpus["contents"][row][:500] for row in rows)
+    return queries
+
+
+def bench_chroma(vector_db_path, embedding_model, query_embeddings, k):
+    """Cold-open time, per-query latency and returned ids for Chroma."""
+    db, open_time = timed(Chroma, persist_directory=vector_db_path, embedding_function=embedding_model)
+    collection = db._collection
+    latencies, retrieved = [], []
+    for embedding in query_embeddings:
+        result, elapsed = timed(collection.query, query_embeddings=[embedding.tolist()], n_results=k)
+        latencies.append(elapsed)
+        retrieved.append(result["ids"][0])
+    return open_time, latencies, retrieved
+
+
+def bench_flat(flat_index_path, query_embeddings, k):
+    """Cold-open time, per-query latency and returned ids for the flat index."""
+    index = FlatIndex(flat_index_path)
+    _, open_time = timed(index.initialize)
+    latencies, retrieved = [], []
+    for embedding in query_embeddings:
+        rows, elapsed = timed(index.search_rows, embedding, k)
+        latencies.append(elapsed)
+        retrieved.append([index.records[row]["id"] for row, _ in rows])
+    return open_time, latencies, retrieved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--sample-chunks", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+    vector_db_path = config.get("vector_db_path", "data/vectordb")
+    retrieval_config = config.get("retrieval", {})
+    flat_index_path = retrieval_config.get("flat_index_path", "data/flatindex")
+
+    embedding_model = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+    corpus = load_chroma_corpus(Chroma(persist_directory=vector_db_path, embedding_function=embedding_model)._collection)
+    print(f"Corpus: {len(corpus['ids'])} chunks")
+
+    queries = build_queries(corpus, args.sample_chunks, args.seed)
+    query_embeddings = np.asarray(embedding_model.embed_documents(queries), dtype=np.float32)
+
+    # Exact float32 cosine ground truth
+    exact_matrix = normalize_rows(corpus["embeddings"])
+    exact = []
+    for embedding in normalize_rows(query_embeddings):
+        exact.append([corpus["ids"][row] for row, _ in top_k(exact_matrix @ embedding, args.k)])
+
+    rows = []
+    backends = {
+        "chroma": lambda: bench_chroma(vector_db_path, embedding_model, query_embeddings, args.k),
+        "flat": lambda: bench_flat(flat_index_path, query_embeddings, args.k),
+    }
+    for name, run in backends.items():
+        open_time, latencies, retrieved = run()
+        recall = float(np.mean([recall_at_k(got, truth, args.k) for got, truth in zip(retrieved, exact)]))
+        row = {"backend": name, "open_ms": open_time * 1000, f"recall@{args.k}": recall}
+        row.update(summarize_latencies(latencies))
+        rows.append(row)
+
+    print_table(rows, ["backend", "open_ms", f"recall@{args.k}", "mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+    if args.output:
+        write_json(args.output, {
+            "timestamp": time.time(),
+            "corpus_size": len(corpus["ids"]),
+            "queries": len(queries),
+            "k": args.k,
+            "results": rows,
+        })
+
+
+if __name__ == "__main__":
+    main()
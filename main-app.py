@@ -1,45 +1,20 @@
 import streamlit as st
-import os
-import tempfile
+import hashlib
 import time
-from PIL import Image
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 import json
-from src.document_processing.process_documents import process_documents
-from src.image_analysis.image_analyzer import ImageAnalyzer
-from src.enhancement.image_enhancer import ImageEnhancer
-from src.translation.translator import Translator
-from src.llm_service import LLMService
-from src.rag_service import RAGService
+from src.assessment_pipeline import build_assessment_graph
+from src.image_analysis.perceptual_hash import PerceptualIndex
+from src.image_io import decode_image
+from src.service_container import READY, LOADING, FAILED, default_container
+from src.stage_graph import StageMemo
+from src import telemetry
 
 # Load configuration
 with open("config.json", "r") as f:
     config = json.load(f)
 
-# Initialize services
-@st.cache_resource
-def load_services():
-    # Process documents if vectordb doesn't exist
-    vectordb_path = config.get("vector_db_path", "data/vectordb")
-    if not os.path.exists(vectordb_path):
-        with st.spinner("Initializing document database... This may take a few minutes."):
-            process_documents("config.json")
-    
-    image_analyzer = ImageAnalyzer()
-    image_enhancer = ImageEnhancer()
-    translator = Translator(config["translation"]["model"])
-    llm_service = LLMService("config.json")
-    rag_service = RAGService(vectordb_path)
-    
-    return {
-        "image_analyzer": image_analyzer,
-        "image_enhancer": image_enhancer,
-        "translator": translator,
-        "llm_service": llm_service,
-        "rag_service": rag_service
-    }
-
-services = load_services()
-
 # Set page title and configuration
 st.set_page_config(
     page_title="Análise Fotográfica - Sistema de Avaliação",
@@ -47,6 +22,116 @@ st.set_page_config(
     layout="wide"
 )
 
+# Trace file and metrics sinks
+@st.cache_resource
+def configure_telemetry():
+    telemetry.configure(config.get("telemetry", {}))
+    return True
+
+configure_telemetry()
+
+# Initialize services in the background; the page renders while models load
+@st.cache_resource
+def load_services():
+    container = default_container(config, "config.json")
+    container.start()
+    return container
+
+services = load_services()
+
+# Shared pool for the stages of the assessment pipeline
+@st.cache_resource
+def load_stage_executor():
+    return ThreadPoolExecutor(
+        max_workers=config.get("pipeline", {}).get("workers", 4),
+        thread_name_prefix="assessment-stage"
+    )
+
+stage_executor = load_stage_executor()
+assessment_graph = build_assessment_graph(services)
+
+# Perceptual hashes of assessed photos, to spot resubmitted variants
+@st.cache_resource
+def load_photo_index():
+    photo_config = config.get("photo_index", {})
+    if not photo_config.get("enabled", True):
+        return None
+    return PerceptualIndex(
+        photo_config.get("index_path", "data/photo_index"),
+        max_distance=photo_config.get("max_distance", 8),
+        max_records=photo_config.get("max_records", 10000),
+        ttl_days=photo_config.get("ttl_days")
+    ).load()
+
+photo_index = load_photo_index()
+
+# Whose earlier photos are offered: anyone's ("shared"), the same user's as
+# identified by an authenticating proxy ("user"), or this browser session's
+photo_scope = config.get("photo_index", {}).get("scope", "shared")
+if photo_scope not in ("shared", "user", "session"):
+    raise ValueError(f"Unknown photo_index.scope: {photo_scope}")
+
+def get_photo_owner():
+    if photo_scope == "session":
+        if "session_id" not in st.session_state:
+            st.session_state.session_id = uuid.uuid4().hex
+        return st.session_state.session_id
+    if photo_scope == "user":
+        return st.context.headers.get(config["photo_index"].get("user_header", "X-Forwarded-User"))
+    return None
+
+# Stage results of this session; Streamlit reruns the whole script on every
+# interaction, so unchanged stages are served from here. The store lives in
+# the session state and is released with the session.
+def get_stage_memo() -> StageMemo:
+    if "stage_memo" not in st.session_state:
+        memo_config = config.get("pipeline", {}).get("session_cache", {})
+        st.session_state.stage_memo = StageMemo(
+            max_entries=memo_config.get("max_entries", 64),
+            max_bytes=int(memo_config.get("max_mb", 256) * 1024 * 1024)
+        )
+    return st.session_state.stage_memo
+
+# Service readiness
+SERVICE_LABELS = {
+    "image_analyzer": "Análise de imagem",
+    "image_enhancer": "Aprimoramento",
+    "llm_service": "Modelo de linguagem",
+    "documents": "Base de documentos",
+    "rag_service": "Base de conhecimento",
+    "translator": "Tradução"
+}
+STATE_ICONS = {READY: "✅", LOADING: "⏳", FAILED: "❌"}
+
+# Stage results stored with each photo in the perceptual index; reusing them
+# leaves only the visualization and the enhancement of the new variant to run
+REUSABLE_STAGES = ["analyze", "assess", "suggest", "translate_assessment", "translate_suggestions"]
+# Only consumed by reused stages, so they are skipped without a stored value
+SKIPPED_ON_REUSE = ["translate_query", "retrieve"]
+
+# Assessment stages
+STAGE_LABELS = {
+    "analyze": "Análise da imagem",
+    "translate_query": "Consulta processada",
+    "visualize": "Visualização da análise",
+    "retrieve": "Consulta à base de conhecimento",
+    "assess": "Avaliação",
+    "suggest": "Sugestões de melhoria",
+    "enhance": "Imagem aprimorada",
+    "translate_assessment": "Tradução da avaliação",
+    "translate_suggestions": "Tradução das sugestões"
+}
+
+with st.sidebar:
+    st.subheader("Status dos Serviços")
+    for name, status in services.status().items():
+        icon = STATE_ICONS.get(status["state"], "🕒")
+        st.write(f"{icon} {SERVICE_LABELS.get(name, name)}")
+    if not services.is_ready():
+        st.button("Atualizar status")
+    with st.expander("Perfil de inicialização"):
+        st.code(services.profile_report())
+
 # App title
 st.title("📸 Sistema de Avaliação Fotográfica")
 st.subheader("Carregue uma foto para análise e avaliação")
@@ -58,104 +143,90 @@ uploaded_file = st.file_uploader("Escolha uma imagem", type=["jpg", "jpeg", "png
 query = st.text_area("Algum comentário ou pergunta específica sobre sua foto? (Opcional)", height=100)
 
 # Process the uploaded image
-if uploaded_file is not None:
+if uploaded_file is None:
+    # Nothing to rerun against: drop the results of the previous photo
+    get_stage_memo().clear()
+else:
+    # Decode the upload once; every stage works on this array in memory
+    upload_bytes = uploaded_file.getvalue()
+    upload_hash = hashlib.sha256(upload_bytes).hexdigest()
+    try:
+        image = decode_image(upload_bytes)
+    except ValueError:
+        st.error("Não foi possível ler a imagem enviada.")
+        st.stop()
+    
     # Display the original image
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("Imagem Original")
-        image = Image.open(uploaded_file)
-        st.image(image, use_column_width=True)
+        st.image(image, channels="BGR", use_column_width=True)
+    
+    # Offer the results of an earlier submission of (nearly) the same photo
+    # within the configured scope; without a known user the "user" scope skips
+    # the index. The photo this session just added is not offered back on reruns
+    photo_owner = get_photo_owner()
+    photo_hashes = None
+    reused = {}
+    if (photo_index is not None and (photo_scope != "user" or photo_owner)
+            and st.session_state.get("indexed_upload") != upload_hash):
+        photo_hashes = photo_index.hash_image(image)
+        previous = photo_index.find(photo_hashes, owner=photo_owner)
+        if previous is not None:
+            distance, record = previous
+            same_query = record.get("query", "") == query
+            st.info(f"Esta foto é muito parecida com uma já avaliada (diferença de {distance} bits no hash perceptual).")
+            if st.checkbox("Reaproveitar a avaliação anterior", value=False):
+                reused = dict(record["stages"], **dict.fromkeys(SKIPPED_ON_REUSE))
+                if not same_query:
+                    st.caption("A avaliação anterior respondeu a outra pergunta.")
     
     # Create a progress bar
     progress_bar = st.progress(0)
     status_text = st.empty()
     
-    # Save the uploaded file to a temporary location
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_file:
-        temp_path = temp_file.name
-        temp_file.write(uploaded_file.getvalue())
-    
     try:
-        # Step 1: Analyze the image
-        status_text.text("Analisando a imagem...")
-        progress_bar.progress(10)
-        
-        image_analysis = services["image_analyzer"].analyze_image(temp_path)
-        
-        # Step 2: Translate query to English if provided
-        status_text.text("Processando consulta...")
-        progress_bar.progress(20)
-        
-        english_query = query
-        if query:
-            english_query = services["translator"].translate_to_english(query)
-        
-        # Step 3: Get relevant content from RAG system
-        status_text.text("Consultando base de conhecimento...")
-        progress_bar.progress(30)
-        
-        relevant_content = services["rag_service"].get_relevant_content(
-            english_query or "Evaluate this photo",
-            image_analysis
-        )
-        
-        # Step 4: Generate assessment using LLM
-        status_text.text("Gerando avaliação...")
-        progress_bar.progress(50)
-        
-        assessment = services["llm_service"].generate_assessment(
-            image_analysis,
-            english_query or "Evaluate this photo",
-            relevant_content
-        )
+        # Wait for services that are still loading in the background
+        if not services.is_ready():
+            status_text.text("Carregando modelos...")
+            with st.spinner("Carregando modelos... Isso pode levar alguns minutos na primeira execução."):
+                for name in services.status():
+                    services.get(name)
         
-        # Step 5: Generate enhancement suggestions
-        status_text.text("Gerando sugestões de melhoria...")
-        progress_bar.progress(60)
-        
-        suggestions = services["llm_service"].generate_suggestions(
-            assessment,
-            image_analysis
-        )
+        # Run the assessment stages; independent stages run concurrently and
+        # the progress bar advances as each one completes
+        status_text.text("Analisando a imagem...")
         
-        # Step 6: Translate assessment and suggestions to Portuguese
-        status_text.text("Traduzindo avaliação para Português...")
-        progress_bar.progress(70)
+        def on_stage_done(stage, run):
+            progress_bar.progress(int(100 * len(run.timings) / len(assessment_graph.stages)))
+            outcome = "reaproveitado" if stage in run.cached else "concluído"
+            status_text.text(f"{STAGE_LABELS.get(stage, stage)}: {outcome}")
         
-        portuguese_assessment = services["translator"].translate_to_portuguese(
-            assessment["overall_assessment"]
-        )
-        
-        portuguese_suggestions = []
-        for suggestion in suggestions:
-            portuguese_suggestions.append(
-                services["translator"].translate_to_portuguese(suggestion)
+        with telemetry.trace("assessment", upload_bytes=uploaded_file.size) as request_trace:
+            run = assessment_graph.run(
+                dict(reused, image=image, query=query),
+                executor=stage_executor,
+                on_stage_done=on_stage_done,
+                memo=get_stage_memo(),
+                input_keys={"image": upload_hash}
             )
+        assessment = run["assess"]
+        portuguese_assessment = run["translate_assessment"]
+        portuguese_suggestions = run["translate_suggestions"]
         
-        # Step 7: Create enhanced image
-        status_text.text("Gerando imagem aprimorada...")
-        progress_bar.progress(80)
-        
-        enhanced_image_path = os.path.join(tempfile.gettempdir(), "enhanced_image.jpg")
-        services["image_enhancer"].enhance_image(
-            temp_path,
-            image_analysis,
-            suggestions,
-            enhanced_image_path
-        )
-        
-        # Create visualization of analysis
-        analysis_viz_path = os.path.join(tempfile.gettempdir(), "analysis_viz.jpg")
-        services["image_analyzer"].save_analysis_visualization(
-            temp_path,
-            analysis_viz_path
-        )
-        
-        # Step 8: Display results
-        status_text.text("Concluído!")
+        status_text.text(f"Concluído em {run.elapsed:.1f}s!")
         progress_bar.progress(100)
         
+        # Remember fresh results for later variants of this photo
+        if photo_hashes is not None and not reused and assessment.get("score"):
+            photo_index.add(photo_hashes, {
+                "owner": photo_owner,
+                "query": query,
+                "stages": {stage: run[stage] for stage in REUSABLE_STAGES}
+            })
+            st.session_state.indexed_upload = upload_hash
+        
         # Display the assessment
         st.subheader("📝 Avaliação")
         st.write(portuguese_assessment)
@@ -185,21 +256,29 @@ if uploaded_file is not None:
         # Display the enhanced image
         with col2:
             st.subheader("Imagem Aprimorada")
-            enhanced_image = Image.open(enhanced_image_path)
-            st.image(enhanced_image, use_column_width=True)
+            st.image(run["enhance"], use_column_width=True)
         
         # Display the analysis visualization
         st.subheader("Visualização da Análise")
-        analysis_viz = Image.open(analysis_viz_path)
-        st.image(analysis_viz, use_column_width=False)
+        st.image(run["visualize"], channels="BGR", use_column_width=False)
+        
+        # Time breakdown of this request
+        with st.expander("⏱️ Desempenho"):
+            st.write(f"**Tempo total:** {run.elapsed:.2f}s")
+            st.write(f"**Caminho crítico:** {' → '.join(run.critical_path(assessment_graph))}")
+            if run.cached:
+                cached_labels = [STAGE_LABELS.get(stage, stage) for stage in assessment_graph.stages if stage in run.cached]
+                st.write(f"**Reaproveitado da sessão:** {', '.join(cached_labels)}")
+            st.dataframe(
+                [
+                    dict(row, span="\u00a0\u00a0" * row["depth"] + row["span"])
+                    for row in request_trace.breakdown()
+                ],
+                use_container_width=True
+            )
         
     except Exception as e:
         st.error(f"Ocorreu um erro ao processar a imagem: {str(e)}")
-    
-    finally:
-        # Clean up temporary files
-        if os.path.exists(temp_path):
-            os.unlink(temp_path)
 
 # Information about the system
 with st.expander("ℹ️ Sobre este Sistema"):
@@ -0,0 +1,56 @@
+from typing import Any, Dict
+import numpy as np
+from src.rag_service import DEFAULT_QUERY
+from src.stage_graph import Stage, StageGraph
+
+
+def build_assessment_graph(services) -> StageGraph:
+    """Stage graph for one photo assessment.
+
+    ``services`` is a ``ServiceContainer`` (or any mapping of service names);
+    each stage looks its service up when it runs. The graph expects the inputs
+    ``image`` (the photo decoded once as a BGR array) and ``query``; images
+    stay in memory between stages: ``visualize`` returns a BGR array and
+    ``enhance`` a PIL image. The critical path is analyze -> retrieve ->
+    assess -> suggest -> enhance.
+    """
+    def analyze(image: np.ndarray) -> Dict[str, Any]:
+        return services["image_analyzer"].analyze_array(image)
+
+    def translate_query(query: str) -> str:
+        if not query:
+            return DEFAULT_QUERY
+        return services["translator"].translate_to_english(query) or DEFAULT_QUERY
+
+    def visualize(image: np.ndarray, analysis: Dict[str, Any]) -> np.ndarray:
+        return services["image_analyzer"].render_analysis_visualization(image, analysis)
+
+    def retrieve(english_query: str, analysis: Dict[str, Any]):
+        return services["rag_service"].get_relevant_content(english_query, analysis)
+
+    def assess(analysis: Dict[str, Any], english_query: str, relevant_content) -> Dict[str, Any]:
+        return services["llm_service"].generate_assessment(analysis, english_query, relevant_content)
+
+    def suggest(assessment: Dict[str, Any], analysis: Dict[str, Any]):
+        return services["llm_service"].generate_suggestions(assessment, analysis)
+
+    def enhance(image: np.ndarray, analysis: Dict[str, Any], suggestions):
+        return services["image_enhancer"].enhance(image, analysis, suggestions)
+
+    def translate_assessment(assessment: Dict[str, Any]) -> str:
+        return services["translator"].translate_to_portuguese(assessment["overall_assessment"])
+
+    def translate_suggestions(suggestions):
+        return [services["translator"].translate_to_portuguese(suggestion) for suggestion in suggestions]
+
+    return StageGraph([
+        Stage("analyze", analyze, ["image"]),
+        Stage("translate_query", translate_query, ["query"]),
+        Stage("visualize", visualize, ["image", "analyze"]),
+        Stage("retrieve", retrieve, ["translate_query", "analyze"]),
+        Stage("assess", assess, ["analyze", "translate_query", "retrieve"]),
+        Stage("suggest", suggest, ["assess", "analyze"]),
+        Stage("enhance", enhance, ["image", "analyze", "suggest"]),
+        Stage("translate_assessment", translate_assessment, ["assess"]),
+        Stage("translate_suggestions", translate_suggestions, ["suggest"]),
+    ])
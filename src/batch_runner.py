@@ -0,0 +1,289 @@
+"""Assess a folder of photos without the web interface.
+
+Run from the repository root::
+
+    python -m src.batch_runner photos/ --output results.jsonl --llm-concurrency 2
+
+Image analysis, visualization and enhancement run in a process pool; LLM calls
+are throttled to ``--llm-concurrency`` requests at a time. One JSON line is
+appended per photo as soon as it finishes, so the output file doubles as the
+checkpoint: running the same command again skips photos that already have a
+successful result (matched by content hash) and retries the failed ones.
+"""
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List
+import cv2
+import numpy as np
+from src import telemetry
+from src.assessment_pipeline import build_assessment_graph
+from src.image_io import decode_image
+from src.document_processing.manifest import hash_file
+from src.service_container import default_container
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+# Per-process service instances of the analysis/enhancement workers
+_worker_services = {}
+
+
+def _worker_service(module_name: str, class_name: str):
+    if class_name not in _worker_services:
+        _worker_services[class_name] = getattr(importlib.import_module(module_name), class_name)()
+    return _worker_services[class_name]
+
+
+def _analyze(image: np.ndarray) -> Dict[str, Any]:
+    return _worker_service("src.image_analysis.image_analyzer", "ImageAnalyzer").analyze_array(image)
+
+
+def _visualize(image: np.ndarray, analysis: Dict[str, Any]) -> np.ndarray:
+    return _worker_service("src.image_analysis.image_analyzer", "ImageAnalyzer").render_analysis_visualization(
+        image, analysis
+    )
+
+
+def _enhance(image: np.ndarray, analysis: Dict[str, Any], suggestions: List[str]):
+    return _worker_service("src.enhancement.image_enhancer", "ImageEnhancer").enhance(image, analysis, suggestions)
+
+
+class PooledImageAnalyzer:
+    """ImageAnalyzer facade that runs the work in a process pool."""
+
+    def __init__(self, pool: ProcessPoolExecutor):
+        self.pool = pool
+
+    def analyze_array(self, image: np.ndarray) -> Dict[str, Any]:
+        return self.pool.submit(_analyze, image).result()
+
+    def render_analysis_visualization(self, image: np.ndarray, analysis: Dict[str, Any] = None) -> np.ndarray:
+        return self.pool.submit(_visualize, image, analysis).result()
+
+
+class PooledImageEnhancer:
+    """ImageEnhancer facade that runs the work in a process pool."""
+
+    def __init__(self, pool: ProcessPoolExecutor):
+        self.pool = pool
+
+    def enhance(self, image: np.ndarray, analysis: Dict[str, Any], suggestions: List[str]):
+        return self.pool.submit(_enhance, image, analysis, suggestions).result()
+
+
+class ThrottledLLMService:
+    """LLMService facade that limits the number of concurrent LLM requests."""
+
+    def __init__(self, llm_service, max_concurrent: int):
+        self.llm_service = llm_service
+        self.semaphore = threading.BoundedSemaphore(max_concurrent)
+
+    def generate_assessment(self, *args, **kwargs):
+        with self.semaphore:
+            return self.llm_service.generate_assessment(*args, **kwargs)
+
+    def generate_suggestions(self, *args, **kwargs):
+        with self.semaphore:
+            return self.llm_service.generate_suggestions(*args, **kwargs)
+
+
+class BatchServices:
+    """Service lookup for batch runs: pooled image work, throttled LLM, the rest from the container."""
+
+    def __init__(self, container, pool: ProcessPoolExecutor, llm_concurrency: int):
+        self.container = container
+        self.overrides = {
+            "image_analyzer": PooledImageAnalyzer(pool),
+            "image_enhancer": PooledImageEnhancer(pool),
+        }
+        self.llm_concurrency = llm_concurrency
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str):
+        if name == "llm_service":
+            with self._lock:
+                if name not in self.overrides:
+                    self.overrides[name] = ThrottledLLMService(self.container[name], self.llm_concurrency)
+        return self.overrides.get(name) or self.container[name]
+
+
+def list_photos(photos_dir: str) -> List[str]:
+    """Image files under a directory, sorted by path."""
+    photos = []
+    for root, _, filenames in os.walk(photos_dir):
+        for filename in filenames:
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                photos.append(os.path.join(root, filename))
+    return sorted(photos)
+
+
+def load_checkpoint(output_path: str) -> Dict[str, Dict[str, Any]]:
+    """Latest successful result per photo hash from an existing results file.
+
+    Results without a score (the LLM fallback of older runs) don't count as
+    successful, so those photos are assessed again.
+    """
+    done = {}
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Torn last line of an interrupted run
+                continue
+            if record.get("status") == "ok" and record.get("score"):
+                done[record["sha256"]] = record
+    return done
+
+
+class ResultWriter:
+    """Appends one JSON line per photo and flushes it to disk immediately."""
+
+    def __init__(self, output_path: str):
+        directory = os.path.dirname(output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(output_path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]):
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def assess_photo(graph, stage_executor, photo: str, photos_dir: str, content_hash: str,
+                 images_dir: str, query: str) -> Dict[str, Any]:
+    """Run the assessment graph for one photo and build its result record."""
+    relative_path = os.path.relpath(photo, photos_dir)
+    stem = os.path.splitext(relative_path)[0].replace(os.sep, "__")
+    record = {"photo": relative_path, "sha256": content_hash}
+    start = time.perf_counter()
+    try:
+        with telemetry.trace("batch_photo", photo=relative_path):
+            with open(photo, 'rb') as f:
+                image = decode_image(f.read())
+            run = graph.run({"image": image, "query": query}, executor=stage_executor)
+        assessment = run["assess"]
+        if not assessment.get("score"):
+            # LLMService answers a failed or timed-out request with a score-0 fallback
+            raise RuntimeError(f"LLM assessment failed: {assessment.get('overall_assessment', '')}")
+        enhanced_path = os.path.join(images_dir, f"{stem}_enhanced.jpg")
+        viz_path = os.path.join(images_dir, f"{stem}_analysis.jpg")
+        run["enhance"].save(enhanced_path, quality=95)
+        cv2.imwrite(viz_path, run["visualize"])
+        record.update({
+            "status": "ok",
+            "score": assessment.get("score"),
+            "criteria_scores": assessment.get("criteria_scores", {}),
+            "assessment": run["translate_assessment"],
+            "assessment_en": assessment.get("overall_assessment"),
+            "suggestions": run["translate_suggestions"],
+            "suggestions_en": run["suggest"],
+            "enhanced_path": enhanced_path,
+            "viz_path": viz_path,
+            "stage_seconds": run.stage_seconds(),
+        })
+    except Exception as e:
+        record.update({"status": "error", "error": str(e)})
+    record["seconds"] = time.perf_counter() - start
+    record["finished_at"] = time.time()
+    return record
+
+
+def run_batch(photos_dir: str, output_path: str, config_path: str = "config.json", images_dir: str = None,
+              query: str = "", workers: int = None, llm_concurrency: int = None,
+              concurrent_photos: int = None) -> Dict[str, Any]:
+    """Assess every photo under ``photos_dir`` that has no successful result yet."""
+    with open(config_path, 'r') as f:
+        config = json.load(f)
+    batch_config = config.get("batch", {})
+    workers = workers or batch_config.get("workers") or os.cpu_count() or 1
+    llm_concurrency = llm_concurrency or batch_config.get("llm_concurrency", 1)
+    concurrent_photos = concurrent_photos or workers + 2 * llm_concurrency
+    images_dir = images_dir or os.path.splitext(output_path)[0] + "_images"
+    os.makedirs(images_dir, exist_ok=True)
+
+    photos = list_photos(photos_dir)
+    done = load_checkpoint(output_path)
+    pending = []
+    for photo in photos:
+        content_hash = hash_file(photo)
+        if content_hash not in done:
+            pending.append((photo, content_hash))
+    print(f"{len(photos)} photos, {len(photos) - len(pending)} already assessed, {len(pending)} to go")
+    if not pending:
+        return {"photos": len(photos), "assessed": 0, "failed": 0, "seconds": 0.0}
+
+    telemetry.configure(config.get("telemetry", {}))
+    container = default_container(config, config_path)
+    container.start()
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    stage_executor = ThreadPoolExecutor(max_workers=3 * concurrent_photos, thread_name_prefix="batch-stage")
+    photo_executor = ThreadPoolExecutor(max_workers=concurrent_photos, thread_name_prefix="batch-photo")
+    services = BatchServices(container, pool, llm_concurrency)
+    graph = build_assessment_graph(services)
+    writer = ResultWriter(output_path)
+
+    start = time.perf_counter()
+    assessed = failed = 0
+    try:
+        futures = [
+            photo_executor.submit(assess_photo, graph, stage_executor, photo, photos_dir,
+                                  content_hash, images_dir, query)
+            for photo, content_hash in pending
+        ]
+        for completed, future in enumerate(as_completed(futures), start=1):
+            record = future.result()
+            writer.write(record)
+            if record["status"] == "ok":
+                assessed += 1
+            else:
+                failed += 1
+            elapsed = time.perf_counter() - start
+            outcome = f"score {record['score']}" if record["status"] == "ok" else f"error: {record['error']}"
+            print(f"[{completed}/{len(pending)}] {record['photo']}: {outcome} "
+                  f"({record['seconds']:.1f}s, {60.0 * completed / elapsed:.1f} photos/min)")
+    finally:
+        photo_executor.shutdown(cancel_futures=True)
+        stage_executor.shutdown(cancel_futures=True)
+        pool.shutdown(cancel_futures=True)
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Batch finished: {assessed} assessed, {failed} failed in {elapsed:.1f}s "
+          f"({60.0 * (assessed + failed) / elapsed:.1f} photos/min)")
+    return {"photos": len(photos), "assessed": assessed, "failed": failed, "seconds": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("photos_dir", help="Folder with the photos to assess (searched recursively)")
+    parser.add_argument("--output", default="batch_results.jsonl", help="JSONL results file (also the checkpoint)")
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--images-dir", help="Where to write enhanced images and visualizations")
+    parser.add_argument("--query", default="", help="Question asked for every photo (Portuguese)")
+    parser.add_argument("--workers", type=int, help="Processes for analysis and enhancement")
+    parser.add_argument("--llm-concurrency", type=int, help="Maximum concurrent LLM requests")
+    parser.add_argument("--concurrent-photos", type=int, help="Photos in flight at once")
+    args = parser.parse_args()
+
+    run_batch(
+        args.photos_dir, args.output, args.config, images_dir=args.images_dir, query=args.query,
+        workers=args.workers, llm_concurrency=args.llm_concurrency, concurrent_photos=args.concurrent_photos
+    )
+
+
+if __name__ == "__main__":
+    main()
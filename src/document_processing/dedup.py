@@ -0,0 +1,221 @@
+import json
+import os
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+SIGNATURES_FILE = "signatures.npy"
+RECORDS_FILE = "records.json"
+
+
+def shingles(text: str, size: int = 5) -> np.ndarray:
+    """CRC32 hashes of the word ``size``-grams of a text (lowercased, punctuation ignored)."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = (" ".join(words[i:i + size]) for i in range(len(words) - size + 1))
+    return np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint64)
+
+
+class MinHasher:
+    """MinHash signatures over word shingles.
+
+    Uses ``num_perm`` universal hash functions ``(a * x + b) mod p`` applied
+    to the CRC32 of each shingle. The seed is fixed, so signatures are stable
+    across runs and can be persisted.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        """Initialize the hash functions."""
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of a text as a uint32 vector."""
+        hashes = shingles(text, self.shingle_size)
+        if len(hashes) == 0:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        permuted = (np.outer(hashes, self.a) + self.b) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+def jaccard(signature: np.ndarray, other: np.ndarray) -> float:
+    """Jaccard similarity estimated from two MinHash signatures."""
+    return float(np.count_nonzero(signature == other)) / len(signature)
+
+
+def candidate_probability(similarity: float, bands: int, rows: int) -> float:
+    """Probability that two chunks with this Jaccard similarity share at least one band."""
+    return 1.0 - (1.0 - similarity ** rows) ** bands
+
+
+def lsh_bands(threshold: float, num_perm: int, recall: float = 0.95) -> Tuple[int, int]:
+    """(bands, rows) with ``bands * rows <= num_perm`` for an LSH index at ``threshold``.
+
+    Pairs at the threshold must become candidates with probability at least
+    ``recall``; among the splits that achieve it, the one with the least
+    false-positive area (candidate probability integrated below the
+    threshold) is chosen, as in datasketch's weighted search. Candidates are
+    confirmed by their estimated similarity, so a false positive only costs
+    a comparison while a false negative keeps a duplicate.
+    """
+    below = np.linspace(0.0, threshold, 101)
+
+    def false_positive_area(option: Tuple[int, int]) -> float:
+        probabilities = 1.0 - (1.0 - below ** option[1]) ** option[0]
+        return float((probabilities[1:] + probabilities[:-1]).sum() * (below[1] - below[0]) / 2)
+
+    options = [(bands, rows) for bands in range(1, num_perm + 1) for rows in range(1, num_perm // bands + 1)]
+    sufficient = [option for option in options if candidate_probability(threshold, *option) >= recall]
+    if not sufficient:
+        return max(options, key=lambda option: candidate_probability(threshold, *option))
+    return min(sufficient, key=false_positive_area)
+
+
+class NearDuplicateIndex:
+    """MinHash LSH index that detects chunks near-identical to ones already stored.
+
+    Signatures are split into bands; chunks sharing a band are candidates and
+    are confirmed by their estimated Jaccard similarity. Every stored chunk
+    records its owning source, and every dropped duplicate records the source
+    it came from, so deleting a stored chunk can tell which sources have to
+    be ingested again. The index is persisted in ``index_path`` as a uint32
+    signature matrix plus a JSON file with the chunk records.
+    """
+
+    def __init__(self, index_path: str, threshold: float = 0.8, num_perm: int = 128, shingle_size: int = 5):
+        """Initialize an empty index; call ``load()`` to read a persisted one."""
+        self.index_path = index_path
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self.bands, self.rows = lsh_bands(threshold, num_perm)
+        self.signatures = {}
+        self.owners = {}
+        self.dependents = defaultdict(set)
+        self.buckets = [defaultdict(set) for _ in range(self.bands)]
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def load(self) -> "NearDuplicateIndex":
+        """Load the persisted signatures if they were built with the same hash settings."""
+        records_path = os.path.join(self.index_path, RECORDS_FILE)
+        signatures_path = os.path.join(self.index_path, SIGNATURES_FILE)
+        if not (os.path.exists(records_path) and os.path.exists(signatures_path)):
+            return self
+        with open(records_path, 'r') as f:
+            data = json.load(f)
+        if data.get("num_perm") != self.hasher.num_perm or data.get("shingle_size") != self.hasher.shingle_size:
+            print("Near-duplicate index was built with different MinHash settings; starting empty")
+            return self
+        matrix = np.load(signatures_path)
+        for row, (chunk_id, owner) in enumerate(zip(data["ids"], data["owners"])):
+            self._insert(chunk_id, owner, matrix[row])
+        for chunk_id, sources in data.get("dependents", {}).items():
+            self.dependents[chunk_id].update(sources)
+        return self
+
+    def save(self):
+        """Write the signatures and records atomically."""
+        os.makedirs(self.index_path, exist_ok=True)
+        ids = list(self.signatures)
+        matrix = np.stack([self.signatures[chunk_id] for chunk_id in ids]) if ids else \
+            np.zeros((0, self.hasher.num_perm), dtype=np.uint32)
+        signatures_path = os.path.join(self.index_path, SIGNATURES_FILE)
+        with open(signatures_path + ".tmp", 'wb') as f:
+            np.save(f, matrix)
+        os.replace(signatures_path + ".tmp", signatures_path)
+
+        records_path = os.path.join(self.index_path, RECORDS_FILE)
+        with open(records_path + ".tmp", 'w') as f:
+            json.dump({
+                "num_perm": self.hasher.num_perm,
+                "shingle_size": self.hasher.shingle_size,
+                "ids": ids,
+                "owners": [self.owners[chunk_id] for chunk_id in ids],
+                "dependents": {chunk_id: sorted(sources) for chunk_id, sources in self.dependents.items() if sources},
+            }, f)
+        os.replace(records_path + ".tmp", records_path)
+
+    def clear(self):
+        """Forget every signature."""
+        self.signatures, self.owners = {}, {}
+        self.dependents = defaultdict(set)
+        self.buckets = [defaultdict(set) for _ in range(self.bands)]
+
+    def add_or_match(self, chunk_id: str, owner: str, text: str) -> Optional[str]:
+        """Store a chunk's signature, or return the ID of a stored near-duplicate.
+
+        When a duplicate is found the chunk is not stored and ``owner`` is
+        recorded as depending on the matching chunk.
+        """
+        signature = self.hasher.signature(text)
+        match = self.match(signature)
+        if match is not None:
+            self.dependents[match].add(owner)
+            return match
+        self._insert(chunk_id, owner, signature)
+        return None
+
+    def match(self, signature: np.ndarray) -> Optional[str]:
+        """ID of the most similar stored chunk at or above the threshold, if any."""
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(self.buckets[band].get(key, ()))
+        best, best_similarity = None, self.threshold
+        for candidate in candidates:
+            similarity = jaccard(signature, self.signatures[candidate])
+            if similarity >= best_similarity:
+                best, best_similarity = candidate, similarity
+        return best
+
+    def remove_owner(self, owner: str) -> Set[str]:
+        """Drop the signatures of every chunk owned by a source (see ``remove``)."""
+        return self.remove([chunk_id for chunk_id, chunk_owner in self.owners.items() if chunk_owner == owner])
+
+    def remove(self, chunk_ids: Iterable[str]) -> Set[str]:
+        """Drop chunks and return the sources that had duplicates of them removed."""
+        affected = set()
+        for chunk_id in chunk_ids:
+            signature = self.signatures.pop(chunk_id, None)
+            if signature is None:
+                continue
+            del self.owners[chunk_id]
+            for band, key in enumerate(self._band_keys(signature)):
+                bucket = self.buckets[band].get(key)
+                if bucket is not None:
+                    bucket.discard(chunk_id)
+                    if not bucket:
+                        del self.buckets[band][key]
+            affected.update(self.dependents.pop(chunk_id, ()))
+        return affected
+
+    def _insert(self, chunk_id: str, owner: str, signature: np.ndarray):
+        self.signatures[chunk_id] = signature
+        self.owners[chunk_id] = owner
+        for band, key in enumerate(self._band_keys(signature)):
+            self.buckets[band][key].add(chunk_id)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+
+def find_duplicates(texts: List[str], threshold: float = 0.8, num_perm: int = 128,
+                    shingle_size: int = 5) -> Dict[int, int]:
+    """Map the index of every near-duplicate text to the earlier text it duplicates."""
+    index = NearDuplicateIndex("", threshold, num_perm, shingle_size)
+    duplicates = {}
+    for position, text in enumerate(texts):
+        match = index.add_or_match(str(position), "", text)
+        if match is not None:
+            duplicates[position] = int(match)
+    return duplicates
@@ -1,133 +1,441 @@
 import os
 import json
+import hashlib
+import multiprocessing
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict, Any
-import pypdf
-import ebooklib
-from ebooklib import epub
-from langchain_community.document_loaders import WebBaseLoader, WikipediaLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import Chroma
+from src.document_processing.dedup import NearDuplicateIndex
+from src.document_processing.embedding_cache import EmbeddingCache
+from src.document_processing.extractors import extract_local_source
+from src.document_processing.manifest import IngestionManifest, hash_documents, hash_file, hash_text
+from src.document_processing.pipeline import SourceTracker, StageWorker, ThroughputReport, batched, bounded_map
+from src.document_processing.web_fetcher import AsyncFetcher
+from src.retrieval import bm25_index, flat_index
+from src.retrieval.quantized_index import CODES_FILES, QuantizedIndex
 
-def extract_text_from_pdf(file_path: str) -> str:
-    """Extract text from PDF files."""
-    with open(file_path, 'rb') as file:
-        reader = pypdf.PdfReader(file)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text
+EMBEDDING_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+# Bump when extraction output changes so existing sources are re-ingested
+EXTRACTOR_VERSION = 2
 
-def extract_text_from_epub(file_path: str) -> str:
-    """Extract text from EPUB files."""
-    book = epub.read_epub(file_path)
-    text = ""
-    for item in book.get_items():
-        if item.get_type() == ebooklib.ITEM_DOCUMENT:
-            content = item.get_content().decode('utf-8')
-            # Simple HTML tag removal (can be improved with BeautifulSoup)
-            text += content.replace('<', ' <').replace('>', '> ').replace('\n', ' ') + "\n"
-    return text
+def create_fetcher(config: Dict[str, Any]) -> AsyncFetcher:
+    """Build the web fetcher from the ``fetching`` configuration section."""
+    fetching_config = config.get("fetching", {})
+    return AsyncFetcher(
+        cache_dir=fetching_config.get("cache_dir", "data/http_cache"),
+        per_host_limit=fetching_config.get("per_host_limit", 2),
+        max_connections=fetching_config.get("max_connections", 16),
+        timeout=fetching_config.get("timeout", 20),
+        retries=fetching_config.get("retries", 3),
+        cache_max_age=fetching_config.get("cache_max_age", 0)
+    )
 
-def load_web_content(urls: List[str]) -> List[str]:
-    """Load content from websites."""
-    texts = []
-    for url in urls:
-        try:
-            loader = WebBaseLoader(url)
-            documents = loader.load()
-            texts.extend([doc.page_content for doc in documents])
-        except Exception as e:
-            print(f"Error loading {url}: {e}")
-    return texts
+def load_web_content(urls: List[str], fetcher: AsyncFetcher = None) -> List[Dict[str, str]]:
+    """Load content from websites, one document per page attributed to its URL.
 
-def load_wikipedia_content(topics: List[str]) -> List[str]:
-    """Load content from Wikipedia."""
-    texts = []
-    for topic in topics:
-        try:
-            loader = WikipediaLoader(query=topic, lang="en")
-            documents = loader.load()
-            texts.extend([doc.page_content for doc in documents])
-        except Exception as e:
-            print(f"Error loading Wikipedia topic {topic}: {e}")
-    return texts
+    A ``fetcher`` passed in must already be started and is left open.
+    """
+    if fetcher is None:
+        with AsyncFetcher() as fetcher:
+            return load_web_content(urls, fetcher)
+    futures = [fetcher.submit(fetcher.fetch_web_documents, url) for url in urls]
+    return [document for future in futures for document in future.result()]
+
+def load_wikipedia_content(topics: List[str], fetcher: AsyncFetcher = None, max_pages: int = 3) -> List[Dict[str, str]]:
+    """Load content from Wikipedia, one document per article attributed to its title.
+
+    A ``fetcher`` passed in must already be started and is left open.
+    """
+    if fetcher is None:
+        with AsyncFetcher() as fetcher:
+            return load_wikipedia_content(topics, fetcher, max_pages)
+    futures = [fetcher.submit(fetcher.fetch_wikipedia_documents, topic, "en", max_pages) for topic in topics]
+    return [document for future in futures for document in future.result()]
+
+def chunk_id(source: str, content_hash: str, params_hash: str, index: int) -> str:
+    """Build a chunk ID from its source, the source's content hash, the ingestion parameters and the chunk index."""
+    source_hash = hashlib.sha1(source.encode('utf-8')).hexdigest()[:12]
+    return f"{source_hash}-{content_hash[:12]}-{params_hash[:8]}-{index}"
+
+def list_sources(config: Dict[str, Any]) -> List[Dict[str, str]]:
+    """List every configured source with its kind and location."""
+    sources = []
+    
+    # PDFs
+    pdf_dir = config.get("pdf_directory", "data/pdfs")
+    if os.path.isdir(pdf_dir):
+        for filename in sorted(os.listdir(pdf_dir)):
+            if filename.endswith('.pdf'):
+                sources.append({"source": filename, "kind": "pdf", "path": os.path.join(pdf_dir, filename)})
+    
+    # Ebooks (only EPUB can be extracted)
+    ebook_dir = config.get("ebook_directory", "data/ebooks")
+    if os.path.isdir(ebook_dir):
+        for filename in sorted(os.listdir(ebook_dir)):
+            if filename.endswith('.epub'):
+                sources.append({"source": filename, "kind": "epub", "path": os.path.join(ebook_dir, filename)})
+    
+    # Web content
+    for url in config.get("web_urls", []):
+        sources.append({"source": url, "kind": "web", "url": url})
+    
+    # Wikipedia topics
+    for topic in config.get("wikipedia_topics", []):
+        sources.append({"source": f"Wikipedia: {topic}", "kind": "wikipedia", "topic": topic})
+    
+    return sources
+
+async def fetch_remote_source(fetcher: AsyncFetcher, item: Dict[str, str], wikipedia_pages: int = 3) -> Dict[str, Any]:
+    """Fetch the documents of a web or Wikipedia source (runs on the fetcher's event loop)."""
+    start = time.perf_counter()
+    if item["kind"] == "web":
+        documents = await fetcher.fetch_web_documents(item["url"])
+    elif item["kind"] == "wikipedia":
+        documents = await fetcher.fetch_wikipedia_documents(item["topic"], "en", wikipedia_pages)
+    else:
+        raise ValueError(f"Unknown remote source kind: {item['kind']}")
+    return {
+        "item": item,
+        "content_hash": hash_documents(documents) if documents else None,
+        "documents": documents or None,
+        "unchanged": False,
+        "seconds": time.perf_counter() - start
+    }
+
+def has_pending_changes(manifest: IngestionManifest, sources: List[Dict[str, str]], refresh_remote: bool) -> bool:
+    """Whether a run would add, change or remove anything, judged from the manifest and file hashes."""
+    current_sources = {item["source"] for item in sources}
+    if any(source not in current_sources for source in manifest.sources):
+        return True
+    for item in sources:
+        entry = manifest.entry(item["source"])
+        if item["kind"] in ("web", "wikipedia"):
+            if refresh_remote or not entry or not entry["content_hash"]:
+                return True
+        elif not entry or entry["params"] != manifest.params or not entry["content_hash"]:
+            return True
+        else:
+            try:
+                if hash_file(item["path"]) != entry["content_hash"]:
+                    return True
+            except OSError as e:
+                # Unreadable files keep what was ingested before, as in a full run
+                print(f"Error reading {item['source']}: {e}")
+    return False
 
-def process_documents(config_path: str) -> None:
-    """Process all documents and create vector database."""
+def process_documents(config_path: str, refresh_remote: bool = True) -> bool:
+    """Incrementally update the vector database from the configured sources.
+    
+    Only new or changed sources are extracted and embedded; chunks of changed
+    and removed sources are deleted. With ``refresh_remote=False`` web and
+    Wikipedia sources that were already ingested are not fetched again.
+    
+    Ingestion is a streaming pipeline: PDFs/EPUBs are extracted in a process
+    pool and remote sources fetched concurrently by an ``AsyncFetcher`` with an
+    on-disk HTTP cache, chunks are produced lazily,
+    embedded in fixed-size batches and inserted by a writer thread. Stages are
+    connected by bounded queues so memory stays flat as the corpus grows.
+    When the manifest and file hashes show nothing to do, it returns before
+    loading the embedding model or starting any worker.
+    Returns whether the vector database changed.
+    """
     # Load configuration
     with open(config_path, 'r') as f:
         config = json.load(f)
     
-    # Initialize document storage
-    all_texts = []
+    vector_db_path = config.get("vector_db_path", "data/vectordb")
+    ingestion_config = config.get("ingestion", {})
+    chunk_size = ingestion_config.get("chunk_size", 1000)
+    chunk_overlap = ingestion_config.get("chunk_overlap", 200)
+    batch_size = ingestion_config.get("batch_size", 256)
+    workers = ingestion_config.get("workers") or os.cpu_count() or 1
+    fetching_config = config.get("fetching", {})
+    max_fetches = fetching_config.get("max_connections", 16)
+    wikipedia_pages = fetching_config.get("wikipedia_pages_per_topic", 3)
+    queue_size = ingestion_config.get("queue_size", 4)
     
-    # Process PDFs
-    pdf_dir = config.get("pdf_directory", "data/pdfs")
-    for filename in os.listdir(pdf_dir):
-        if filename.endswith('.pdf'):
-            file_path = os.path.join(pdf_dir, filename)
-            print(f"Processing PDF: {filename}")
-            text = extract_text_from_pdf(file_path)
-            all_texts.append({"content": text, "source": filename})
-    
-    # Process ebooks
-    ebook_dir = config.get("ebook_directory", "data/ebooks")
-    for filename in os.listdir(ebook_dir):
-        if filename.endswith(('.epub', '.mobi', '.azw')):
-            file_path = os.path.join(ebook_dir, filename)
-            print(f"Processing ebook: {filename}")
-            if filename.endswith('.epub'):
-                text = extract_text_from_epub(file_path)
-                all_texts.append({"content": text, "source": filename})
-    
-    # Process web content
-    web_urls = config.get("web_urls", [])
-    if web_urls:
-        print(f"Processing {len(web_urls)} web pages")
-        web_texts = load_web_content(web_urls)
-        for i, text in enumerate(web_texts):
-            all_texts.append({"content": text, "source": web_urls[i]})
-    
-    # Process Wikipedia topics
-    wiki_topics = config.get("wikipedia_topics", [])
-    if wiki_topics:
-        print(f"Processing {len(wiki_topics)} Wikipedia topics")
-        wiki_texts = load_wikipedia_content(wiki_topics)
-        for i, text in enumerate(wiki_texts):
-            all_texts.append({"content": text, "source": f"Wikipedia: {wiki_topics[i]}"})
-    
-    # Split text into chunks
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-    )
+    manifest = IngestionManifest(
+        ingestion_config.get("manifest_path", "data/ingest_manifest.json"),
+        {"chunk_size": chunk_size, "chunk_overlap": chunk_overlap, "embedding_model": EMBEDDING_MODEL_NAME,
+         "extractor_version": EXTRACTOR_VERSION}
+    ).load()
+    sources = list_sources(config)
     
-    documents = []
-    for item in all_texts:
-        chunks = text_splitter.split_text(item["content"])
-        for chunk in chunks:
-            documents.append({"content": chunk, "source": item["source"]})
+    # Cheap check first: don't load the embedding model or start the worker
+    # pool when every source is already ingested as it is now
+    if os.path.exists(vector_db_path) and manifest.sources and not has_pending_changes(manifest, sources, refresh_remote):
+        if not derived_indexes_current(config):
+            export_derived_indexes(config, Chroma(persist_directory=vector_db_path))
+        print("Documents are up to date")
+        return False
     
-    print(f"Created {len(documents)} document chunks")
+    cache_config = ingestion_config.get("embedding_cache", {})
+    embedding_cache = None
+    if cache_config.get("enabled", False):
+        embedding_cache = EmbeddingCache(cache_config.get("path", "data/embedding_cache"), EMBEDDING_MODEL_NAME).load()
+        print(f"Embedding cache: {len(embedding_cache)} cached chunks")
+    dedup_config = ingestion_config.get("dedup", {})
+    dedup = None
+    if dedup_config.get("enabled", False):
+        dedup = NearDuplicateIndex(
+            dedup_config.get("index_path", "data/minhash"),
+            threshold=dedup_config.get("threshold", 0.8),
+            num_perm=dedup_config.get("num_perm", 128),
+            shingle_size=dedup_config.get("shingle_size", 5)
+        ).load()
+    if not os.path.exists(vector_db_path):
+        # The vector database was deleted: everything has to be ingested again
+        manifest.sources = {}
+        if dedup is not None:
+            dedup.clear()
+    # Chunk IDs also depend on the ingestion parameters so re-chunked sources never reuse old IDs
+    params_hash = hash_text(json.dumps(manifest.params, sort_keys=True))
     
-    # Create embeddings
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+    )
     embedding_model = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+        model_name=EMBEDDING_MODEL_NAME
     )
+    db = Chroma(
+        persist_directory=vector_db_path,
+        embedding_function=embedding_model
+    )
+    if not manifest.sources and db._collection.count():
+        # A database without a manifest (e.g. built before incremental
+        # ingestion, with random chunk IDs) can't be updated in place: start over
+        print("Vector database has no ingestion manifest; rebuilding it from scratch")
+        db.delete_collection()
+        db = Chroma(
+            persist_directory=vector_db_path,
+            embedding_function=embedding_model
+        )
+        if dedup is not None:
+            dedup.clear()
+    collection = db._collection
     
-    # Create vector store
-    texts = [doc["content"] for doc in documents]
-    metadatas = [{"source": doc["source"]} for doc in documents]
-    
-    db = Chroma.from_texts(
-        texts=texts,
-        metadatas=metadatas,
-        embedding=embedding_model,
-        persist_directory=config.get("vector_db_path", "data/vectordb")
+    report = ThroughputReport(
+        [("extract", "sources"), ("chunk", "chunks"), ("dedup", "chunks"), ("embed", "chunks"), ("insert", "chunks")],
+        interval=ingestion_config.get("report_interval", 10.0)
     )
+    totals = Counter()
+    manifest_lock = threading.Lock()
+    last_save = [time.perf_counter()]
+    # Sources invalidated while their chunks may still be in flight
+    invalidated = set()
+    
+    def complete_source(source: str, info: Dict[str, Any]):
+        # All new chunks are stored: drop the old ones and record the source
+        with manifest_lock:
+            new_ids = set(info["ids"])
+            stale_ids = [old_id for old_id in manifest.chunk_ids(source) if old_id not in new_ids]
+            if stale_ids:
+                collection.delete(ids=stale_ids)
+                totals["deleted_chunks"] += len(stale_ids)
+            manifest.update(source, info["kind"], info["content_hash"], info["ids"])
+            if source in invalidated:
+                # Deduplicated against chunks deleted after it was chunked
+                manifest.invalidate(source)
+            totals["updated_sources"] += 1
+            if time.perf_counter() - last_save[0] > 30:
+                manifest.save()
+                last_save[0] = time.perf_counter()
+    
+    tracker = SourceTracker(complete_source)
+    
+    def invalidate_dependents(sources_to_refresh):
+        # Sources whose near-duplicates were dropped in favour of chunks that are
+        # now being deleted must be ingested again to get their text back
+        with manifest_lock:
+            invalidated.update(sources_to_refresh)
+            for source in sources_to_refresh:
+                manifest.invalidate(source)
+        if sources_to_refresh:
+            print(f"{len(sources_to_refresh)} sources lost the chunks they were deduplicated against and will be re-ingested")
+    
+    def drop_near_duplicates(item, chunks, ids):
+        # Keep only chunks that are not near-identical to a chunk already stored
+        start = time.perf_counter()
+        with manifest_lock:
+            invalidated.discard(item["source"])
+        invalidate_dependents(dedup.remove_owner(item["source"]) - {item["source"]})
+        kept = [index for index in range(len(chunks)) if dedup.add_or_match(ids[index], item["source"], chunks[index][0]) is None]
+        report["dedup"].record(len(chunks), time.perf_counter() - start)
+        for index in set(range(len(chunks))).difference(kept):
+            totals["duplicate_chunks"] += 1
+            totals["duplicate_bytes"] += len(chunks[index][0].encode('utf-8'))
+        return [chunks[index] for index in kept], [ids[index] for index in kept]
+    
+    def insert_batch(batch: Dict[str, Any]):
+        start = time.perf_counter()
+        collection.upsert(
+            ids=batch["ids"],
+            embeddings=batch["embeddings"],
+            documents=batch["documents"],
+            metadatas=batch["metadatas"]
+        )
+        report["insert"].record(len(batch["ids"]), time.perf_counter() - start)
+        tracker.inserted(Counter(batch["items"]))
+    
+    def extraction_tasks(process_pool, fetcher):
+        for item in sources:
+            entry = manifest.entry(item["source"])
+            if item["kind"] in ("web", "wikipedia"):
+                if refresh_remote or not entry or not entry["content_hash"]:
+                    yield fetcher, fetch_remote_source, (fetcher, item, wikipedia_pages)
+            else:
+                known_hash = entry["content_hash"] if entry and entry["params"] == manifest.params else None
+                yield process_pool, extract_local_source, (item, known_hash)
+    
+    def generate_chunks(process_pool, fetcher):
+        max_pending = workers + max_fetches
+        for result in bounded_map(extraction_tasks(process_pool, fetcher), max_pending):
+            report["extract"].record(1, result["seconds"])
+            item, content_hash, documents = result["item"], result["content_hash"], result["documents"]
+            # Unchanged, unreadable or unreachable sources keep what was ingested before
+            if documents is None or manifest.is_current(item["source"], content_hash):
+                continue
+            print(f"Processing {item['kind']} source: {item['source']}")
+            
+            # A source yields several documents (PDF pages, EPUB chapters,
+            # Wikipedia articles); each chunk keeps its document's attribution
+            start = time.perf_counter()
+            chunks = []
+            for document in documents:
+                metadata = {"source": document["source"]}
+                if document.get("location"):
+                    metadata["location"] = document["location"]
+                chunks.extend((chunk, metadata) for chunk in text_splitter.split_text(document["content"]))
+            del documents, result
+            ids = [chunk_id(item["source"], content_hash, params_hash, index) for index in range(len(chunks))]
+            report["chunk"].record(len(chunks), time.perf_counter() - start)
+            if dedup is not None:
+                chunks, ids = drop_near_duplicates(item, chunks, ids)
+            
+            tracker.begin(item["source"], len(chunks), {"kind": item["kind"], "content_hash": content_hash, "ids": ids})
+            for index in range(len(chunks)):
+                content, metadata = chunks[index]
+                yield {"id": ids[index], "content": content, "metadata": metadata, "item": item["source"]}
+                chunks[index] = None
+            report.maybe_print()
+    
+    inserter = StageWorker("insert", insert_batch, max_queue=queue_size)
+    process_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    fetcher = create_fetcher(config).start()
+    try:
+        for batch in batched(generate_chunks(process_pool, fetcher), batch_size):
+            start = time.perf_counter()
+            texts = [chunk["content"] for chunk in batch]
+            if embedding_cache is not None:
+                embeddings = embedding_cache.embed(texts, embedding_model.embed_documents)
+            else:
+                embeddings = embedding_model.embed_documents(texts)
+            report["embed"].record(len(batch), time.perf_counter() - start)
+            totals["embedding_dim"] = len(embeddings[0])
+            inserter.put({
+                "ids": [chunk["id"] for chunk in batch],
+                "embeddings": embeddings,
+                "documents": texts,
+                "metadatas": [dict(chunk["metadata"], chunk_id=chunk["id"]) for chunk in batch],
+                "items": [chunk["item"] for chunk in batch]
+            })
+            totals["added_chunks"] += len(batch)
+            report.maybe_print()
+    finally:
+        try:
+            inserter.close()
+        finally:
+            process_pool.shutdown(cancel_futures=True)
+            fetcher.close()
+            manifest.save()
+            if dedup is not None:
+                dedup.save()
+            if embedding_cache is not None:
+                embedding_cache.close()
+    
+    # Drop chunks of sources that are no longer configured
+    current_sources = {item["source"] for item in sources}
+    for source in [source for source in manifest.sources if source not in current_sources]:
+        old_ids = manifest.chunk_ids(source)
+        if old_ids:
+            collection.delete(ids=old_ids)
+            totals["deleted_chunks"] += len(old_ids)
+        print(f"Removed source: {source}")
+        manifest.remove(source)
+        totals["updated_sources"] += 1
+        if dedup is not None:
+            invalidate_dependents(dedup.remove_owner(source) - {source})
+    manifest.save()
+    if dedup is not None:
+        dedup.save()
+    
+    print(report.summary())
+    changed = totals["updated_sources"] > 0
+    print(f"Ingestion: {totals['updated_sources']} sources updated, {totals['added_chunks']} chunks added, {totals['deleted_chunks']} chunks deleted")
+    if totals["duplicate_chunks"]:
+        produced = totals["duplicate_chunks"] + totals["added_chunks"]
+        saved_bytes = totals["duplicate_chunks"] * totals["embedding_dim"] * 4 + totals["duplicate_bytes"]
+        print(f"Near-duplicates: {totals['duplicate_chunks']} of {produced} chunks dropped "
+              f"({100.0 * totals['duplicate_chunks'] / produced:.1f}%), ~{saved_bytes / 1e6:.1f} MB of vectors and text not stored")
+    if embedding_cache is not None and embedding_cache.hits + embedding_cache.misses:
+        print(f"Embedding cache: {embedding_cache.hits} hits, {embedding_cache.misses} chunks embedded "
+              f"({100.0 * embedding_cache.hits / (embedding_cache.hits + embedding_cache.misses):.1f}% hit rate)")
+    if changed:
+        print(f"Vector database updated at {vector_db_path}")
+    
+    export_derived_indexes(config, db, force=changed)
+    return changed
+
+def derived_indexes_current(config: Dict[str, Any]) -> bool:
+    """Whether every derived index the configuration asks for exists."""
+    retrieval_config = config.get("retrieval", {})
+    flat_index_path = retrieval_config.get("flat_index_path", "data/flatindex")
+    if (retrieval_config.get("export_flat_index", False) or retrieval_config.get("backend") == "flat") \
+            and not os.path.exists(flat_index_path):
+        return False
+    quantization = retrieval_config.get("quantization")
+    if quantization and not os.path.exists(os.path.join(flat_index_path, CODES_FILES[quantization])):
+        return False
+    if retrieval_config.get("hybrid", False) and not os.path.exists(retrieval_config.get("bm25_index_path", "data/bm25index")):
+        return False
+    return True
+
+def export_derived_indexes(config: Dict[str, Any], db, force: bool = False) -> None:
+    """Rebuild the flat, quantized and BM25 indexes from the vector database."""
+    retrieval_config = config.get("retrieval", {})
+    
+    # Export the stored embeddings into the memory-mapped flat index; the flat
+    # backend reads nothing else, so it always gets one
+    flat_index_path = retrieval_config.get("flat_index_path", "data/flatindex")
+    export_flat = retrieval_config.get("export_flat_index", False) or retrieval_config.get("backend") == "flat"
+    if export_flat and (force or not os.path.exists(flat_index_path)):
+        flat_index.export_chroma_collection(
+            db._collection,
+            flat_index_path,
+            model_name=EMBEDDING_MODEL_NAME
+        )
+    
+    quantization = retrieval_config.get("quantization")
+    if quantization and os.path.exists(flat_index_path) and (
+            force or not os.path.exists(os.path.join(flat_index_path, CODES_FILES[quantization]))):
+        QuantizedIndex.build_codes(
+            flat_index_path,
+            modes=[quantization]
+        )
     
-    print(f"Vector database created and saved to {config.get('vector_db_path', 'data/vectordb')}")
+    # Build the BM25 inverted index over the same chunks
+    bm25_index_path = retrieval_config.get("bm25_index_path", "data/bm25index")
+    if retrieval_config.get("hybrid", False) and (force or not os.path.exists(bm25_index_path)):
+        bm25_index.export_chroma_collection(
+            db._collection,
+            bm25_index_path
+        )
 
 if __name__ == "__main__":
     process_documents("config.json")
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import unicodedata
+from typing import Callable, List, Optional
+import numpy as np
+
+KEYS_FILE = "keys.bin"
+VECTORS_FILE = "vectors.f32"
+META_FILE = "meta.json"
+KEY_SIZE = 16
+
+
+def normalize_text(text: str) -> str:
+    """NFC-normalize a text and collapse its whitespace."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def text_key(text: str) -> bytes:
+    """16-byte BLAKE2b digest of a normalized text."""
+    return hashlib.blake2b(normalize_text(text).encode('utf-8'), digest_size=KEY_SIZE).digest()
+
+
+class EmbeddingCache:
+    """On-disk cache of chunk embeddings keyed by normalized text hash.
+
+    Each model gets its own directory under ``cache_dir`` holding two
+    append-only files: ``keys.bin`` with one 16-byte text digest per row and
+    ``vectors.f32`` with the float32 embeddings in the same row order. The
+    key-to-row index is rebuilt in memory on load and the vectors are read
+    through a memory map, so a cache read never loads the whole matrix. A
+    torn append from an interrupted run is truncated away on load.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str):
+        """Initialize the cache for ``model_name``; call ``load()`` before use."""
+        self.model_name = model_name
+        self.path = os.path.join(cache_dir, hashlib.sha1(model_name.encode('utf-8')).hexdigest()[:16])
+        self.dim = None
+        self.rows = {}
+        self.hits = 0
+        self.misses = 0
+        self._vectors = None
+        self._keys_file = None
+        self._vectors_file = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def load(self) -> "EmbeddingCache":
+        """Read the key index and open the files for appending."""
+        os.makedirs(self.path, exist_ok=True)
+        meta_path = os.path.join(self.path, META_FILE)
+        keys_path = os.path.join(self.path, KEYS_FILE)
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r') as f:
+                self.dim = json.load(f)["dim"]
+
+        count = 0
+        if self.dim and os.path.exists(keys_path) and os.path.exists(vectors_path):
+            count = min(os.path.getsize(keys_path) // KEY_SIZE, os.path.getsize(vectors_path) // (4 * self.dim))
+            with open(keys_path, 'rb') as f:
+                keys = f.read(count * KEY_SIZE)
+            self.rows = {keys[row * KEY_SIZE:(row + 1) * KEY_SIZE]: row for row in range(count)}
+        for path, row_size in ((keys_path, KEY_SIZE), (vectors_path, 4 * (self.dim or 0))):
+            with open(path, 'ab') as f:
+                f.truncate(count * row_size)
+
+        self._keys_file = open(keys_path, 'ab')
+        self._vectors_file = open(vectors_path, 'ab')
+        return self
+
+    def close(self):
+        """Close the append handles."""
+        for handle in (self._keys_file, self._vectors_file):
+            if handle is not None:
+                handle.close()
+        self._keys_file = self._vectors_file = None
+        self._vectors = None
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Cached embeddings for each text, None for misses."""
+        rows = [self.rows.get(text_key(text)) for text in texts]
+        if all(row is None for row in rows):
+            return [None] * len(texts)
+        vectors = self._matrix()
+        return [None if row is None else np.array(vectors[row]) for row in rows]
+
+    def put_many(self, texts: List[str], embeddings: List[List[float]]):
+        """Append embeddings for texts that are not cached yet."""
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if len(matrix) == 0:
+            return
+        if self.dim is None:
+            self.dim = int(matrix.shape[1])
+            with open(os.path.join(self.path, META_FILE), 'w') as f:
+                json.dump({"model_name": self.model_name, "dim": self.dim}, f)
+        keys, rows = [], []
+        for position, text in enumerate(texts):
+            key = text_key(text)
+            if key not in self.rows:
+                self.rows[key] = len(self.rows)
+                keys.append(key)
+                rows.append(position)
+        if not rows:
+            return
+        # Vectors first: a row only counts once its key is written too
+        self._vectors_file.write(np.ascontiguousarray(matrix[rows]).tobytes())
+        self._vectors_file.flush()
+        self._keys_file.write(b"".join(keys))
+        self._keys_file.flush()
+        self._vectors = None
+
+    def embed(self, texts: List[str], embed_documents: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        """Embeddings for all texts, computing and caching only the misses in one call."""
+        cached = self.get_many(texts)
+        misses = [position for position, vector in enumerate(cached) if vector is None]
+        self.hits += len(texts) - len(misses)
+        self.misses += len(misses)
+        if misses:
+            computed = embed_documents([texts[position] for position in misses])
+            self.put_many([texts[position] for position in misses], computed)
+            for position, vector in zip(misses, computed):
+                cached[position] = vector
+        return [vector.tolist() if isinstance(vector, np.ndarray) else list(vector) for vector in cached]
+
+    def _matrix(self) -> np.ndarray:
+        if self._vectors is None:
+            self._vectors = np.memmap(os.path.join(self.path, VECTORS_FILE), dtype=np.float32, mode='r',
+                                      shape=(len(self.rows), self.dim))
+        return self._vectors
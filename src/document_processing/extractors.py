@@ -0,0 +1,64 @@
+import time
+from typing import Any, Dict, Iterator, Optional
+import pypdf
+import ebooklib
+from ebooklib import epub
+from src.document_processing.html_text import join_text, parse_html
+from src.document_processing.manifest import hash_file
+
+# This module only depends on the PDF/EPUB parsers so extraction worker
+# processes start quickly and never import torch or langchain.
+
+def iter_pdf_pages(file_path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the text of each non-empty PDF page with its 1-based page number."""
+    with open(file_path, 'rb') as file:
+        reader = pypdf.PdfReader(file)
+        for number, page in enumerate(reader.pages, start=1):
+            text = page.extract_text() or ""
+            if text.strip():
+                yield {"content": text, "location": f"page {number}"}
+
+def iter_epub_chapters(file_path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the visible text of each EPUB spine item, in reading order, with its chapter title."""
+    book = epub.read_epub(file_path)
+    for number, (item_id, _) in enumerate(book.spine, start=1):
+        item = book.get_item_with_id(item_id)
+        if item is None or item.get_type() != ebooklib.ITEM_DOCUMENT:
+            continue
+        parsed = parse_html(item.get_content().decode('utf-8', errors='replace'))
+        text = join_text(parsed.parts)
+        if text:
+            title = parsed.heading or parsed.title
+            yield {"content": text, "location": f"chapter {number}: {title}" if title else f"chapter {number}"}
+
+def extract_text_from_pdf(file_path: str) -> str:
+    """Extract text from PDF files."""
+    return "\n".join(page["content"] for page in iter_pdf_pages(file_path))
+
+def extract_text_from_epub(file_path: str) -> str:
+    """Extract text from EPUB files."""
+    return "\n".join(chapter["content"] for chapter in iter_epub_chapters(file_path))
+
+LOCAL_EXTRACTORS = {"pdf": iter_pdf_pages, "epub": iter_epub_chapters}
+
+def extract_local_source(item: Dict[str, str], known_hash: Optional[str] = None) -> Dict[str, Any]:
+    """Hash a local file and extract its text unless the hash matches ``known_hash``.
+
+    Runs in an extraction worker process. Every PDF page or EPUB chapter
+    becomes one document carrying its location. ``documents`` is None when the
+    file is unchanged or could not be read.
+    """
+    start = time.perf_counter()
+    result = {"item": item, "content_hash": None, "documents": None, "unchanged": False}
+    try:
+        result["content_hash"] = hash_file(item["path"])
+        if result["content_hash"] == known_hash:
+            result["unchanged"] = True
+        elif item["kind"] in LOCAL_EXTRACTORS:
+            result["documents"] = [
+                dict(section, source=item["source"]) for section in LOCAL_EXTRACTORS[item["kind"]](item["path"])
+            ]
+    except Exception as e:
+        print(f"Error extracting {item['source']}: {e}")
+    result["seconds"] = time.perf_counter() - start
+    return result
@@ -0,0 +1,71 @@
+from html.parser import HTMLParser
+
+# Elements whose content is never visible text
+SKIP_TAGS = {"script", "style", "noscript", "template", "head", "svg", "math", "iframe", "object"}
+
+# Elements that start a new line of text
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "caption", "dd", "div", "dl", "dt",
+    "figcaption", "figure", "footer", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr",
+    "li", "main", "nav", "ol", "p", "pre", "section", "table", "td", "th", "tr", "ul"
+}
+
+HEADING_TAGS = {"h1", "h2", "h3"}
+
+
+class _TextExtractor(HTMLParser):
+    """Collects the visible text of a page in a single pass."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.title = None
+        self.heading = None
+        self._skip = 0
+        self._capture = None
+        self._captured = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title" and self.title is None:
+            self._capture, self._captured = "title", []
+        elif tag in HEADING_TAGS and self.heading is None and not self._skip:
+            self._capture, self._captured = "heading", []
+        if tag in SKIP_TAGS:
+            self._skip += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if self._capture == "title" and tag == "title" or self._capture == "heading" and tag in HEADING_TAGS:
+            setattr(self, self._capture, " ".join("".join(self._captured).split()) or None)
+            self._capture = None
+        if tag in SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self._capture:
+            self._captured.append(data)
+        if not self._skip:
+            self.parts.append(data)
+
+
+def parse_html(html: str) -> _TextExtractor:
+    """Parse a page, returning the extractor with its text parts, title and first heading."""
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser
+
+
+def join_text(parts) -> str:
+    """Join text fragments, collapsing whitespace and dropping empty lines."""
+    lines = (" ".join(line.split()) for line in "".join(parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def html_to_text(html: str) -> str:
+    """Visible text of an HTML page, one line per block element."""
+    return join_text(parse_html(html).parts)
+
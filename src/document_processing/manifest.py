@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+
+def hash_file(file_path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_text(text: str) -> str:
+    """SHA-256 of a text."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def hash_documents(documents: List[Dict[str, str]]) -> str:
+    """SHA-256 over the sources and contents of a list of documents."""
+    digest = hashlib.sha256()
+    for document in documents:
+        digest.update(document["source"].encode('utf-8') + b"\0")
+        digest.update(document["content"].encode('utf-8') + b"\0")
+    return digest.hexdigest()
+
+
+class IngestionManifest:
+    """Records what has been ingested for each source.
+
+    Every entry stores the source's content hash, the parameters it was
+    ingested with (chunking, embedding model) and the IDs of the chunks it
+    produced, so a run can skip unchanged sources and delete the chunks of
+    changed or removed ones.
+    """
+
+    VERSION = 1
+
+    def __init__(self, manifest_path: str, params: Dict[str, Any]):
+        """Initialize the manifest for the given ingestion parameters."""
+        self.manifest_path = manifest_path
+        self.params = params
+        self.sources = {}
+
+    def load(self) -> "IngestionManifest":
+        """Load the manifest from disk if it exists."""
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r') as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION:
+                self.sources = data.get("sources", {})
+        return self
+
+    def save(self):
+        """Write the manifest atomically."""
+        directory = os.path.dirname(self.manifest_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": self.VERSION, "sources": self.sources}, f, indent=1, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+
+    def is_current(self, source: str, content_hash: str) -> bool:
+        """Whether the source was ingested with this content and the current parameters."""
+        entry = self.sources.get(source)
+        return bool(entry) and entry["content_hash"] == content_hash and entry["params"] == self.params
+
+    def entry(self, source: str) -> Optional[Dict[str, Any]]:
+        return self.sources.get(source)
+
+    def chunk_ids(self, source: str) -> List[str]:
+        """IDs of the chunks currently stored for a source."""
+        entry = self.sources.get(source)
+        return list(entry["chunk_ids"]) if entry else []
+
+    def update(self, source: str, kind: str, content_hash: str, chunk_ids: List[str]):
+        """Record a freshly ingested source."""
+        self.sources[source] = {
+            "kind": kind,
+            "content_hash": content_hash,
+            "params": self.params,
+            "chunk_ids": chunk_ids,
+            "updated": time.time(),
+        }
+
+    def invalidate(self, source: str):
+        """Force a source to be extracted again on the next run, keeping its chunk IDs."""
+        entry = self.sources.get(source)
+        if entry:
+            entry["content_hash"] = None
+
+    def remove(self, source: str):
+        self.sources.pop(source, None)
@@ -0,0 +1,175 @@
+import queue
+import threading
+import time
+from concurrent.futures import Executor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+# Marks the end of a stage's output queue
+_DONE = object()
+
+
+class StageStats:
+    """Item counts and busy time of one pipeline stage."""
+
+    def __init__(self, name: str, unit: str):
+        self.name = name
+        self.unit = unit
+        self.items = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, items: int, seconds: float):
+        with self._lock:
+            self.items += items
+            self.busy_seconds += seconds
+
+    def rate(self, elapsed: float) -> float:
+        """Items per second of wall time."""
+        return self.items / elapsed if elapsed > 0 else 0.0
+
+
+class ThroughputReport:
+    """Per-stage throughput, printed periodically and at the end of a run."""
+
+    def __init__(self, stages: List[Tuple[str, str]], interval: float = 10.0):
+        """``stages`` is a list of (stage name, unit) pairs in pipeline order."""
+        self.stages = {name: StageStats(name, unit) for name, unit in stages}
+        self.interval = interval
+        self.started = time.perf_counter()
+        self._last_print = self.started
+
+    def __getitem__(self, name: str) -> StageStats:
+        return self.stages[name]
+
+    def maybe_print(self):
+        """Print a progress line if the reporting interval has passed."""
+        now = time.perf_counter()
+        if now - self._last_print >= self.interval:
+            self._last_print = now
+            print(f"Progress: {self.line()}")
+
+    def line(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        return " | ".join(
+            f"{stats.name}: {stats.items} {stats.unit} ({stats.rate(elapsed):.1f}/s)"
+            for stats in self.stages.values()
+        )
+
+    def summary(self) -> str:
+        """Totals, wall-clock rate and busy-time rate for every stage."""
+        elapsed = time.perf_counter() - self.started
+        lines = [f"Pipeline finished in {elapsed:.1f}s"]
+        for stats in self.stages.values():
+            busy_rate = stats.items / stats.busy_seconds if stats.busy_seconds > 0 else 0.0
+            lines.append(
+                f"  {stats.name:<8} {stats.items:>8} {stats.unit:<8} "
+                f"{stats.rate(elapsed):>8.1f}/s wall  {busy_rate:>8.1f}/s busy  ({stats.busy_seconds:.1f}s busy)"
+            )
+        return "\n".join(lines)
+
+
+def bounded_map(tasks: Iterable[Tuple[Executor, Callable, tuple]], max_pending: int) -> Iterator[Any]:
+    """Run (executor, function, args) tasks with at most ``max_pending`` in flight.
+
+    Results are yielded in completion order. Tasks are pulled from the
+    iterable lazily, so a slow consumer stops new submissions.
+    """
+    tasks = iter(tasks)
+    pending = set()
+    exhausted = False
+    while True:
+        while not exhausted and len(pending) < max_pending:
+            try:
+                executor, func, args = next(tasks)
+            except StopIteration:
+                exhausted = True
+                break
+            pending.add(executor.submit(func, *args))
+        if not pending:
+            return
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield future.result()
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most ``size`` items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class StageWorker:
+    """Consumes items from a bounded queue on a background thread."""
+
+    def __init__(self, name: str, handle: Callable[[Any], None], max_queue: int):
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.handle = handle
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name=f"ingest-{name}", daemon=True)
+        self._thread.start()
+
+    def put(self, item: Any):
+        """Hand an item to the worker, blocking while its queue is full."""
+        if self.error is not None:
+            raise self.error
+        self.queue.put(item)
+
+    def close(self):
+        """Wait for the queue to drain and re-raise any worker error."""
+        self.queue.put(_DONE)
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is _DONE:
+                return
+            if self.error is not None:
+                continue
+            try:
+                self.handle(item)
+            except Exception as e:
+                self.error = e
+
+
+class SourceTracker:
+    """Finalizes a source once every one of its chunks has been inserted."""
+
+    def __init__(self, on_complete: Callable[[str, Dict[str, Any]], None]):
+        self.on_complete = on_complete
+        self._remaining = {}
+        self._info = {}
+        self._lock = threading.Lock()
+
+    def begin(self, source: str, chunk_count: int, info: Dict[str, Any]):
+        """Register a source whose ``chunk_count`` chunks are about to be produced."""
+        with self._lock:
+            self._remaining[source] = chunk_count
+            self._info[source] = info
+        if chunk_count == 0:
+            self.inserted({source: 0})
+
+    def inserted(self, counts: Dict[str, int]):
+        """Record inserted chunks per source and finalize completed sources."""
+        completed = []
+        with self._lock:
+            for source, count in counts.items():
+                self._remaining[source] -= count
+                if self._remaining[source] <= 0:
+                    del self._remaining[source]
+                    completed.append((source, self._info.pop(source)))
+        for source, info in completed:
+            self.on_complete(source, info)
+
+    @property
+    def open_sources(self) -> int:
+        return len(self._remaining)
+
@@ -0,0 +1,276 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlencode, urlsplit
+import aiohttp
+from src.document_processing.html_text import html_to_text
+
+DEFAULT_USER_AGENT = "ragfoto-ingestion/1.0 (photography course reference fetcher)"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FetchResult:
+    """Outcome of fetching one URL."""
+
+    def __init__(self, url: str, status: int, body: bytes = b"", content_type: str = "",
+                 from_cache: bool = False, error: Optional[str] = None):
+        self.url = url
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+        self.from_cache = from_cache
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and 200 <= self.status < 300
+
+    def text(self) -> str:
+        """Body decoded with the charset from the Content-Type header (UTF-8 by default)."""
+        charset = "utf-8"
+        for part in self.content_type.split(";"):
+            part = part.strip()
+            if part.lower().startswith("charset="):
+                charset = part.split("=", 1)[1].strip('"\'') or charset
+        try:
+            return self.body.decode(charset, errors="replace")
+        except LookupError:
+            return self.body.decode("utf-8", errors="replace")
+
+
+class HttpCache:
+    """On-disk HTTP response cache keyed by URL.
+
+    Each entry is a ``<sha1>.body`` file with the raw response and a
+    ``<sha1>.json`` file with the validators (ETag, Last-Modified), content
+    type and fetch time used for conditional requests.
+    """
+
+    def __init__(self, cache_dir: str):
+        """Initialize the cache in ``cache_dir``."""
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + suffix)
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Cached metadata for a URL (with its body under ``"body"``), or None."""
+        try:
+            with open(self._path(url, ".json"), 'r') as f:
+                entry = json.load(f)
+            with open(self._path(url, ".body"), 'rb') as f:
+                entry["body"] = f.read()
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url: str, body: bytes, headers: Dict[str, str]):
+        """Store a successful response."""
+        self._write(self._path(url, ".body"), body)
+        self.touch(url, headers)
+
+    def touch(self, url: str, headers: Dict[str, str]):
+        """Refresh the validators and fetch time of an entry (e.g. after a 304)."""
+        previous = self.get(url) or {}
+        previous.pop("body", None)
+        entry = {
+            "url": url,
+            "etag": headers.get("ETag", previous.get("etag")),
+            "last_modified": headers.get("Last-Modified", previous.get("last_modified")),
+            "content_type": headers.get("Content-Type", previous.get("content_type", "")),
+            "fetched_at": time.time(),
+        }
+        self._write(self._path(url, ".json"), json.dumps(entry).encode('utf-8'))
+
+    @staticmethod
+    def conditional_headers(entry: Dict[str, Any]) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for a cached entry."""
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+class AsyncFetcher:
+    """Concurrent HTTP fetcher with per-host limits, retries and an on-disk cache.
+
+    The fetcher runs its own event loop on a background thread so it can be
+    driven from synchronous code: ``submit()`` schedules a coroutine function
+    and returns a ``concurrent.futures.Future``. Use it as a context manager.
+    Responses younger than ``cache_max_age`` seconds are served from the cache
+    without touching the network; older ones are revalidated with
+    conditional requests, and the cached copy is used if the server can't be
+    reached.
+    """
+
+    def __init__(self, cache_dir: str = "data/http_cache", per_host_limit: int = 2, max_connections: int = 16,
+                 timeout: float = 20.0, retries: int = 3, backoff: float = 1.0, cache_max_age: float = 0.0,
+                 user_agent: str = DEFAULT_USER_AGENT):
+        """Initialize the fetcher; call ``start()`` (or enter the context) before fetching."""
+        self.cache = HttpCache(cache_dir)
+        self.per_host_limit = per_host_limit
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cache_max_age = cache_max_age
+        self.user_agent = user_agent
+        self.loop = None
+        self.session = None
+        self._thread = None
+        self._host_limits = {}
+
+    def start(self) -> "AsyncFetcher":
+        """Start the event loop thread and open the HTTP session."""
+        if self.loop is None:
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self.loop.run_forever, name="web-fetcher", daemon=True)
+            self._thread.start()
+            asyncio.run_coroutine_threadsafe(self._open_session(), self.loop).result()
+        return self
+
+    def close(self):
+        """Close the session and stop the event loop thread."""
+        if self.loop is not None:
+            asyncio.run_coroutine_threadsafe(self.session.close(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+            self.loop.close()
+            self.loop = None
+
+    def __enter__(self) -> "AsyncFetcher":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def submit(self, coroutine_function: Callable, *args) -> Future:
+        """Schedule ``coroutine_function(*args)`` on the fetcher's loop."""
+        return asyncio.run_coroutine_threadsafe(coroutine_function(*args), self.loop)
+
+    async def _open_session(self):
+        connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.per_host_limit)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": self.user_agent}
+        )
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    async def fetch(self, url: str, params: Optional[Dict[str, Any]] = None) -> FetchResult:
+        """GET a URL, using the cache and retrying transient failures."""
+        if params:
+            url = f"{url}?{urlencode(params)}"
+        cached = self.cache.get(url)
+        if cached and time.time() - cached.get("fetched_at", 0) < self.cache_max_age:
+            return FetchResult(url, 200, cached["body"], cached.get("content_type", ""), from_cache=True)
+
+        headers = HttpCache.conditional_headers(cached) if cached else {}
+        error = None
+        retry_after = 0.0
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(max(self.backoff * 2 ** (attempt - 1), retry_after))
+            try:
+                async with self._host_limit(url):
+                    async with self.session.get(url, headers=headers) as response:
+                        if response.status == 304 and cached:
+                            self.cache.touch(url, response.headers)
+                            return FetchResult(url, 200, cached["body"], cached.get("content_type", ""), from_cache=True)
+                        if response.status in RETRY_STATUSES:
+                            error = f"HTTP {response.status}"
+                            retry_after = _retry_after(response.headers.get("Retry-After"))
+                            continue
+                        body = await response.read()
+                        content_type = response.headers.get("Content-Type", "")
+                        if 200 <= response.status < 300:
+                            self.cache.put(url, body, response.headers)
+                            return FetchResult(url, response.status, body, content_type)
+                        return FetchResult(url, response.status, body, content_type, error=f"HTTP {response.status}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = f"{type(e).__name__}: {e}"
+
+        if cached:
+            print(f"Using cached copy of {url} ({error})")
+            return FetchResult(url, 200, cached["body"], cached.get("content_type", ""), from_cache=True)
+        return FetchResult(url, 0, error=error)
+
+    async def fetch_web_documents(self, url: str) -> List[Dict[str, str]]:
+        """Fetch a web page and return its visible text as a document attributed to the URL."""
+        result = await self.fetch(url)
+        if not result.ok:
+            print(f"Error loading {url}: {result.error}")
+            return []
+        text = html_to_text(result.text())
+        return [{"content": text, "source": url}] if text else []
+
+    async def fetch_wikipedia_documents(self, topic: str, lang: str = "en", max_pages: int = 3) -> List[Dict[str, str]]:
+        """Search Wikipedia for a topic and return the plain-text articles, one document per article."""
+        api = f"https://{lang}.wikipedia.org/w/api.php"
+        search = await self.fetch(api, {
+            "action": "query", "list": "search", "srsearch": topic, "srlimit": max_pages, "format": "json"
+        })
+        if not search.ok:
+            print(f"Error loading Wikipedia topic {topic}: {search.error}")
+            return []
+        try:
+            titles = [hit["title"] for hit in json.loads(search.body).get("query", {}).get("search", [])]
+        except ValueError as e:
+            print(f"Invalid Wikipedia search response for {topic}: {e}")
+            return []
+
+        async def fetch_article(title: str) -> Optional[Dict[str, str]]:
+            article = await self.fetch(api, {
+                "action": "query", "prop": "extracts", "explaintext": 1, "redirects": 1,
+                "titles": title, "format": "json"
+            })
+            if not article.ok:
+                print(f"Error loading Wikipedia article {title}: {article.error}")
+                return None
+            try:
+                pages = json.loads(article.body).get("query", {}).get("pages", {})
+            except ValueError as e:
+                print(f"Invalid Wikipedia response for article {title}: {e}")
+                return None
+            for page in pages.values():
+                if page.get("extract"):
+                    return {"content": page["extract"], "source": f"Wikipedia: {page.get('title', title)}"}
+            return None
+
+        articles = await asyncio.gather(*(fetch_article(title) for title in titles))
+        return [article for article in articles if article]
+
+
+def _retry_after(value: Optional[str]) -> float:
+    """Seconds to wait from a Retry-After header (capped at 30s)."""
+    if not value:
+        return 0.0
+    try:
+        return min(30.0, max(0.0, float(value)))
+    except ValueError:
+        pass
+    try:
+        return min(30.0, max(0.0, parsedate_to_datetime(value).timestamp() - time.time()))
+    except (TypeError, ValueError):
+        return 0.0
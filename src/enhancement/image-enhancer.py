@@ -2,7 +2,9 @@ import cv2
 import numpy as np
 from PIL import Image, ImageEnhance
 import os
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Union
+from src.image_io import to_pil
+from src.telemetry import span
 
 class ImageEnhancer:
     """Enhances photos based on analysis and suggestions."""
@@ -12,15 +14,8 @@ class ImageEnhancer:
         pass
     
     def enhance_image(self, image_path: str, analysis: Dict[str, Any], suggestions: List[str], output_path: str) -> str:
-        """Enhance an image based on analysis and suggestions."""
-        # Load image
-        pil_image = Image.open(image_path)
-        
-        # Parse suggestions to determine what adjustments to make
-        adjustments = self._parse_suggestions(suggestions, analysis)
-        
-        # Apply enhancements
-        enhanced_image = self._apply_enhancements(pil_image, adjustments, analysis)
+        """Enhance an image file based on analysis and suggestions and save the result."""
+        enhanced_image = self.enhance(Image.open(image_path), analysis, suggestions)
         
         # Save enhanced image
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
@@ -28,6 +23,18 @@ class ImageEnhancer:
         
         return output_path
     
+    def enhance(self, image: Union[np.ndarray, Image.Image], analysis: Dict[str, Any], suggestions: List[str]) -> Image.Image:
+        """Enhance a decoded image (BGR array or PIL image) and return the result as a PIL image."""
+        with span("enhancement", suggestions=len(suggestions)) as enhancement_span:
+            pil_image = to_pil(image) if isinstance(image, np.ndarray) else image
+            
+            # Parse suggestions to determine what adjustments to make
+            adjustments = self._parse_suggestions(suggestions, analysis)
+            enhancement_span.set(adjustments=len(adjustments))
+            
+            # Apply enhancements
+            return self._apply_enhancements(pil_image, adjustments, analysis)
+    
     def _parse_suggestions(self, suggestions: List[str], analysis: Dict[str, Any]) -> Dict[str, float]:
         """Parse suggestions to determine adjustment values."""
         adjustments = {
@@ -3,6 +3,8 @@ import numpy as np
 from PIL import Image, ImageStat
 from typing import Dict, Any, Tuple
 import os
+from src.image_io import load_image, to_pil
+from src.telemetry import span
 
 class ImageAnalyzer:
     """Analyzes photography based on various quality metrics."""
@@ -13,32 +15,45 @@ class ImageAnalyzer:
     
     def analyze_image(self, image_path: str) -> Dict[str, Any]:
         """Analyze an image file and return quality metrics."""
-        # Load image in different formats for different analyses
-        cv_image = cv2.imread(image_path)
-        pil_image = Image.open(image_path)
-        
-        # Get basic image information
-        width, height = pil_image.size
-        aspect_ratio = width / height
-        
-        # Calculate brightness
-        stat = ImageStat.Stat(pil_image)
-        brightness = sum(stat.mean) / len(stat.mean)
-        
-        # Calculate contrast
-        contrast = self._calculate_contrast(cv_image)
-        
-        # Detect rule of thirds
-        rule_of_thirds_score = self._analyze_rule_of_thirds(cv_image)
-        
-        # Calculate sharpness
-        sharpness = self._calculate_sharpness(cv_image)
-        
-        # Analyze color balance
-        color_balance = self._analyze_color_balance(pil_image)
-        
-        # Detect faces (for portrait assessment)
-        face_count = self._detect_faces(cv_image)
+        with span("analysis.load"):
+            cv_image = load_image(image_path)
+        return self.analyze_array(cv_image)
+    
+    def analyze_array(self, cv_image: np.ndarray) -> Dict[str, Any]:
+        """Analyze a decoded BGR image and return quality metrics."""
+        with span("analysis") as analysis_span:
+            # PIL view of the same pixels for the PIL-based metrics
+            pil_image = to_pil(cv_image)
+            
+            # Get basic image information
+            width, height = pil_image.size
+            aspect_ratio = width / height
+            analysis_span.set(width=width, height=height, pixels=width * height)
+            
+            # Calculate brightness
+            with span("analysis.brightness"):
+                stat = ImageStat.Stat(pil_image)
+                brightness = sum(stat.mean) / len(stat.mean)
+            
+            # Calculate contrast
+            with span("analysis.contrast"):
+                contrast = self._calculate_contrast(cv_image)
+            
+            # Detect rule of thirds
+            with span("analysis.rule_of_thirds"):
+                rule_of_thirds_score = self._analyze_rule_of_thirds(cv_image)
+            
+            # Calculate sharpness
+            with span("analysis.sharpness"):
+                sharpness = self._calculate_sharpness(cv_image)
+            
+            # Analyze color balance
+            with span("analysis.color_balance"):
+                color_balance = self._analyze_color_balance(pil_image)
+            
+            # Detect faces (for portrait assessment)
+            with span("analysis.faces"):
+                face_count = self._detect_faces(cv_image)
         
         return {
             "dimensions": {"width": width, "height": height},
@@ -151,8 +166,26 @@ class ImageAnalyzer:
     
     def save_analysis_visualization(self, image_path: str, output_path: str) -> str:
         """Create a visualization of the analysis and save it."""
-        # Load image
-        image = cv2.imread(image_path)
+        viz_image = self.render_analysis_visualization(load_image(image_path))
+        
+        # Save visualization
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        cv2.imwrite(output_path, viz_image)
+        
+        return output_path
+    
+    def render_analysis_visualization(self, image: np.ndarray, analysis: Dict[str, Any] = None) -> np.ndarray:
+        """Draw the rule-of-thirds grid, detected faces and key metrics on a BGR image.
+        
+        Pass the image's ``analysis`` to avoid analyzing it again.
+        """
+        with span("visualization"):
+            if analysis is None:
+                analysis = self.analyze_array(image)
+            return self._draw_visualization(image, analysis)
+    
+    def _draw_visualization(self, image: np.ndarray, analysis: Dict[str, Any]) -> np.ndarray:
+        """Return a copy of the image with the analysis overlay."""
         h, w = image.shape[:2]
         
         # Draw rule of thirds grid
@@ -185,7 +218,6 @@ class ImageAnalyzer:
             cv2.rectangle(viz_image, (x, y), (x + w_face, y + h_face), (255, 0, 0), 2)
         
         # Add text with some key metrics
-        analysis = self.analyze_image(image_path)
         bright_text = f"Brightness: {analysis['brightness']:.1f}"
         contrast_text = f"Contrast: {analysis['contrast']:.2f}"
         sharp_text = f"Sharpness: {analysis['sharpness']:.0f}"
@@ -194,8 +226,4 @@ class ImageAnalyzer:
         cv2.putText(viz_image, contrast_text, (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
         cv2.putText(viz_image, sharp_text, (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
         
-        # Save visualization
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        cv2.imwrite(output_path, viz_image)
-        
-        return output_path
+        return viz_image
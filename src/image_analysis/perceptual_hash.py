@@ -0,0 +1,253 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import cv2
+import numpy as np
+
+# Raw little-endian (pHash, dHash) rows and the matching JSON-lines records
+HASHES_FILE = "hashes.bin"
+RECORDS_FILE = "records.jsonl"
+HASH_DTYPE = np.dtype("<u8")
+
+
+def phash(image: np.ndarray) -> int:
+    """64-bit DCT perceptual hash of a BGR image."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()
+    # The DC term only carries the mean brightness
+    bits = low > np.median(low[1:])
+    return _pack(bits)
+
+
+def dhash(image: np.ndarray) -> int:
+    """64-bit difference hash of a BGR image (horizontal gradients)."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    return _pack((small[:, 1:] > small[:, :-1]).flatten())
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count("1")
+
+
+def _to_json(value: Any) -> Any:
+    # numpy scalars and arrays in stored analysis results
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _pack(bits: np.ndarray) -> int:
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit hashes for Hamming-radius queries.
+
+    Each node keeps its children by their distance to it, so by the triangle
+    inequality a query within ``d`` of its target only has to visit children
+    at distances ``[dist - d, dist + d]`` from each node.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, value: int, row: int):
+        self.size += 1
+        node = (value, row, {})
+        if self.root is None:
+            self.root = node
+            return
+        current = self.root
+        while True:
+            distance = hamming(value, current[0])
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, int]]:
+        """(distance, row) of every stored hash within ``max_distance``, closest first."""
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node_value, row, children = stack.pop()
+            distance = hamming(value, node_value)
+            if distance <= max_distance:
+                found.append((distance, row))
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return sorted(found)
+
+
+class PerceptualIndex:
+    """Index of assessed photos that finds resized, re-compressed or lightly edited variants.
+
+    The pHash/dHash pairs are kept as a compact ``(n, 2)`` uint64 array,
+    appended on disk to a raw binary file; the stored results of each photo
+    are appended, in the same row order, to a JSON-lines sidecar. Lookups
+    walk a BK-tree over the pHashes within ``max_distance`` bits; candidates
+    are confirmed by their dHash, which must be within twice that distance.
+
+    The index keeps the newest ``max_records`` photos and forgets photos
+    older than ``ttl_days``. Evicted rows stay in the files and the tree
+    until they outnumber the live ones; both files are then rewritten with
+    the live rows only. The index is shared between sessions, so every
+    method takes a lock.
+    """
+
+    def __init__(self, index_path: str, max_distance: int = 8, max_records: int = 10000,
+                 ttl_days: Optional[float] = None):
+        """Initialize an empty index; call ``load()`` to read a persisted one."""
+        self.index_path = index_path
+        self.max_distance = max_distance
+        self.max_records = max_records
+        self.ttl = ttl_days * 86400 if ttl_days else None
+        # Rows of the files on disk; evicted rows have no record
+        self.hashes = np.zeros((0, 2), dtype=HASH_DTYPE)
+        self.rows = 0
+        self.records = OrderedDict()
+        self.tree = BKTree()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.index_path, name)
+
+    def load(self) -> "PerceptualIndex":
+        """Load the persisted photos, dropping the ones that are over the limits."""
+        hashes_path, records_path = self._path(HASHES_FILE), self._path(RECORDS_FILE)
+        # Finish or undo a rewrite that was interrupted (hashes are swapped in first)
+        if os.path.exists(hashes_path + ".tmp"):
+            for path in (hashes_path, records_path):
+                if os.path.exists(path + ".tmp"):
+                    os.remove(path + ".tmp")
+        elif os.path.exists(records_path + ".tmp"):
+            os.replace(records_path + ".tmp", records_path)
+        if not (os.path.exists(hashes_path) and os.path.exists(records_path)):
+            return self
+        hashes = np.fromfile(hashes_path, dtype=HASH_DTYPE)
+        hashes = hashes[:len(hashes) // 2 * 2].reshape(-1, 2)
+        records = []
+        with open(records_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # A line cut short by a crash
+                    records.append(None)
+        count = min(len(hashes), len(records))
+        with self._lock:
+            self.hashes = hashes[:count].copy()
+            self.rows = count
+            self.records = OrderedDict((row, records[row]) for row in range(count) if records[row] is not None)
+            self.tree = BKTree()
+            for row in self.records:
+                self.tree.add(int(self.hashes[row, 0]), row)
+            self._evict()
+            if len(hashes) != len(records) or len(self.records) < count:
+                self._compact()
+        return self
+
+    @staticmethod
+    def hash_image(image: np.ndarray) -> Tuple[int, int]:
+        """(pHash, dHash) of a BGR image."""
+        return phash(image), dhash(image)
+
+    def find(self, hashes: Tuple[int, int], owner: Optional[str] = None) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """(pHash distance, record) of the closest stored near-duplicate, if any.
+
+        With an ``owner``, only photos added with that owner are considered.
+        """
+        photo_phash, photo_dhash = hashes
+        cutoff = time.time() - self.ttl if self.ttl else None
+        with self._lock:
+            for distance, row in self.tree.search(photo_phash, self.max_distance):
+                record = self.records.get(row)
+                if record is None or (cutoff is not None and record["added_at"] < cutoff):
+                    continue
+                if owner is not None and record.get("owner") != owner:
+                    continue
+                if hamming(photo_dhash, int(self.hashes[row, 1])) <= 2 * self.max_distance:
+                    return distance, record
+        return None
+
+    def add(self, hashes: Tuple[int, int], record: Dict[str, Any]):
+        """Store the results of a photo and append them to the index files."""
+        record = dict(record, added_at=time.time())
+        pair = np.array([hashes], dtype=HASH_DTYPE)
+        line = (json.dumps(record, ensure_ascii=False, default=_to_json) + "\n").encode('utf-8')
+        with self._lock:
+            self._append(pair, line)
+            row = self.rows
+            if row == len(self.hashes):
+                grown = np.zeros((max(2 * row, 64), 2), dtype=HASH_DTYPE)
+                grown[:row] = self.hashes[:row]
+                self.hashes = grown
+            self.hashes[row] = pair[0]
+            self.rows += 1
+            self.records[row] = record
+            self.tree.add(int(pair[0, 0]), row)
+            self._evict()
+
+    def _append(self, pair: np.ndarray, line: bytes):
+        os.makedirs(self.index_path, exist_ok=True)
+        with open(self._path(HASHES_FILE), 'ab') as hashes_file, open(self._path(RECORDS_FILE), 'ab') as records_file:
+            hashes_end, records_end = hashes_file.tell(), records_file.tell()
+            try:
+                hashes_file.write(pair.tobytes())
+                records_file.write(line)
+                hashes_file.flush()
+                records_file.flush()
+            except OSError:
+                # Keep the two files row-aligned
+                hashes_file.truncate(hashes_end)
+                records_file.truncate(records_end)
+                raise
+
+    def _evict(self):
+        # Rows are kept in insertion order, so the oldest are evicted first
+        cutoff = time.time() - self.ttl if self.ttl else None
+        while self.records:
+            row, record = next(iter(self.records.items()))
+            if len(self.records) <= self.max_records and (cutoff is None or record["added_at"] >= cutoff):
+                break
+            del self.records[row]
+        if self.rows > 2 * len(self.records):
+            self._compact()
+
+    def _compact(self):
+        # Renumber the live rows and rewrite both files with them
+        live = list(self.records)
+        self.hashes = self.hashes[live].copy() if live else np.zeros((0, 2), dtype=HASH_DTYPE)
+        self.records = OrderedDict(enumerate(self.records.values()))
+        self.rows = len(live)
+        self.tree = BKTree()
+        for row in range(self.rows):
+            self.tree.add(int(self.hashes[row, 0]), row)
+        os.makedirs(self.index_path, exist_ok=True)
+        hashes_path, records_path = self._path(HASHES_FILE), self._path(RECORDS_FILE)
+        with open(records_path + ".tmp", 'w', encoding='utf-8') as f:
+            for record in self.records.values():
+                f.write(json.dumps(record, ensure_ascii=False, default=_to_json) + "\n")
+        self.hashes.tofile(hashes_path + ".tmp")
+        os.replace(hashes_path + ".tmp", hashes_path)
+        os.replace(records_path + ".tmp", records_path)
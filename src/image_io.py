@@ -0,0 +1,28 @@
+import cv2
+import numpy as np
+from PIL import Image
+
+# Decoded images are passed between services as BGR uint8 arrays (OpenCV's
+# layout); PIL images are derived from them without decoding again.
+
+
+def decode_image(data: bytes) -> np.ndarray:
+    """Decode encoded image bytes (JPEG, PNG...) into a BGR array."""
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Could not decode the image")
+    return image
+
+
+def load_image(image_path: str) -> np.ndarray:
+    """Read an image file into a BGR array."""
+    image = cv2.imread(image_path, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"Could not read image {image_path}")
+    return image
+
+
+def to_pil(image: np.ndarray) -> Image.Image:
+    """RGB PIL image of a BGR array."""
+    return Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+
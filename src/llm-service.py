@@ -5,6 +5,7 @@ import os
 from langchain.chains import LLMChain
 from langchain_community.llms import Ollama
 from langchain.prompts import PromptTemplate
+from src.telemetry import estimate_tokens, span
 
 class LLMService:
     """Service for interacting with the LLM for photo assessment."""
@@ -17,7 +18,8 @@ class LLMService:
         # Initialize LLM
         self.llm = Ollama(
             model=self.config["model"]["local_model"],
-            temperature=self.config["model"]["temperature"]
+            temperature=self.config["model"]["temperature"],
+            base_url=self.config["model"].get("base_url", "http://localhost:11434")
         )
     
     def generate_assessment(self, image_analysis: Dict[str, Any], query_text: str, 
@@ -30,7 +32,7 @@ class LLMService:
         prompt = self._create_assessment_prompt(context, query_text, image_analysis)
         
         # Query the LLM
-        response = self._query_llm(prompt)
+        response = self._query_llm(prompt, "assessment")
         
         # Parse the response
         parsed_response = self._parse_assessment_response(response)
@@ -55,7 +57,8 @@ class LLMService:
         # Add reference content
         reference_text = "\n\nReference Content:\n"
         for i, ref in enumerate(reference_content):
-            reference_text += f"\n--- Reference {i+1} (Source: {ref['source']}) ---\n{ref['content']}\n"
+            source = f"{ref['source']}, {ref['location']}" if ref.get('location') else ref['source']
+            reference_text += f"\n--- Reference {i+1} (Source: {source}) ---\n{ref['content']}\n"
         
         return analysis_text + reference_text
     
@@ -89,14 +92,18 @@ JSON RESPONSE:
 """
         return prompt
     
-    def _query_llm(self, prompt: str) -> str:
+    def _query_llm(self, prompt: str, purpose: str = "query") -> str:
         """Query the LLM with the given prompt."""
-        try:
-            response = self.llm(prompt)
-            return response
-        except Exception as e:
-            print(f"Error querying LLM: {e}")
-            return """{"overall_assessment": "Unable to analyze the photo due to a technical issue. Please try again.",
+        with span(f"llm.{purpose}", model=self.config["model"]["local_model"],
+                  prompt_tokens=estimate_tokens(prompt)) as llm_span:
+            try:
+                response = self.llm(prompt)
+                llm_span.set(response_tokens=estimate_tokens(response))
+                return response
+            except Exception as e:
+                llm_span.set(error=str(e))
+                print(f"Error querying LLM: {e}")
+                return """{"overall_assessment": "Unable to analyze the photo due to a technical issue. Please try again.",
                     "score": 0,
                     "criteria_scores": {},
                     "suggestions": ["Try uploading the photo again."],
@@ -145,7 +152,7 @@ JSON RESPONSE:
         """
         
         # Query the LLM
-        response = self._query_llm(prompt)
+        response = self._query_llm(prompt, "suggestions")
         
         try:
             # Extract JSON array from response
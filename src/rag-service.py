@@ -1,88 +1,384 @@
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from typing import List, Dict, Any
+import itertools
+import os
+import threading
+from collections import OrderedDict
+from src.retrieval.bm25_index import BM25Index
+from src.retrieval.flat_index import FlatIndex
+from src.retrieval.fusion import reciprocal_rank_fusion
+from src.retrieval.quantized_index import QuantizedIndex
+from src.telemetry import cache_event, span
+from typing import List, Dict, Any, Optional, Tuple
+
+DEFAULT_QUERY = "Evaluate this photo"
+EMBEDDING_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+# Every aspect label _enhance_query can emit, grouped by the analysis metric it
+# comes from. Each group contributes at most one label, in this order.
+ASPECT_GROUPS = [
+    ["dark", "bright"],
+    ["low contrast", "high contrast"],
+    ["poor composition", "good composition"],
+    ["blurry", "sharp"],
+    ["portrait"],
+]
+
+
+def compose_query(query: str, aspects: List[str]) -> str:
+    """Create the enhanced query string from the query and aspect labels."""
+    enhanced_query = query
+    if aspects:
+        enhanced_query += f" The photo is {', '.join(aspects)}."
+
+    return enhanced_query
+
+
+def default_query_variants() -> List[str]:
+    """All enhanced queries that can be produced from the default query."""
+    options = [[None] + group for group in ASPECT_GROUPS]
+    variants = []
+    for combination in itertools.product(*options):
+        aspects = [aspect for aspect in combination if aspect is not None]
+        variants.append(compose_query(DEFAULT_QUERY, aspects))
+    return variants
+
+
+class _LRUCache:
+    """Small thread-safe LRU cache."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
 
 class RAGService:
     """Retrieval Augmented Generation service for photo assessment."""
-    
-    def __init__(self, vector_db_path: str = "data/vectordb"):
-        """Initialize RAG service with vector database path."""
+
+    def __init__(self, vector_db_path: str = "data/vectordb", embedding_cache_size: int = 1024,
+                 precompute_default_queries: bool = True, cache_default_results: bool = False,
+                 backend: str = "chroma", flat_index_path: str = "data/flatindex",
+                 hybrid: bool = False, bm25_index_path: str = "data/bm25index",
+                 rrf_k: int = 60, hybrid_depth: int = 20,
+                 quantization: Optional[str] = None, rerank_oversample: int = 10):
+        """Initialize RAG service with vector database path.
+
+        ``backend`` selects where retrieval happens: ``"chroma"`` queries the
+        Chroma database at ``vector_db_path``; ``"flat"`` scans the
+        memory-mapped index at ``flat_index_path`` exported by
+        ``process_documents``. Setting ``quantization`` to ``"int8"`` or
+        ``"binary"`` makes the flat backend scan compact codes and re-rank the
+        ``k * rerank_oversample`` best candidates with the float rows on disk.
+
+        With ``hybrid`` the vector results are fused with a BM25 lexical search
+        over the index at ``bm25_index_path`` using reciprocal-rank fusion;
+        each side contributes its top ``hybrid_depth`` candidates.
+
+        Query embeddings are kept in an LRU cache keyed by the enhanced query
+        string. With ``precompute_default_queries`` the embeddings for the
+        default query combined with every aspect combination are computed up
+        front; with ``cache_default_results`` the top-k results for those
+        fixed queries are also cached until the vector database changes.
+        """
         self.vector_db_path = vector_db_path
+        # langchain/torch are imported here rather than at module level so that
+        # importing this module (e.g. for DEFAULT_QUERY) stays cheap
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+
+        self.flat_index_path = flat_index_path
         self.embedding_model = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+            model_name=EMBEDDING_MODEL_NAME
         )
-        self.db = None
-    
+        self.backend_name = backend
+        self.backend = None
+        self.quantization = quantization
+        self.rerank_oversample = rerank_oversample
+        self.hybrid = hybrid
+        self.bm25_index_path = bm25_index_path
+        self.rrf_k = rrf_k
+        self.hybrid_depth = hybrid_depth
+        self.lexical_index = None
+        self.cache_default_results = cache_default_results
+        self._default_queries = set(default_query_variants())
+        # Room for all precomputed default queries plus the LRU budget
+        self._embedding_cache = _LRUCache(embedding_cache_size + len(self._default_queries))
+        self._results_cache = {}
+        self._results_signature = None
+        self._results_lock = threading.Lock()
+
+        if precompute_default_queries:
+            self.precompute_default_queries()
+
     def initialize(self):
-        """Initialize the vector database connection."""
-        if self.db is None:
-            try:
-                self.db = Chroma(
-                    persist_directory=self.vector_db_path,
-                    embedding_function=self.embedding_model
-                )
-                print(f"Vector database loaded from {self.vector_db_path}")
-            except Exception as e:
-                print(f"Error loading vector database: {e}")
-                raise
-    
+        """Initialize the retrieval backend."""
+        if self.backend is None:
+            if self.backend_name == "chroma":
+                from src.retrieval.chroma_backend import ChromaBackend
+                backend = ChromaBackend(self.vector_db_path, self.embedding_model)
+            elif self.backend_name == "flat" and self.quantization:
+                backend = QuantizedIndex(self.flat_index_path, self.quantization, self.rerank_oversample)
+            elif self.backend_name == "flat":
+                backend = FlatIndex(self.flat_index_path)
+            else:
+                raise ValueError(f"Unknown retrieval backend: {self.backend_name}")
+            backend.initialize()
+            self.backend = backend
+
+        if self.hybrid and self.lexical_index is None:
+            lexical_index = BM25Index(self.bm25_index_path)
+            lexical_index.initialize()
+            self.lexical_index = lexical_index
+
     def get_relevant_content(self, query: str, image_analysis: Dict[str, Any], k: int = 5) -> List[Dict[str, str]]:
         """Retrieve relevant content from vector database based on query and image analysis."""
         self.initialize()
-        
-        # Create a more detailed query combining user question and image analysis
-        enhanced_query = self._enhance_query(query, image_analysis)
-        
-        # Retrieve documents
-        docs = self.db.similarity_search(enhanced_query, k=k)
-        
-        # Format results
-        results = []
-        for doc in docs:
-            results.append({
-                "content": doc.page_content,
-                "source": doc.metadata.get("source", "Unknown")
-            })
-        
-        return results
-    
+
+        with span("retrieval", k=k, hybrid=self.hybrid) as retrieval_span:
+            # Create a more detailed query combining user question and image analysis
+            enhanced_query = self._enhance_query(query, image_analysis)
+
+            # Serve fixed default queries from the results cache when enabled
+            cacheable = self.cache_default_results and enhanced_query in self._default_queries
+            if cacheable:
+                cached = self._get_cached_results(enhanced_query, k)
+                cache_event("results", cached is not None)
+                if cached is not None:
+                    retrieval_span.set(results=len(cached))
+                    return [dict(result) for result in cached]
+
+            # Retrieve documents
+            query_embedding = self.embed_query(enhanced_query)
+            with span("retrieval.search", backend=type(self.backend).__name__):
+                if self.hybrid:
+                    results = self._hybrid_search(enhanced_query, query_embedding, k)
+                else:
+                    results = self.backend.search(query_embedding, k=k)
+
+            if cacheable:
+                self._put_cached_results(enhanced_query, k, results)
+
+            retrieval_span.set(results=len(results))
+            return results
+
+    def get_relevant_content_batch(self, queries: List[str], image_analyses: List[Dict[str, Any]],
+                                   k: int = 5) -> List[List[Dict[str, str]]]:
+        """Retrieve relevant content for several photos at once.
+
+        Equivalent to calling ``get_relevant_content`` for each (query,
+        analysis) pair, but identical enhanced queries are searched once, all
+        missing query embeddings are computed in one batched forward pass and
+        the backend scores every query in a single search.
+        """
+        if len(queries) != len(image_analyses):
+            raise ValueError(f"Got {len(queries)} queries for {len(image_analyses)} analyses")
+        self.initialize()
+
+        with span("retrieval.batch", k=k, hybrid=self.hybrid, queries=len(queries)) as retrieval_span:
+            enhanced_queries = [
+                self._enhance_query(query, image_analysis) for query, image_analysis in zip(queries, image_analyses)
+            ]
+
+            # Serve fixed default queries from the results cache when enabled
+            results_by_query = {}
+            for enhanced_query in set(enhanced_queries):
+                if self.cache_default_results and enhanced_query in self._default_queries:
+                    cached = self._get_cached_results(enhanced_query, k)
+                    cache_event("results", cached is not None)
+                    if cached is not None:
+                        results_by_query[enhanced_query] = cached
+            pending = [query for query in dict.fromkeys(enhanced_queries) if query not in results_by_query]
+            retrieval_span.set(unique_queries=len(set(enhanced_queries)), searched=len(pending))
+
+            if pending:
+                query_embeddings = self.embed_queries(pending)
+                with span("retrieval.search", backend=type(self.backend).__name__, queries=len(pending)):
+                    if self.hybrid:
+                        vector_results = self.backend.search_batch(query_embeddings, k=max(k, self.hybrid_depth))
+                        known = {}
+                        searched = [
+                            self._hybrid_search(query, embedding, k, vector_results=results, known=known)
+                            for query, embedding, results in zip(pending, query_embeddings, vector_results)
+                        ]
+                    else:
+                        searched = self.backend.search_batch(query_embeddings, k=k)
+                for enhanced_query, results in zip(pending, searched):
+                    results_by_query[enhanced_query] = results
+                    if self.cache_default_results and enhanced_query in self._default_queries:
+                        self._put_cached_results(enhanced_query, k, results)
+
+            # Copies, so callers can't modify results shared between photos
+            return [[dict(result) for result in results_by_query[query]] for query in enhanced_queries]
+
+    def _hybrid_search(self, enhanced_query: str, query_embedding: List[float], k: int,
+                       vector_results: Optional[List[Dict[str, str]]] = None,
+                       known: Optional[Dict[str, Dict[str, str]]] = None) -> List[Dict[str, str]]:
+        """Fuse vector and BM25 rankings with reciprocal-rank fusion.
+
+        ``vector_results`` may hold the vector side already searched in a
+        batch; ``known`` collects lexical-only chunks fetched for earlier
+        queries of the same batch so they are looked up once.
+        """
+        depth = max(k, self.hybrid_depth)
+        if vector_results is None:
+            vector_results = self.backend.search(query_embedding, k=depth)
+        lexical_results = self.lexical_index.search(enhanced_query, k=depth)
+
+        by_id = {}
+        for result in vector_results:
+            by_id.setdefault(result.get("chunk_id") or result["content"], result)
+        fused = reciprocal_rank_fusion(
+            [list(by_id), [chunk_id for chunk_id, _ in lexical_results]],
+            k=self.rrf_k
+        )[:k]
+
+        # Fetch chunks that only the lexical index found
+        known = {} if known is None else known
+        missing = [chunk_id for chunk_id, _ in fused if chunk_id not in by_id and chunk_id not in known]
+        if missing:
+            known.update(self.backend.get_by_ids(missing))
+        for chunk_id, _ in fused:
+            if chunk_id not in by_id and chunk_id in known:
+                by_id[chunk_id] = known[chunk_id]
+
+        return [by_id[chunk_id] for chunk_id, _ in fused if chunk_id in by_id]
+
+    def embed_query(self, enhanced_query: str) -> List[float]:
+        """Embed a query, reusing cached embeddings for repeated query strings."""
+        with span("embedding", chars=len(enhanced_query)):
+            embedding = self._embedding_cache.get(enhanced_query)
+            cache_event("query_embedding", embedding is not None)
+            if embedding is None:
+                embedding = self.embedding_model.embed_query(enhanced_query)
+                self._embedding_cache.put(enhanced_query, embedding)
+            return embedding
+
+    def embed_queries(self, enhanced_queries: List[str]) -> List[List[float]]:
+        """Embed several queries, computing the cache misses in one batched forward pass."""
+        chars = sum(len(query) for query in enhanced_queries)
+        with span("embedding", queries=len(enhanced_queries), chars=chars) as embedding_span:
+            embeddings = [self._embedding_cache.get(query) for query in enhanced_queries]
+            misses = [position for position, embedding in enumerate(embeddings) if embedding is None]
+            for embedding in embeddings:
+                cache_event("query_embedding", embedding is not None)
+            embedding_span.set(misses=len(misses))
+            if misses:
+                computed = self.embedding_model.embed_documents([enhanced_queries[position] for position in misses])
+                for position, embedding in zip(misses, computed):
+                    self._embedding_cache.put(enhanced_queries[position], embedding)
+                    embeddings[position] = embedding
+            return embeddings
+
+    def precompute_default_queries(self) -> int:
+        """Embed the default query for every aspect combination in one batch."""
+        queries = [q for q in default_query_variants() if self._embedding_cache.get(q) is None]
+        if queries:
+            embeddings = self.embedding_model.embed_documents(queries)
+            for query, embedding in zip(queries, embeddings):
+                self._embedding_cache.put(query, embedding)
+        return len(queries)
+
+    def clear_caches(self):
+        """Drop cached query embeddings and results."""
+        self._embedding_cache.clear()
+        with self._results_lock:
+            self._results_cache.clear()
+            self._results_signature = None
+
+    def _get_cached_results(self, enhanced_query: str, k: int) -> Optional[List[Dict[str, str]]]:
+        """Return cached results if the vector database hasn't changed since they were stored."""
+        signature = self._index_signature()
+        with self._results_lock:
+            if signature != self._results_signature:
+                self._results_cache.clear()
+                self._results_signature = signature
+                return None
+            return self._results_cache.get((enhanced_query, k))
+
+    def _put_cached_results(self, enhanced_query: str, k: int, results: List[Dict[str, str]]):
+        """Store results for a fixed query under the current index signature."""
+        signature = self._index_signature()
+        with self._results_lock:
+            if signature != self._results_signature:
+                self._results_cache.clear()
+                self._results_signature = signature
+            self._results_cache[(enhanced_query, k)] = [dict(result) for result in results]
+
+    def _index_signature(self) -> Tuple[int, int]:
+        """Cheap fingerprint of the on-disk index (file count and latest mtime)."""
+        index_paths = [self.flat_index_path if self.backend_name == "flat" else self.vector_db_path]
+        if self.hybrid:
+            index_paths.append(self.bm25_index_path)
+        count, latest = 0, 0
+        for index_path in index_paths:
+            for root, _, files in os.walk(index_path):
+                for name in files:
+                    try:
+                        latest = max(latest, os.stat(os.path.join(root, name)).st_mtime_ns)
+                        count += 1
+                    except OSError:
+                        continue
+        return count, latest
+
     def _enhance_query(self, query: str, image_analysis: Dict[str, Any]) -> str:
         """Enhance the query with image analysis information."""
+        return compose_query(query, self._query_aspects(image_analysis))
+
+    def _query_aspects(self, image_analysis: Dict[str, Any]) -> List[str]:
+        """Determine the aspect labels describing the photo."""
         # Extract key aspects from image analysis
         brightness = image_analysis.get("brightness", 0)
         contrast = image_analysis.get("contrast", 0)
         rule_of_thirds = image_analysis.get("rule_of_thirds", 0)
         sharpness = image_analysis.get("sharpness", 0)
-        
+
         # Determine key aspects of the photo
         aspects = []
-        
+
         if brightness < 80:
             aspects.append("dark")
         elif brightness > 180:
             aspects.append("bright")
-            
+
         if contrast < 0.3:
             aspects.append("low contrast")
         elif contrast > 0.7:
             aspects.append("high contrast")
-            
+
         if rule_of_thirds < 0.3:
             aspects.append("poor composition")
         elif rule_of_thirds > 0.6:
             aspects.append("good composition")
-            
+
         if sharpness < 100:
             aspects.append("blurry")
         elif sharpness > 500:
             aspects.append("sharp")
-            
+
         if image_analysis.get("faces", 0) > 0:
             aspects.append("portrait")
-        
-        # Create enhanced query
-        enhanced_query = query
-        if aspects:
-            enhanced_query += f" The photo is {', '.join(aspects)}."
-        
-        return enhanced_query
+
+        return aspects
@@ -0,0 +1,148 @@
+import json
+import math
+import os
+import re
+import shutil
+import numpy as np
+from collections import Counter
+from typing import List, Iterable, Tuple
+from src.retrieval.flat_index import swap_directory, top_k
+
+TERMS_FILE = "terms.json"
+DOC_IDS_FILE = "doc_ids.json"
+STATS_FILE = "stats.json"
+OFFSETS_FILE = "offsets.npy"
+POSTING_DOCS_FILE = "posting_docs.npy"
+POSTING_TF_FILE = "posting_tf.npy"
+DOC_LENGTHS_FILE = "doc_lengths.npy"
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens used for both indexing and querying."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """Okapi BM25 over an on-disk inverted index with array-backed postings.
+
+    Postings for term ``t`` are ``posting_docs[offsets[t]:offsets[t + 1]]``
+    (document rows, ascending) with matching term frequencies in
+    ``posting_tf``. All arrays are memory-mapped; only the vocabulary and the
+    chunk IDs are loaded into Python objects.
+    """
+
+    def __init__(self, index_path: str, k1: float = 1.2, b: float = 0.75):
+        """Initialize the index from a directory written by ``BM25Index.build``."""
+        self.index_path = index_path
+        self.k1 = k1
+        self.b = b
+        self.term_ids = None
+        self.doc_ids = None
+        self.offsets = None
+        self.posting_docs = None
+        self.posting_tf = None
+        self.doc_lengths = None
+        self.avg_doc_length = 0.0
+
+    def initialize(self):
+        """Load the vocabulary and memory-map the posting arrays."""
+        if self.term_ids is None:
+            with open(os.path.join(self.index_path, TERMS_FILE), 'r') as f:
+                terms = json.load(f)
+            with open(os.path.join(self.index_path, DOC_IDS_FILE), 'r') as f:
+                self.doc_ids = json.load(f)
+            with open(os.path.join(self.index_path, STATS_FILE), 'r') as f:
+                self.avg_doc_length = json.load(f)["avg_doc_length"]
+            self.offsets = self._load(OFFSETS_FILE)
+            self.posting_docs = self._load(POSTING_DOCS_FILE)
+            self.posting_tf = self._load(POSTING_TF_FILE)
+            self.doc_lengths = self._load(DOC_LENGTHS_FILE)
+            self.term_ids = {term: term_id for term_id, term in enumerate(terms)}
+            print(f"BM25 index loaded from {self.index_path} ({len(self.doc_ids)} chunks, {len(terms)} terms)")
+
+    def _load(self, name: str) -> np.ndarray:
+        return np.load(os.path.join(self.index_path, name), mmap_mode="r")
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[str, float]]:
+        """Return (chunk ID, BM25 score) pairs for the k best matching chunks."""
+        self.initialize()
+        n_docs = len(self.doc_ids)
+        if n_docs == 0:
+            return []
+
+        scores = np.zeros(n_docs, dtype=np.float32)
+        length_norm = self.k1 * (1 - self.b + self.b * np.asarray(self.doc_lengths, dtype=np.float32) / max(self.avg_doc_length, 1e-9))
+        for term in set(tokenize(query)):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = int(self.offsets[term_id]), int(self.offsets[term_id + 1])
+            docs = np.asarray(self.posting_docs[start:end])
+            tf = np.asarray(self.posting_tf[start:end], dtype=np.float32)
+            df = end - start
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            # Posting rows are unique per term, so fancy-index accumulation is safe
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + length_norm[docs])
+
+        matched = int(np.count_nonzero(scores))
+        return [(self.doc_ids[row], score) for row, score in top_k(scores, min(k, matched))]
+
+    @classmethod
+    def build(cls, index_path: str, documents: Iterable[Tuple[str, str]]) -> "BM25Index":
+        """Write a new index from (chunk ID, text) pairs."""
+        postings = {}
+        doc_ids, doc_lengths = [], []
+        for row, (chunk_id, text) in enumerate(documents):
+            counts = Counter(tokenize(text))
+            doc_ids.append(chunk_id)
+            doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((row, tf))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        for term_id, term in enumerate(terms):
+            offsets[term_id + 1] = offsets[term_id] + len(postings[term])
+        posting_docs = np.empty(int(offsets[-1]), dtype=np.int32)
+        posting_tf = np.empty(int(offsets[-1]), dtype=np.uint16)
+        for term_id, term in enumerate(terms):
+            start, end = offsets[term_id], offsets[term_id + 1]
+            entries = np.asarray(postings.pop(term), dtype=np.int64).reshape(-1, 2)
+            posting_docs[start:end] = entries[:, 0]
+            posting_tf[start:end] = np.minimum(entries[:, 1], np.iinfo(np.uint16).max)
+
+        tmp_path = index_path.rstrip(os.sep) + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, OFFSETS_FILE), offsets)
+        np.save(os.path.join(tmp_path, POSTING_DOCS_FILE), posting_docs)
+        np.save(os.path.join(tmp_path, POSTING_TF_FILE), posting_tf)
+        np.save(os.path.join(tmp_path, DOC_LENGTHS_FILE), np.asarray(doc_lengths, dtype=np.int32))
+        with open(os.path.join(tmp_path, TERMS_FILE), 'w') as f:
+            json.dump(terms, f, ensure_ascii=False)
+        with open(os.path.join(tmp_path, DOC_IDS_FILE), 'w') as f:
+            json.dump(doc_ids, f)
+        with open(os.path.join(tmp_path, STATS_FILE), 'w') as f:
+            json.dump({
+                "documents": len(doc_ids),
+                "terms": len(terms),
+                "postings": int(offsets[-1]),
+                "avg_doc_length": float(np.mean(doc_lengths)) if doc_lengths else 0.0
+            }, f)
+        swap_directory(tmp_path, index_path)
+        return cls(index_path)
+
+
+def export_chroma_collection(collection, index_path: str, batch_size: int = 1000) -> BM25Index:
+    """Build a BM25 index from the chunks stored in a Chroma collection."""
+    def documents():
+        count = collection.count()
+        for offset in range(0, count, batch_size):
+            batch = collection.get(include=["documents"], limit=batch_size, offset=offset)
+            yield from zip(batch["ids"], batch["documents"])
+
+    index = BM25Index.build(index_path, documents())
+    print(f"BM25 index exported to {index_path}")
+    return index
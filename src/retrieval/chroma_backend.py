@@ -0,0 +1,88 @@
+from langchain_community.vectorstores import Chroma
+from typing import List, Dict, Any, Iterable
+
+
+class ChromaBackend:
+    """Retrieval backend backed by the persisted Chroma vector database."""
+
+    def __init__(self, vector_db_path: str, embedding_model):
+        """Initialize the backend with the database path and embedding function."""
+        self.index_path = vector_db_path
+        self.embedding_model = embedding_model
+        self.db = None
+
+    def initialize(self):
+        """Initialize the vector database connection."""
+        if self.db is None:
+            try:
+                self.db = Chroma(
+                    persist_directory=self.index_path,
+                    embedding_function=self.embedding_model
+                )
+                print(f"Vector database loaded from {self.index_path}")
+            except Exception as e:
+                print(f"Error loading vector database: {e}")
+                raise
+
+    def search(self, query_embedding: Iterable[float], k: int = 5) -> List[Dict[str, Any]]:
+        """Return the k chunks nearest to the query embedding."""
+        self.initialize()
+        docs = self.db.similarity_search_by_vector(list(query_embedding), k=k)
+
+        results = []
+        for doc in docs:
+            result = {
+                "content": doc.page_content,
+                "source": doc.metadata.get("source", "Unknown"),
+                "chunk_id": doc.metadata.get("chunk_id")
+            }
+            if doc.metadata.get("location"):
+                result["location"] = doc.metadata["location"]
+            results.append(result)
+        return results
+
+    def search_batch(self, query_embeddings: Iterable[Iterable[float]], k: int = 5) -> List[List[Dict[str, Any]]]:
+        """Return the k nearest chunks for each query with a single collection query."""
+        self.initialize()
+        query_embeddings = [list(embedding) for embedding in query_embeddings]
+        if not query_embeddings:
+            return []
+        batch = self.db._collection.query(
+            query_embeddings=query_embeddings, n_results=k, include=["documents", "metadatas"]
+        )
+
+        # Chunks shared by several queries are formatted once
+        formatted = {}
+        results = []
+        for ids, contents, metadatas in zip(batch["ids"], batch["documents"], batch["metadatas"]):
+            for chunk_id, content, metadata in zip(ids, contents, metadatas):
+                if chunk_id not in formatted:
+                    metadata = metadata or {}
+                    formatted[chunk_id] = {
+                        "content": content,
+                        "source": metadata.get("source", "Unknown"),
+                        "chunk_id": metadata.get("chunk_id")
+                    }
+                    if metadata.get("location"):
+                        formatted[chunk_id]["location"] = metadata["location"]
+            results.append([dict(formatted[chunk_id]) for chunk_id in ids])
+        return results
+
+    def get_by_ids(self, chunk_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Look up results by chunk ID."""
+        self.initialize()
+        if not chunk_ids:
+            return {}
+        batch = self.db._collection.get(ids=list(chunk_ids), include=["documents", "metadatas"])
+
+        results = {}
+        for chunk_id, content, metadata in zip(batch["ids"], batch["documents"], batch["metadatas"]):
+            metadata = metadata or {}
+            results[chunk_id] = {
+                "content": content,
+                "source": metadata.get("source", "Unknown"),
+                "chunk_id": chunk_id
+            }
+            if metadata.get("location"):
+                results[chunk_id]["location"] = metadata["location"]
+        return results
@@ -0,0 +1,238 @@
+import json
+import os
+import shutil
+import numpy as np
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+VECTORS_FILE = "vectors.npy"
+METADATA_FILE = "metadata.json"
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row of a matrix (zero rows are left as zeros)."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class FlatIndex:
+    """Exact cosine-similarity index over a memory-mapped float16 matrix.
+
+    The index directory holds ``vectors.npy`` (normalized embeddings, one row
+    per chunk) and ``metadata.json`` (chunk ids, contents and sources in row
+    order). The matrix is opened with ``mmap_mode="r"`` so it loads through the
+    page cache and is shared between worker processes.
+    """
+
+    def __init__(self, index_path: str, block_size: int = 65536):
+        """Initialize the index from a directory written by ``FlatIndex.build``."""
+        self.index_path = index_path
+        self.block_size = block_size
+        self.vectors = None
+        self.records = None
+        self.row_by_id = None
+        self.model_name = None
+
+    def initialize(self):
+        """Open the memory-mapped matrix and the metadata sidecar."""
+        if self.vectors is None:
+            with open(os.path.join(self.index_path, METADATA_FILE), 'r') as f:
+                metadata = json.load(f)
+            self.model_name = metadata.get("model")
+            self.records = metadata["records"]
+            self.vectors = np.load(os.path.join(self.index_path, VECTORS_FILE), mmap_mode="r")
+            print(f"Flat index loaded from {self.index_path} ({len(self.records)} chunks)")
+
+    def __len__(self):
+        self.initialize()
+        return len(self.records)
+
+    def search(self, query_embedding: Iterable[float], k: int = 5) -> List[Dict[str, Any]]:
+        """Return the k most similar chunks to the query embedding."""
+        return [self.get(row, score) for row, score in self.search_rows(query_embedding, k)]
+
+    def search_rows(self, query_embedding: Iterable[float], k: int = 5) -> List[Tuple[int, float]]:
+        """Return (row, cosine similarity) pairs for the k nearest rows."""
+        self.initialize()
+        query = normalize_rows(np.asarray(query_embedding, dtype=np.float32))
+        scores = self.scores(query)
+        return top_k(scores, k)
+
+    def search_batch(self, query_embeddings: Iterable[Iterable[float]], k: int = 5) -> List[List[Dict[str, Any]]]:
+        """Return the k most similar chunks for each query; a chunk shared by several queries is formatted once."""
+        formatted = {}
+        results = []
+        for rows in self.search_rows_batch(query_embeddings, k):
+            for row, _ in rows:
+                if row not in formatted:
+                    formatted[row] = self.get(row)
+            results.append([dict(formatted[row], score=score) for row, score in rows])
+        return results
+
+    def search_rows_batch(self, query_embeddings: Iterable[Iterable[float]], k: int = 5) -> List[List[Tuple[int, float]]]:
+        """Return (row, cosine similarity) pairs for the k nearest rows of each query in one scan."""
+        self.initialize()
+        queries = normalize_rows(np.asarray(query_embeddings, dtype=np.float32))
+        if queries.ndim != 2 or len(queries) == 0:
+            return []
+        n = self.vectors.shape[0]
+        scores = np.empty((len(queries), n), dtype=np.float32)
+        # One pass over the matrix scores every query against each block
+        for start in range(0, n, self.block_size):
+            block = np.asarray(self.vectors[start:start + self.block_size], dtype=np.float32)
+            scores[:, start:start + len(block)] = queries @ block.T
+        return top_k_batch(scores, k)
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of a normalized query against every row."""
+        self.initialize()
+        n = self.vectors.shape[0]
+        scores = np.empty(n, dtype=np.float32)
+        # Scan in blocks so only one block is upcast to float32 at a time
+        for start in range(0, n, self.block_size):
+            block = np.asarray(self.vectors[start:start + self.block_size], dtype=np.float32)
+            scores[start:start + len(block)] = block @ query
+        return scores
+
+    def get_by_ids(self, chunk_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Look up results by chunk ID."""
+        self.initialize()
+        if self.row_by_id is None:
+            self.row_by_id = {record.get("id"): row for row, record in enumerate(self.records)}
+        rows = ((chunk_id, self.row_by_id.get(chunk_id)) for chunk_id in chunk_ids)
+        return {chunk_id: self.get(row) for chunk_id, row in rows if row is not None}
+
+    def get(self, row: int, score: Optional[float] = None) -> Dict[str, Any]:
+        """Format a row as a retrieval result."""
+        record = self.records[row]
+        result = {
+            "content": record["content"],
+            "source": record.get("source", "Unknown"),
+            "chunk_id": record.get("id")
+        }
+        if record.get("location"):
+            result["location"] = record["location"]
+        if score is not None:
+            result["score"] = float(score)
+        return result
+
+    @classmethod
+    def build(cls, index_path: str, embeddings: np.ndarray, records: List[Dict[str, Any]],
+              model_name: Optional[str] = None) -> "FlatIndex":
+        """Write a new index from embeddings and matching records."""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if len(embeddings) != len(records):
+            raise ValueError(f"Got {len(embeddings)} embeddings for {len(records)} records")
+        writer = FlatIndexWriter(index_path, len(records), embeddings.shape[1] if len(records) else 0, model_name)
+        writer.add(embeddings, records)
+        writer.close()
+        return cls(index_path)
+
+
+class FlatIndexWriter:
+    """Writes a flat index incrementally into a temporary directory, then swaps it in."""
+
+    def __init__(self, index_path: str, count: int, dim: int, model_name: Optional[str] = None):
+        self.index_path = index_path
+        self.tmp_path = index_path.rstrip(os.sep) + ".tmp"
+        self.count = count
+        self.dim = dim
+        self.model_name = model_name
+        self.records = []
+
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+        os.makedirs(self.tmp_path)
+        self.vectors = np.lib.format.open_memmap(
+            os.path.join(self.tmp_path, VECTORS_FILE), mode="w+", dtype=np.float16, shape=(count, dim)
+        )
+
+    def add(self, embeddings: np.ndarray, records: List[Dict[str, Any]]):
+        """Append a batch of embeddings and their records."""
+        start = len(self.records)
+        if start + len(records) > self.count:
+            raise ValueError(f"Flat index was sized for {self.count} rows")
+        if len(records):
+            self.vectors[start:start + len(records)] = normalize_rows(embeddings).astype(np.float16)
+        self.records.extend(records)
+
+    def close(self):
+        """Flush the matrix, write the metadata and replace any previous index."""
+        if len(self.records) != self.count:
+            raise ValueError(f"Flat index expected {self.count} rows, got {len(self.records)}")
+        self.vectors.flush()
+        del self.vectors
+        with open(os.path.join(self.tmp_path, METADATA_FILE), 'w') as f:
+            json.dump({
+                "model": self.model_name,
+                "dim": self.dim,
+                "count": self.count,
+                "dtype": "float16",
+                "records": self.records
+            }, f, ensure_ascii=False)
+
+        swap_directory(self.tmp_path, self.index_path)
+
+
+def swap_directory(tmp_path: str, index_path: str):
+    """Replace ``index_path`` with the freshly written ``tmp_path`` directory."""
+    old_path = index_path.rstrip(os.sep) + ".old"
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(index_path):
+        os.replace(index_path, old_path)
+    os.replace(tmp_path, index_path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def top_k(scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """Indices and values of the k highest scores, best first."""
+    if k <= 0 or len(scores) == 0:
+        return []
+    k = min(k, len(scores))
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    order = candidates[np.argsort(-scores[candidates], kind="stable")]
+    return [(int(row), float(scores[row])) for row in order]
+
+
+def top_k_batch(scores: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+    """``top_k`` for every row of a (queries, rows) score matrix."""
+    if k <= 0 or scores.shape[1] == 0:
+        return [[] for _ in range(len(scores))]
+    k = min(k, scores.shape[1])
+    candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    rows = np.take_along_axis(candidates, order, axis=1)
+    values = np.take_along_axis(candidate_scores, order, axis=1)
+    return [
+        [(int(row), float(value)) for row, value in zip(query_rows, query_values)]
+        for query_rows, query_values in zip(rows, values)
+    ]
+
+
+def export_chroma_collection(collection, index_path: str, model_name: Optional[str] = None,
+                             batch_size: int = 1000) -> FlatIndex:
+    """Export the embeddings stored in a Chroma collection into a flat index."""
+    count = collection.count()
+    writer = None
+    for offset in range(0, max(count, 1), batch_size):
+        batch = collection.get(include=["embeddings", "documents", "metadatas"], limit=batch_size, offset=offset)
+        if not batch["ids"]:
+            break
+        embeddings = np.asarray(batch["embeddings"], dtype=np.float32)
+        if writer is None:
+            writer = FlatIndexWriter(index_path, count, embeddings.shape[1], model_name)
+        records = []
+        for chunk_id, content, metadata in zip(batch["ids"], batch["documents"], batch["metadatas"]):
+            metadata = metadata or {}
+            record = {"id": chunk_id, "content": content, "source": metadata.get("source", "Unknown")}
+            if metadata.get("location"):
+                record["location"] = metadata["location"]
+            records.append(record)
+        writer.add(embeddings, records)
+
+    if writer is None:
+        writer = FlatIndexWriter(index_path, 0, 0, model_name)
+    writer.close()
+    print(f"Flat index exported to {index_path} ({count} chunks)")
+    return FlatIndex(index_path)
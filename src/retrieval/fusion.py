@@ -0,0 +1,17 @@
+from typing import List, Hashable, Optional, Tuple
+
+
+def reciprocal_rank_fusion(rankings: List[List[Hashable]], k: int = 60,
+                           weights: Optional[List[float]] = None) -> List[Tuple[Hashable, float]]:
+    """Fuse ranked lists with reciprocal-rank fusion.
+
+    Each item scores ``sum(weight / (k + rank))`` over the lists it appears in
+    (rank starts at 1). Returns (item, score) pairs, best first; ties keep the
+    order in which items were first seen.
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + weight / (k + rank)
+    return sorted(scores.items(), key=lambda pair: pair[1], reverse=True)
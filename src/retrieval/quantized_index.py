@@ -0,0 +1,139 @@
+import json
+import os
+import numpy as np
+from typing import List, Iterable, Tuple
+from src.retrieval.flat_index import VECTORS_FILE, FlatIndex, normalize_rows, top_k
+
+QUANTIZATION_FILE = "quantization.json"
+CODES_FILES = {
+    "int8": "codes_int8.npy",
+    "binary": "codes_binary.npy",
+}
+
+# Number of set bits in every byte value, for Hamming distances on packed codes
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+class QuantizedIndex(FlatIndex):
+    """Flat index that scans compact codes and re-ranks a candidate set exactly.
+
+    ``int8`` keeps one signed byte per dimension (4x smaller than float32)
+    and scores candidates with integer dot products; ``binary`` keeps one bit
+    per dimension (32x smaller) and scores by Hamming distance. Only the codes
+    are held in memory: the ``k * oversample`` best candidates are re-ranked
+    with the float16 rows read from the memory-mapped matrix on disk.
+    """
+
+    def __init__(self, index_path: str, mode: str = "int8", oversample: int = 10, block_size: int = 65536):
+        """Initialize the index from a flat index directory with quantized codes."""
+        super().__init__(index_path, block_size=block_size)
+        if mode not in CODES_FILES:
+            raise ValueError(f"Unknown quantization mode: {mode}")
+        self.mode = mode
+        self.oversample = oversample
+        self.codes = None
+        self.scale = None
+
+    def initialize(self):
+        """Open the flat index and load the codes into memory."""
+        super().initialize()
+        if self.codes is None:
+            self.codes = np.load(os.path.join(self.index_path, CODES_FILES[self.mode]))
+            if self.mode == "int8":
+                with open(os.path.join(self.index_path, QUANTIZATION_FILE), 'r') as f:
+                    self.scale = np.asarray(json.load(f)["int8_scale"], dtype=np.float32)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes of codes held in memory for the candidate scan."""
+        self.initialize()
+        return int(self.codes.nbytes)
+
+    def search_rows(self, query_embedding: Iterable[float], k: int = 5) -> List[Tuple[int, float]]:
+        """Return (row, cosine similarity) pairs for the k nearest rows."""
+        self.initialize()
+        query = normalize_rows(np.asarray(query_embedding, dtype=np.float32))
+        candidates = [row for row, _ in top_k(self.approximate_scores(query), k * self.oversample)]
+        if not candidates:
+            return []
+
+        # Exact re-ranking of the candidates against the stored float rows
+        rows = np.sort(np.asarray(candidates))
+        exact = np.asarray(self.vectors[rows], dtype=np.float32) @ query
+        return [(int(rows[i]), score) for i, score in top_k(exact, k)]
+
+    def search_rows_batch(self, query_embeddings: Iterable[Iterable[float]], k: int = 5) -> List[List[Tuple[int, float]]]:
+        """Return (row, cosine similarity) pairs for the k nearest rows of each query."""
+        # Each query needs its own candidate set for the exact re-ranking
+        return [self.search_rows(query_embedding, k) for query_embedding in query_embeddings]
+
+    def approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        """Scores from the codes alone (higher is better)."""
+        n = self.codes.shape[0]
+        scores = np.empty(n, dtype=np.float32)
+        if self.mode == "int8":
+            query_code = quantize_query_int8(query, self.scale).astype(np.int32)
+            for start in range(0, n, self.block_size):
+                block = self.codes[start:start + self.block_size].astype(np.int32)
+                scores[start:start + len(block)] = block @ query_code
+        else:
+            query_bits = np.packbits(query > 0)
+            for start in range(0, n, self.block_size):
+                block = self.codes[start:start + self.block_size]
+                distances = POPCOUNT[np.bitwise_xor(block, query_bits)].sum(axis=1, dtype=np.int32)
+                scores[start:start + len(block)] = -distances
+        return scores
+
+    @staticmethod
+    def build_codes(index_path: str, modes: Iterable[str] = ("int8", "binary"), block_size: int = 65536):
+        """Write quantized codes for an existing flat index.
+
+        Every file is written to a ``.tmp`` path first and swapped in once all
+        of them are complete, so an interrupted build never leaves truncated
+        codes behind.
+        """
+        vectors = np.load(os.path.join(index_path, VECTORS_FILE), mmap_mode="r")
+        n, dim = vectors.shape
+        modes = list(modes)
+        for mode in modes:
+            if mode not in CODES_FILES:
+                raise ValueError(f"Unknown quantization mode: {mode}")
+
+        # Symmetric per-dimension int8 scale from the largest magnitude seen
+        max_abs = np.zeros(dim, dtype=np.float32)
+        for start in range(0, n, block_size):
+            block = np.abs(np.asarray(vectors[start:start + block_size], dtype=np.float32))
+            max_abs = np.maximum(max_abs, block.max(axis=0))
+        scale = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+
+        written = []
+        for mode in modes:
+            path = os.path.join(index_path, CODES_FILES[mode])
+            width = dim if mode == "int8" else (dim + 7) // 8
+            dtype = np.int8 if mode == "int8" else np.uint8
+            codes = np.lib.format.open_memmap(path + ".tmp", mode="w+", dtype=dtype, shape=(n, width))
+            for start in range(0, n, block_size):
+                block = np.asarray(vectors[start:start + block_size], dtype=np.float32)
+                if mode == "int8":
+                    codes[start:start + len(block)] = np.clip(np.rint(block / scale), -127, 127)
+                else:
+                    codes[start:start + len(block)] = np.packbits(block > 0, axis=1)
+            codes.flush()
+            del codes
+            written.append(path)
+
+        quantization_path = os.path.join(index_path, QUANTIZATION_FILE)
+        with open(quantization_path + ".tmp", 'w') as f:
+            json.dump({"modes": modes, "int8_scale": scale.tolist()}, f)
+        written.append(quantization_path)
+        for path in written:
+            os.replace(path + ".tmp", path)
+        print(f"Quantized codes ({', '.join(modes)}) written to {index_path}")
+
+def quantize_query_int8(query: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """Quantize a query so that ``codes @ query_code`` ranks like the float dot product."""
+    weighted = query * scale
+    max_abs = float(np.abs(weighted).max())
+    if max_abs == 0:
+        return np.zeros_like(weighted, dtype=np.int8)
+    return np.clip(np.rint(weighted / max_abs * 127), -127, 127).astype(np.int8)
@@ -0,0 +1,225 @@
+import importlib
+import os
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class _Service:
+    """Registration and load state of one service."""
+
+    def __init__(self, name: str, imports: List[Tuple[str, str]], factory: Callable,
+                 priority: int, depends_on: List[str]):
+        self.name = name
+        self.imports = imports
+        self.factory = factory
+        self.priority = priority
+        self.depends_on = depends_on
+        self.state = PENDING
+        self.instance = None
+        self.error = None
+        self.import_seconds = 0.0
+        self.load_seconds = 0.0
+        self.done = threading.Event()
+
+
+class ServiceContainer:
+    """Loads services lazily on background threads and tracks their readiness.
+
+    Each service declares the modules it needs as ``(module, attribute)``
+    pairs; they are imported only when the service loads, so importing the
+    container (and rendering the page) never pulls in torch, transformers or
+    langchain. ``start()`` loads services in priority order on worker threads;
+    ``get()`` blocks until a service is ready, loading it on the calling thread
+    if no worker has picked it up yet.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        """Initialize an empty container."""
+        self.max_workers = max_workers
+        self._services = {}
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def register(self, name: str, factory: Callable, imports: Optional[List[Tuple[str, str]]] = None,
+                 priority: int = 100, depends_on: Optional[List[str]] = None):
+        """Register a service.
+
+        ``factory`` is called with the imported attributes (in ``imports``
+        order) followed by the instances of ``depends_on`` services.
+        """
+        self._services[name] = _Service(name, imports or [], factory, priority, depends_on or [])
+
+    def start(self):
+        """Start loading every pending service on background threads."""
+        queue = sorted(self._services.values(), key=lambda service: service.priority)
+        queue_lock = threading.Lock()
+
+        def worker():
+            while True:
+                with queue_lock:
+                    if not queue:
+                        return
+                    service = queue.pop(0)
+                self._load(service)
+
+        for i in range(min(self.max_workers, len(queue))):
+            thread = threading.Thread(target=worker, name=f"service-loader-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def get(self, name: str, timeout: Optional[float] = None) -> Any:
+        """Return a ready service, waiting for (or performing) its load."""
+        service = self._services[name]
+        self._load(service)
+        if not service.done.wait(timeout):
+            raise TimeoutError(f"Service {name} is still loading")
+        if service.state == FAILED:
+            raise RuntimeError(f"Service {name} failed to load: {service.error}")
+        return service.instance
+
+    def __getitem__(self, name: str) -> Any:
+        return self.get(name)
+
+    def state(self, name: str) -> str:
+        """Readiness state of a service."""
+        return self._services[name].state
+
+    def is_ready(self, *names: str) -> bool:
+        """Whether all the given services (or every service) are ready."""
+        names = names or tuple(self._services)
+        return all(self._services[name].state == READY for name in names)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Per-service state, timings and error."""
+        return {
+            name: {
+                "state": service.state,
+                "import_seconds": service.import_seconds,
+                "load_seconds": service.load_seconds,
+                "error": service.error,
+            }
+            for name, service in sorted(self._services.items(), key=lambda item: item[1].priority)
+        }
+
+    def profile_report(self) -> str:
+        """Import-time and load-time table for all services."""
+        lines = [f"{'service':<16} {'state':<8} {'import_s':>9} {'load_s':>9}"]
+        for name, status in self.status().items():
+            lines.append(f"{name:<16} {status['state']:<8} {status['import_seconds']:>9.2f} {status['load_seconds']:>9.2f}")
+        return "\n".join(lines)
+
+    def _load(self, service: _Service):
+        """Load a service unless another thread already claimed it."""
+        with self._lock:
+            if service.state != PENDING:
+                return
+            service.state = LOADING
+
+        try:
+            start = time.perf_counter()
+            attributes = []
+            for module_name, attribute in service.imports:
+                module = importlib.import_module(module_name)
+                attributes.append(getattr(module, attribute) if attribute else module)
+            service.import_seconds = time.perf_counter() - start
+
+            dependencies = [self.get(dependency) for dependency in service.depends_on]
+
+            start = time.perf_counter()
+            service.instance = service.factory(*attributes, *dependencies)
+            service.load_seconds = time.perf_counter() - start
+            service.state = READY
+            print(f"Service {service.name} ready (import {service.import_seconds:.2f}s, load {service.load_seconds:.2f}s)")
+        except Exception as e:
+            service.error = str(e)
+            service.state = FAILED
+            print(f"Error loading service {service.name}: {e}")
+            traceback.print_exc()
+        finally:
+            service.done.set()
+
+
+def index_paths(config: Dict[str, Any]) -> List[str]:
+    """Index directories the configured retrieval setup reads from."""
+    retrieval_config = config.get("retrieval", {})
+    paths = [config.get("vector_db_path", "data/vectordb")]
+    if retrieval_config.get("backend", "chroma") == "flat":
+        paths = [retrieval_config.get("flat_index_path", "data/flatindex")]
+    if retrieval_config.get("hybrid", False):
+        paths.append(retrieval_config.get("bm25_index_path", "data/bm25index"))
+    return paths
+
+
+def create_rag_service(RAGService, config: Dict[str, Any]):
+    """Build a RAGService from the configuration."""
+    retrieval_config = config.get("retrieval", {})
+    return RAGService(
+        config.get("vector_db_path", "data/vectordb"),
+        backend=retrieval_config.get("backend", "chroma"),
+        flat_index_path=retrieval_config.get("flat_index_path", "data/flatindex"),
+        hybrid=retrieval_config.get("hybrid", False),
+        bm25_index_path=retrieval_config.get("bm25_index_path", "data/bm25index"),
+        rrf_k=retrieval_config.get("rrf_k", 60),
+        hybrid_depth=retrieval_config.get("hybrid_depth", 20),
+        quantization=retrieval_config.get("quantization"),
+        rerank_oversample=retrieval_config.get("rerank_oversample", 10)
+    )
+
+
+def default_container(config: Dict[str, Any], config_path: str = "config.json") -> ServiceContainer:
+    """Container with the photo assessment services, in warm-up priority order."""
+    container = ServiceContainer(max_workers=config.get("startup", {}).get("loader_threads", 2))
+
+    def ensure_documents(process_documents):
+        # Pick up new or changed sources incrementally; the RAG service waits for
+        # this. Unchanged sources are detected from the manifest without loading
+        # the embedding model.
+        refresh_remote = config.get("ingestion", {}).get("refresh_remote_on_startup", False)
+        if not all(os.path.exists(path) for path in index_paths(config)):
+            refresh_remote = True
+        process_documents(config_path, refresh_remote=refresh_remote)
+        return True
+
+    def load_rag_service(RAGService, documents_ready):
+        rag_service = create_rag_service(RAGService, config)
+        rag_service.initialize()
+        return rag_service
+
+    def load_translator(Translator):
+        translator = Translator(config["translation"]["model"])
+        translator.initialize()
+        translator.initialize_english()
+        return translator
+
+    container.register(
+        "image_analyzer", lambda ImageAnalyzer: ImageAnalyzer(),
+        imports=[("src.image_analysis.image_analyzer", "ImageAnalyzer")], priority=10
+    )
+    container.register(
+        "image_enhancer", lambda ImageEnhancer: ImageEnhancer(),
+        imports=[("src.enhancement.image_enhancer", "ImageEnhancer")], priority=20
+    )
+    container.register(
+        "llm_service", lambda LLMService: LLMService(config_path),
+        imports=[("src.llm_service", "LLMService")], priority=30
+    )
+    container.register(
+        "documents", ensure_documents,
+        imports=[("src.document_processing.process_documents", "process_documents")], priority=40
+    )
+    container.register(
+        "rag_service", load_rag_service,
+        imports=[("src.rag_service", "RAGService")], priority=50, depends_on=["documents"]
+    )
+    container.register(
+        "translator", load_translator,
+        imports=[("src.translation.translator", "Translator")], priority=60
+    )
+    return container
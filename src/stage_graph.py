@@ -0,0 +1,260 @@
+import contextvars
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from src.telemetry import count, span
+
+
+class Stage:
+    """A named step of a stage graph.
+
+    ``func`` is called with the values named in ``inputs`` (in order) and its
+    return value is stored under the stage's name for dependent stages.
+    """
+
+    def __init__(self, name: str, func: Callable, inputs: Optional[List[str]] = None):
+        self.name = name
+        self.func = func
+        self.inputs = inputs or []
+
+
+class StageError(RuntimeError):
+    """Raised when a stage of a graph run fails."""
+
+    def __init__(self, stage: str, error: Exception):
+        super().__init__(f"Stage {stage} failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+def fingerprint(value: Any) -> Optional[str]:
+    """Content hash of a JSON-serializable value, None for anything else (arrays, images...)."""
+    try:
+        data = json.dumps(value, sort_keys=True)
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory held by a stage value, in bytes."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(estimate_size(key) + estimate_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(item) for item in value)
+    if hasattr(value, "getbands") and hasattr(value, "size"):
+        # PIL image
+        width, height = value.size
+        return width * height * len(value.getbands())
+    return 64
+
+
+class StageMemo:
+    """Bounded LRU store of stage results for ``StageGraph.run``.
+
+    Entries are keyed by the stage name and the fingerprints of its inputs, so
+    a stage is only recomputed when something it depends on changed. The least
+    recently used results are evicted beyond ``max_entries`` or ``max_bytes``.
+    The store is not thread-safe; ``run`` only touches it from the calling
+    thread.
+    """
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Any:
+        self._entries.move_to_end(key)
+        return self._entries[key][0]
+
+    def put(self, key: str, value: Any):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self.bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (value, size)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+
+class GraphRun:
+    """Values and per-stage timings of one graph run."""
+
+    def __init__(self, values: Dict[str, Any]):
+        self.values = values
+        self.started = time.perf_counter()
+        self.finished = None
+        self.timings = {}
+        self.cached = set()
+
+    def __getitem__(self, name: str) -> Any:
+        return self.values[name]
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def stage_seconds(self) -> Dict[str, float]:
+        """Wall time of every completed stage."""
+        return {name: end - start for name, (start, end) in self.timings.items()}
+
+    def critical_path(self, graph: "StageGraph") -> List[str]:
+        """Chain of dependencies that finished last, from the first stage to the last."""
+        if not self.timings:
+            return []
+        path = [max(self.timings, key=lambda name: self.timings[name][1])]
+        while True:
+            upstream = [name for name in graph.stages[path[-1]].inputs if name in self.timings]
+            if not upstream:
+                return list(reversed(path))
+            path.append(max(upstream, key=lambda name: self.timings[name][1]))
+
+
+class StageGraph:
+    """Runs stages as soon as their inputs are available.
+
+    Stages whose dependencies are satisfied run concurrently on a shared
+    executor. The calling thread only schedules work and receives completion
+    events, so ``on_stage_done`` callbacks (e.g. Streamlit widgets) always run
+    in the caller's thread.
+    """
+
+    def __init__(self, stages: List[Stage]):
+        """Initialize the graph; stages are scheduled in list order when several are ready."""
+        self.stages = {stage.name: stage for stage in stages}
+        self._order = [stage.name for stage in stages]
+
+    def validate(self, provided: List[str]):
+        """Raise if a stage input is neither provided nor produced by another stage."""
+        available = set(provided) | set(self.stages)
+        for stage in self.stages.values():
+            missing = [name for name in stage.inputs if name not in available]
+            if missing:
+                raise ValueError(f"Stage {stage.name} needs unknown inputs: {missing}")
+
+    def run(self, inputs: Dict[str, Any], executor: Optional[Executor] = None,
+            on_stage_done: Optional[Callable[[str, GraphRun], None]] = None,
+            memo: Optional[StageMemo] = None, input_keys: Optional[Dict[str, str]] = None) -> GraphRun:
+        """Run every stage and return the run with all stage values.
+
+        ``on_stage_done(stage_name, run)`` is called in the calling thread as
+        each stage completes. The first failing stage cancels the stages that
+        have not started and raises ``StageError``.
+
+        With a ``memo``, stages whose inputs match an earlier run are taken
+        from it instead of running again (their names end up in
+        ``run.cached``). Inputs are identified by ``input_keys`` (e.g. the
+        content hash of an uploaded image) or by their JSON fingerprint;
+        stages depending on an input with neither always run.
+
+        Stage names may also be passed in ``inputs`` to supply their values
+        (e.g. results reused from an earlier assessment); those stages do not
+        run.
+        """
+        self.validate(list(inputs))
+        own_executor = executor is None
+        if own_executor:
+            executor = ThreadPoolExecutor(max_workers=len(self.stages) or 1)
+
+        run = GraphRun(dict(inputs))
+        keys = None
+        if memo is not None:
+            keys = {name: (input_keys or {}).get(name) or fingerprint(value) for name, value in inputs.items()}
+        remaining = [name for name in self._order if name not in inputs]
+        running = {}
+        try:
+            while remaining or running:
+                ready = self._ready(remaining, run)
+                while ready:
+                    for name in ready:
+                        remaining.remove(name)
+                        stage = self.stages[name]
+                        key = self._stage_key(stage, keys) if memo is not None else None
+                        if key is not None and key in memo:
+                            count("stage_memo_total", stage=name, result="hit")
+                            now = time.perf_counter() - run.started
+                            self._finish(run, name, memo.get(key), (now, now), key, keys, on_stage_done)
+                            run.cached.add(name)
+                            continue
+                        if memo is not None:
+                            count("stage_memo_total", stage=name, result="miss")
+                        args = [run.values[dep] for dep in stage.inputs]
+                        # Stages run in the caller's context so their spans join the current trace
+                        context = contextvars.copy_context()
+                        running[executor.submit(context.run, self._timed, name, stage.func, args)] = (name, key)
+                    # Memoized stages may have made more stages ready
+                    ready = self._ready(remaining, run)
+                if not running:
+                    if remaining:
+                        raise ValueError(f"Stages {remaining} can never run: their dependencies form a cycle")
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, key = running.pop(future)
+                    try:
+                        value, start, end = future.result()
+                    except Exception as e:
+                        raise StageError(name, e) from e
+                    if key is not None:
+                        memo.put(key, value)
+                    self._finish(run, name, value, (start - run.started, end - run.started), key, keys, on_stage_done)
+        finally:
+            for future in running:
+                future.cancel()
+            if own_executor:
+                executor.shutdown(wait=False)
+        run.finished = time.perf_counter()
+        return run
+
+    def _ready(self, remaining: List[str], run: GraphRun) -> List[str]:
+        return [name for name in remaining if all(dep in run.values for dep in self.stages[name].inputs)]
+
+    @staticmethod
+    def _stage_key(stage: Stage, keys: Dict[str, Optional[str]]) -> Optional[str]:
+        input_keys = [keys.get(dep) for dep in stage.inputs]
+        if any(key is None for key in input_keys):
+            return None
+        return hashlib.sha256(json.dumps([stage.name] + input_keys).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _finish(run: GraphRun, name: str, value: Any, timing, key: Optional[str],
+                keys: Optional[Dict[str, Optional[str]]], on_stage_done):
+        run.values[name] = value
+        run.timings[name] = timing
+        # Dependents are keyed by the value itself when it can be hashed, so an
+        # unchanged result (e.g. the same suggestions) keeps them memoized
+        if keys is not None:
+            keys[name] = fingerprint(value) or key
+        if on_stage_done is not None:
+            on_stage_done(name, run)
+
+    @staticmethod
+    def _timed(name: str, func: Callable, args: List[Any]):
+        start = time.perf_counter()
+        with span(f"stage.{name}"):
+            value = func(*args)
+        return value, start, time.perf_counter()
@@ -0,0 +1,284 @@
+import bisect
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Latency histogram buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+class Span:
+    """A timed operation with attributes, nested under the span that was active when it started."""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_time = time.time()
+        self.duration = 0.0
+        self.error = None
+
+    def set(self, **attributes):
+        """Add or update attributes (sizes, token counts, cache hits...)."""
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        record = {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_time,
+            "duration_ms": self.duration * 1000,
+            "attributes": self.attributes,
+        }
+        if self.error:
+            record["error"] = self.error
+        return record
+
+
+class Trace:
+    """Spans recorded for one request, for display in the UI."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def breakdown(self) -> List[Dict[str, Any]]:
+        """Finished spans in start order with their depth in the span tree."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start_time)
+        depth = {}
+        rows = []
+        for span in spans:
+            depth[span.span_id] = depth.get(span.parent_id, -1) + 1
+            row = {"span": span.name, "depth": depth[span.span_id], "ms": span.duration * 1000}
+            row.update(span.attributes)
+            rows.append(row)
+        return rows
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in Prometheus form."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Latency histograms and counters rendered in the Prometheus text format."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float, error: bool = False):
+        """Record a span duration."""
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram(self.buckets)
+            self.histograms[name].observe(seconds)
+            if error:
+                self._increment(("span_errors_total", (("span", name),)), 1)
+
+    def increment(self, name: str, value: float = 1, **labels):
+        """Add to a counter."""
+        with self._lock:
+            self._increment((name, tuple(sorted(labels.items()))), value)
+
+    def _increment(self, key, value):
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP ragfoto_span_duration_seconds Duration of instrumented operations.",
+            "# TYPE ragfoto_span_duration_seconds histogram",
+        ]
+        with self._lock:
+            for name, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'ragfoto_span_duration_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'ragfoto_span_duration_seconds_bucket{{span="{name}",le="+Inf"}} {histogram.count}')
+                lines.append(f'ragfoto_span_duration_seconds_sum{{span="{name}"}} {histogram.total}')
+                lines.append(f'ragfoto_span_duration_seconds_count{{span="{name}"}} {histogram.count}')
+            counter_names = sorted({name for name, _ in self.counters})
+            for counter_name in counter_names:
+                lines.append(f"# TYPE ragfoto_{counter_name} counter")
+                for (name, labels), value in sorted(self.counters.items()):
+                    if name == counter_name:
+                        label_text = ",".join(f'{key}="{label}"' for key, label in labels)
+                        lines.append(f"ragfoto_{name}{{{label_text}}} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """Write the metrics atomically, e.g. for a node_exporter textfile collector."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path + ".tmp", 'w') as f:
+            f.write(self.render())
+        os.replace(path + ".tmp", path)
+
+
+class Telemetry:
+    """Span recording with a rotating JSONL trace file and Prometheus metrics."""
+
+    def __init__(self):
+        self.metrics = MetricsRegistry()
+        self.metrics_path = None
+        self._trace_logger = None
+        self._server = None
+
+    def configure(self, config: Dict[str, Any]):
+        """Set up the sinks from the ``telemetry`` configuration section."""
+        if not config.get("enabled", True):
+            return
+        trace_path = config.get("trace_path")
+        if trace_path and self._trace_logger is None:
+            directory = os.path.dirname(trace_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handler = RotatingFileHandler(
+                trace_path,
+                maxBytes=config.get("trace_max_bytes", 10 * 1024 * 1024),
+                backupCount=config.get("trace_backups", 5)
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger = logging.getLogger("ragfoto.traces")
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            logger.addHandler(handler)
+            self._trace_logger = logger
+        self.metrics_path = config.get("metrics_path")
+        if config.get("metrics_port") and self._server is None:
+            self._server = serve_metrics(self.metrics, config["metrics_port"])
+
+    def finish(self, span: Span):
+        self.metrics.observe(span.name, span.duration, error=span.error is not None)
+        if self._trace_logger is not None:
+            self._trace_logger.info(json.dumps(span.to_dict(), default=str))
+
+    def flush(self):
+        """Write the metrics file, if one is configured."""
+        if self.metrics_path:
+            try:
+                self.metrics.write(self.metrics_path)
+            except OSError as e:
+                print(f"Error writing metrics: {e}")
+
+
+telemetry = Telemetry()
+
+
+def configure(config: Dict[str, Any]):
+    """Configure the process-wide telemetry sinks."""
+    telemetry.configure(config)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """Time a block as a span nested under the current one."""
+    parent = _current_span.get()
+    trace = _current_trace.get()
+    trace_id = parent.trace_id if parent else (trace.trace_id if trace else uuid.uuid4().hex)
+    current = Span(name, trace_id, parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except Exception as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.duration = time.perf_counter() - start
+        _current_span.reset(token)
+        if trace is not None:
+            trace.add(current)
+        telemetry.finish(current)
+
+
+@contextmanager
+def trace(name: str, **attributes) -> Iterator[Trace]:
+    """Collect every span of a request under a root span; metrics are flushed at the end."""
+    collected = Trace(name)
+    token = _current_trace.set(collected)
+    try:
+        with span(name, **attributes):
+            yield collected
+    finally:
+        _current_trace.reset(token)
+        telemetry.flush()
+
+
+def count(name: str, value: float = 1, **labels):
+    """Increment a counter (e.g. ``count("cache_events_total", cache="embedding", result="hit")``)."""
+    telemetry.metrics.increment(name, value, **labels)
+
+
+def cache_event(cache: str, hit: bool):
+    """Count a cache hit or miss and tag the current span with it."""
+    count("cache_events_total", cache=cache, result="hit" if hit else "miss")
+    current = _current_span.get()
+    if current is not None:
+        current.set(**{f"{cache}_cache_hit": hit})
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for LLM prompts and responses (about 4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def serve_metrics(metrics: MetricsRegistry, port: int) -> ThreadingHTTPServer:
+    """Serve ``/metrics`` on a background thread."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = metrics.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"Metrics served on port {port}")
+    return server
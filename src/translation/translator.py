@@ -1,5 +1,7 @@
+import threading
 from transformers import MarianMTModel, MarianTokenizer
 import torch
+from src.telemetry import span
 
 class Translator:
     """Translates text between English and Brazilian Portuguese."""
@@ -10,13 +12,25 @@ class Translator:
         self.tokenizer = None
         self.model = None
         self.initialized = False
+        self.pt_en_model_name = "Helsinki-NLP/opus-mt-pt-en"
+        self.pt_en_tokenizer = None
+        self.pt_en_model = None
+        self._lock = threading.Lock()
     
     def initialize(self):
         """Load model and tokenizer if not already loaded."""
-        if not self.initialized:
-            self.tokenizer = MarianTokenizer.from_pretrained(self.model_name)
-            self.model = MarianMTModel.from_pretrained(self.model_name)
-            self.initialized = True
+        with self._lock:
+            if not self.initialized:
+                self.tokenizer = MarianTokenizer.from_pretrained(self.model_name)
+                self.model = MarianMTModel.from_pretrained(self.model_name)
+                self.initialized = True
+    
+    def initialize_english(self):
+        """Load the Portuguese to English model and tokenizer if not already loaded."""
+        with self._lock:
+            if self.pt_en_model is None:
+                self.pt_en_tokenizer = MarianTokenizer.from_pretrained(self.pt_en_model_name)
+                self.pt_en_model = MarianMTModel.from_pretrained(self.pt_en_model_name)
     
     def translate_to_portuguese(self, text):
         """Translate English text to Brazilian Portuguese."""
@@ -26,56 +40,47 @@ class Translator:
         if not text:
             return ""
         
-        # Split text into manageable chunks if too long
-        max_length = 512
-        chunks = self._split_text(text, max_length)
-        translated_chunks = []
-        
-        for chunk in chunks:
-            inputs = self.tokenizer(chunk, return_tensors="pt", padding=True, truncation=True, max_length=max_length)
-            
-            # Generate translation
-            with torch.no_grad():
-                translated = self.model.generate(**inputs)
-            
-            # Decode the translation
-            translated_text = self.tokenizer.batch_decode(translated, skip_special_tokens=True)[0]
-            translated_chunks.append(translated_text)
-        
-        # Join the chunks back together
-        return " ".join(translated_chunks)
+        return self._translate(text, self.tokenizer, self.model, "translation.en_pt")
     
     def translate_to_english(self, text):
         """Translate Brazilian Portuguese text to English."""
         # For Portuguese to English, we need a different model
-        pt_en_model_name = "Helsinki-NLP/opus-mt-pt-en"
-        
-        # Use a temporary tokenizer and model
-        temp_tokenizer = MarianTokenizer.from_pretrained(pt_en_model_name)
-        temp_model = MarianMTModel.from_pretrained(pt_en_model_name)
+        self.initialize_english()
+        tokenizer = self.pt_en_tokenizer
+        model = self.pt_en_model
         
         # Handle empty text
         if not text:
             return ""
         
-        # Split text into manageable chunks if too long
-        max_length = 512
-        chunks = self._split_text(text, max_length)
-        translated_chunks = []
-        
-        for chunk in chunks:
-            inputs = temp_tokenizer(chunk, return_tensors="pt", padding=True, truncation=True, max_length=max_length)
+        return self._translate(text, tokenizer, model, "translation.pt_en")
+    
+    def _translate(self, text, tokenizer, model, span_name):
+        """Translate text chunk by chunk with the given model."""
+        with span(span_name, chars=len(text)) as translation_span:
+            # Split text into manageable chunks if too long
+            max_length = 512
+            chunks = self._split_text(text, max_length)
+            translated_chunks = []
+            input_tokens = output_tokens = 0
             
-            # Generate translation
-            with torch.no_grad():
-                translated = temp_model.generate(**inputs)
+            for chunk in chunks:
+                inputs = tokenizer(chunk, return_tensors="pt", padding=True, truncation=True, max_length=max_length)
+                input_tokens += int(inputs["input_ids"].shape[1])
+                
+                # Generate translation
+                with torch.no_grad():
+                    translated = model.generate(**inputs)
+                output_tokens += int(translated.shape[1])
+                
+                # Decode the translation
+                translated_text = tokenizer.batch_decode(translated, skip_special_tokens=True)[0]
+                translated_chunks.append(translated_text)
             
-            # Decode the translation
-            translated_text = temp_tokenizer.batch_decode(translated, skip_special_tokens=True)[0]
-            translated_chunks.append(translated_text)
-        
-        # Join the chunks back together
-        return " ".join(translated_chunks)
+            translation_span.set(chunks=len(chunks), input_tokens=input_tokens, output_tokens=output_tokens)
+            
+            # Join the chunks back together
+            return " ".join(translated_chunks)
     
     def _split_text(self, text, max_length):
         """Split text into chunks that won't exceed token limits."""
@@ -0,0 +1,121 @@
+"""Resume behaviour of the batch runner with stand-in services."""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import cv2
+import numpy as np
+from PIL import Image
+from src.batch_runner import load_checkpoint, run_batch
+
+# What LLMService returns when the request to Ollama fails or times out
+FALLBACK_ASSESSMENT = {
+    "overall_assessment": "Unable to analyze the photo due to a technical issue. Please try again.",
+    "score": 0,
+    "criteria_scores": {},
+}
+
+
+class FakeLLMService:
+
+    def __init__(self, available: bool):
+        self.available = available
+
+    def generate_assessment(self, analysis, english_query, relevant_content):
+        if not self.available:
+            return dict(FALLBACK_ASSESSMENT)
+        return {"overall_assessment": "Well exposed.", "score": 4, "criteria_scores": {"exposure": 4}}
+
+    def generate_suggestions(self, assessment, analysis):
+        return ["Use a tripod."]
+
+
+class FakeImageAnalyzer:
+
+    def analyze_array(self, image):
+        return {"brightness": float(image.mean())}
+
+    def render_analysis_visualization(self, image, analysis=None):
+        return image
+
+
+class FakeImageEnhancer:
+
+    def enhance(self, image, analysis, suggestions):
+        return Image.fromarray(image[:, :, ::-1])
+
+
+class FakeTranslator:
+
+    def translate_to_english(self, text):
+        return text
+
+    def translate_to_portuguese(self, text):
+        return text
+
+
+class FakeRAGService:
+
+    def get_relevant_content(self, query, analysis):
+        return []
+
+
+class BatchResumeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.photos_dir = os.path.join(self.directory, "photos")
+        os.makedirs(self.photos_dir)
+        cv2.imwrite(os.path.join(self.photos_dir, "photo.png"), np.full((16, 16, 3), 128, dtype=np.uint8))
+        self.config_path = os.path.join(self.directory, "config.json")
+        with open(self.config_path, 'w') as f:
+            json.dump({"telemetry": {"enabled": False}, "batch": {"workers": 1}}, f)
+        self.output_path = os.path.join(self.directory, "results.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def run_batch(self, llm_service):
+        services = {
+            "image_analyzer": FakeImageAnalyzer(),
+            "image_enhancer": FakeImageEnhancer(),
+            "translator": FakeTranslator(),
+            "rag_service": FakeRAGService(),
+            "llm_service": llm_service,
+        }
+        with mock.patch("src.batch_runner.default_container"), \
+                mock.patch("src.batch_runner.BatchServices", lambda *args: services):
+            return run_batch(self.photos_dir, self.output_path, self.config_path)
+
+    def records(self):
+        with open(self.output_path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_failed_llm_call_is_retried_on_resume(self):
+        llm_service = FakeLLMService(available=False)
+        first = self.run_batch(llm_service)
+        self.assertEqual((first["assessed"], first["failed"]), (0, 1))
+        self.assertEqual(self.records()[-1]["status"], "error")
+        self.assertEqual(load_checkpoint(self.output_path), {})
+
+        llm_service.available = True
+        second = self.run_batch(llm_service)
+        self.assertEqual((second["assessed"], second["failed"]), (1, 0))
+        self.assertEqual(self.records()[-1]["status"], "ok")
+        self.assertEqual(self.records()[-1]["score"], 4)
+
+        third = self.run_batch(llm_service)
+        self.assertEqual((third["assessed"], third["failed"]), (0, 0))
+
+    def test_checkpoint_ignores_results_without_a_score(self):
+        with open(self.output_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"photo": "a.png", "sha256": "a", "status": "ok", "score": 0}) + "\n")
+            f.write(json.dumps({"photo": "b.png", "sha256": "b", "status": "ok", "score": 3.5}) + "\n")
+
+        self.assertEqual(list(load_checkpoint(self.output_path)), ["b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
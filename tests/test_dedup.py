@@ -0,0 +1,45 @@
+"""Tests for the MinHash LSH near-duplicate index."""
+import unittest
+from src.document_processing.dedup import NearDuplicateIndex, candidate_probability, find_duplicates, lsh_bands
+
+
+class LshBandsTest(unittest.TestCase):
+
+    def test_pairs_at_the_threshold_are_candidates(self):
+        for threshold in (0.5, 0.7, 0.8, 0.85, 0.9, 0.95):
+            for num_perm in (64, 128, 256):
+                bands, rows = lsh_bands(threshold, num_perm)
+                self.assertLessEqual(bands * rows, num_perm)
+                self.assertGreaterEqual(candidate_probability(threshold, bands, rows), 0.9,
+                                        f"threshold {threshold}, {num_perm} permutations")
+
+    def test_dissimilar_pairs_are_rarely_candidates(self):
+        bands, rows = lsh_bands(0.8, 128)
+        self.assertLess(candidate_probability(0.4, bands, rows), 0.1)
+
+    def test_candidate_rate_at_the_threshold(self):
+        # Word sets with exactly 80 shared words out of 100
+        index = NearDuplicateIndex("", threshold=0.8, num_perm=128, shingle_size=1)
+        pairs = 200
+        candidates = 0
+        for pair in range(pairs):
+            words = [f"w{pair}x{position}" for position in range(100)]
+            first = index.hasher.signature(" ".join(words[:90]))
+            second = index.hasher.signature(" ".join(words[10:]))
+            if any(a == b for a, b in zip(index._band_keys(first), index._band_keys(second))):
+                candidates += 1
+        self.assertGreaterEqual(candidates / pairs, 0.9)
+
+
+class FindDuplicatesTest(unittest.TestCase):
+
+    def test_finds_a_lightly_edited_copy(self):
+        text = " ".join(f"word{position}" for position in range(200))
+        edited = text.replace("word100 ", "changed ")
+        other = " ".join(f"other{position}" for position in range(200))
+
+        self.assertEqual(find_duplicates([text, other, edited]), {2: 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,220 @@
+"""Offline tests for the web fetcher against a local HTTP stub server."""
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from src.document_processing.web_fetcher import AsyncFetcher
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves the routes registered on the server; each route returns (status, headers, body)."""
+
+    def do_GET(self):
+        server = self.server
+        path = urlsplit(self.path).path
+        with server.lock:
+            server.requests.append((path, dict(self.headers)))
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            status, headers, body = server.routes[path](self)
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.routes = {}
+        self.requests = []
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+    def hits(self, path: str) -> list:
+        return [headers for request_path, headers in self.requests if request_path == path]
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self.thread.join()
+
+
+class StubWikipediaFetcher(AsyncFetcher):
+    """Fetcher that sends Wikipedia API calls to the stub server."""
+
+    def __init__(self, api_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.api_url = api_url
+
+    async def fetch(self, url, params=None):
+        if url.endswith(".wikipedia.org/w/api.php"):
+            url = self.api_url
+        return await super().fetch(url, params)
+
+
+class WebFetcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer()
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        if self.server.thread.is_alive():
+            self.server.stop()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def fetcher(self, **kwargs) -> AsyncFetcher:
+        options = dict(cache_dir=self.cache_dir, retries=2, backoff=0.0, timeout=5.0)
+        options.update(kwargs)
+        return AsyncFetcher(**options)
+
+    def test_revalidates_with_etag(self):
+        def page(handler):
+            if handler.headers.get("If-None-Match") == '"v1"':
+                return 304, {"ETag": '"v1"'}, b""
+            return 200, {"ETag": '"v1"', "Content-Type": "text/plain"}, b"hello"
+        self.server.routes["/page"] = page
+
+        with self.fetcher() as fetcher:
+            first = fetcher.submit(fetcher.fetch, self.server.url("/page")).result()
+            second = fetcher.submit(fetcher.fetch, self.server.url("/page")).result()
+
+        self.assertTrue(first.ok)
+        self.assertFalse(first.from_cache)
+        self.assertTrue(second.ok)
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.body, b"hello")
+        self.assertEqual(self.server.hits("/page")[1].get("If-None-Match"), '"v1"')
+
+    def test_fresh_cache_skips_the_network(self):
+        self.server.routes["/page"] = lambda handler: (200, {}, b"hello")
+
+        with self.fetcher(cache_max_age=60) as fetcher:
+            fetcher.submit(fetcher.fetch, self.server.url("/page")).result()
+            result = fetcher.submit(fetcher.fetch, self.server.url("/page")).result()
+
+        self.assertTrue(result.from_cache)
+        self.assertEqual(len(self.server.hits("/page")), 1)
+
+    def test_retries_rate_limit_after_retry_after(self):
+        def limited(handler):
+            if len(self.server.hits("/limited")) == 1:
+                return 429, {"Retry-After": "1"}, b""
+            return 200, {}, b"done"
+        self.server.routes["/limited"] = limited
+
+        with self.fetcher() as fetcher:
+            start = time.perf_counter()
+            result = fetcher.submit(fetcher.fetch, self.server.url("/limited")).result()
+            elapsed = time.perf_counter() - start
+
+        self.assertTrue(result.ok)
+        self.assertEqual(result.body, b"done")
+        self.assertEqual(len(self.server.hits("/limited")), 2)
+        self.assertGreaterEqual(elapsed, 0.9)
+
+    def test_retries_server_errors(self):
+        def flaky(handler):
+            if len(self.server.hits("/flaky")) <= 2:
+                return 503, {}, b""
+            return 200, {}, b"done"
+        self.server.routes["/flaky"] = flaky
+
+        with self.fetcher(retries=2) as fetcher:
+            result = fetcher.submit(fetcher.fetch, self.server.url("/flaky")).result()
+
+        self.assertTrue(result.ok)
+        self.assertEqual(len(self.server.hits("/flaky")), 3)
+
+    def test_gives_up_after_the_retries(self):
+        self.server.routes["/down"] = lambda handler: (500, {}, b"")
+
+        with self.fetcher(retries=1) as fetcher:
+            result = fetcher.submit(fetcher.fetch, self.server.url("/down")).result()
+
+        self.assertFalse(result.ok)
+        self.assertEqual(result.error, "HTTP 500")
+        self.assertEqual(len(self.server.hits("/down")), 2)
+
+    def test_limits_connections_per_host(self):
+        def slow(handler):
+            time.sleep(0.2)
+            return 200, {}, b"slow"
+        self.server.routes["/slow"] = slow
+
+        with self.fetcher(per_host_limit=2) as fetcher:
+            futures = [fetcher.submit(fetcher.fetch, self.server.url(f"/slow?page={page}")) for page in range(6)]
+            results = [future.result() for future in futures]
+
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(self.server.max_active, 2)
+
+    def test_falls_back_to_the_cached_copy_offline(self):
+        self.server.routes["/page"] = lambda handler: (200, {"Content-Type": "text/plain"}, b"cached")
+        url = self.server.url("/page")
+
+        with self.fetcher(retries=0) as fetcher:
+            fetcher.submit(fetcher.fetch, url).result()
+            self.server.stop()
+            result = fetcher.submit(fetcher.fetch, url).result()
+
+        self.assertTrue(result.ok)
+        self.assertTrue(result.from_cache)
+        self.assertEqual(result.body, b"cached")
+
+    def test_attributes_each_wikipedia_article(self):
+        articles = {"Aperture": "Aperture text", "Shutter speed": "Shutter text"}
+
+        def api(handler):
+            query = parse_qs(urlsplit(handler.path).query)
+            if query.get("list") == ["search"]:
+                payload = {"query": {"search": [{"title": title} for title in articles]}}
+            else:
+                title = query["titles"][0]
+                payload = {"query": {"pages": {title: {"title": title, "extract": articles[title]}}}}
+            return 200, {"Content-Type": "application/json"}, json.dumps(payload).encode('utf-8')
+        self.server.routes["/w/api.php"] = api
+
+        fetcher = StubWikipediaFetcher(self.server.url("/w/api.php"), cache_dir=self.cache_dir, backoff=0.0)
+        with fetcher:
+            documents = fetcher.submit(fetcher.fetch_wikipedia_documents, "exposure").result()
+
+        self.assertEqual(
+            sorted((document["source"], document["content"]) for document in documents),
+            [("Wikipedia: Aperture", "Aperture text"), ("Wikipedia: Shutter speed", "Shutter text")]
+        )
+
+    def test_ignores_invalid_wikipedia_responses(self):
+        self.server.routes["/w/api.php"] = lambda handler: (200, {"Content-Type": "application/json"}, b"<html>")
+
+        fetcher = StubWikipediaFetcher(self.server.url("/w/api.php"), cache_dir=self.cache_dir, backoff=0.0)
+        with fetcher:
+            documents = fetcher.submit(fetcher.fetch_wikipedia_documents, "exposure").result()
+
+        self.assertEqual(documents, [])
+
+
+if __name__ == "__main__":
+    unittest.main()